@@ -8,19 +8,23 @@ import json
 import time
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
-from anthropic import Anthropic
+from anthropic import Anthropic, APIStatusError
 import os
+from rate_limiter import RateLimiter, get_rate_limiter, get_all_limiter_metrics, estimate_tokens, compute_backoff
+from response_cache import ResponseCache, make_cache_key
+from task_store import AgentTask, TaskStore
 
-@dataclass
-class AgentTask:
-    id: str
-    prompt: str
-    status: str  # 'queued', 'processing', 'completed', 'failed'
-    created_at: float
-    completed_at: Optional[float] = None
-    response: Optional[str] = None
-    error: Optional[str] = None
-    tokens_used: Optional[int] = None
+# Beta header for prompt caching; ignored by API versions where caching is GA
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+
+# Provider responses that are worth retrying after a backoff
+RETRYABLE_STATUS_CODES = {429, 529}
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Per-agent task retention; responses larger than the threshold are kept on disk
+MAX_RETAINED_TASKS = int(os.getenv("CLAUDE_AGENT_MAX_TASKS", 1000))
+RESPONSE_SPILL_BYTES = 64 * 1024
+DATA_DIR = os.getenv("DIRK_DATA_DIR", os.path.expanduser("~/.dirk-brain"))
 
 @dataclass
 class AgentMetrics:
@@ -31,14 +35,22 @@ class AgentMetrics:
     uptime_seconds: float
     efficiency_score: float
     accuracy_score: float
+    cache_write_tokens: int = 0
+    cache_read_tokens: int = 0
 
 class ClaudeAgent:
     def __init__(self, agent_id: str, model: str = "claude-3-5-sonnet-20241022"):
         self.agent_id = agent_id
         self.model = model
         self.client = None
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.system_context: Optional[str] = None
         self.status = "idle"  # 'idle', 'active', 'error', 'deploying'
-        self.tasks: Dict[str, AgentTask] = {}
+        self.tasks = TaskStore(
+            max_tasks=MAX_RETAINED_TASKS,
+            spill_threshold=RESPONSE_SPILL_BYTES,
+            spill_dir=os.path.join(DATA_DIR, "task_responses", agent_id)
+        )
         self.metrics = AgentMetrics(
             tasks_completed=0,
             tasks_failed=0,
@@ -53,7 +65,9 @@ class ClaudeAgent:
     def initialize(self, api_key: str) -> bool:
         """Initialize Claude API client with real API key"""
         try:
-            self.client = Anthropic(api_key=api_key)
+            # Retries are handled here so backoff is shared through the rate limiter
+            self.client = Anthropic(api_key=api_key, max_retries=0)
+            self.rate_limiter = get_rate_limiter(api_key)
             self.status = "idle"
             return True
         except Exception as e:
@@ -61,6 +75,10 @@ class ClaudeAgent:
             print(f"Failed to initialize Claude agent {self.agent_id}: {e}")
             return False
     
+    def set_system_context(self, context: Optional[str]):
+        """Set persistent system context sent (and provider-cached) with every task"""
+        self.system_context = context or None
+    
     async def execute_task(self, task_id: str, prompt: str, max_tokens: int = 4000) -> AgentTask:
         """Execute a real task using Claude API"""
         task = AgentTask(
@@ -69,33 +87,27 @@ class ClaudeAgent:
             status="processing",
             created_at=time.time()
         )
-        self.tasks[task_id] = task
+        self.tasks.add(task)
         self.status = "active"
         
         try:
             start_time = time.time()
-            
-            # Make actual API call to Claude
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=max_tokens,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            message = await self._create_message(prompt, max_tokens)
             
             end_time = time.time()
             response_time = end_time - start_time
             
             # Update task with response
-            task.status = "completed"
             task.completed_at = end_time
-            task.response = message.content[0].text if message.content else ""
+            self.tasks.set_response(task, message.content[0].text if message.content else "")
+            self.tasks.set_status(task, "completed")
             task.tokens_used = message.usage.input_tokens + message.usage.output_tokens
             
             # Update metrics
             self.metrics.tasks_completed += 1
             self.metrics.total_tokens_used += task.tokens_used
+            self.metrics.cache_write_tokens += getattr(message.usage, "cache_creation_input_tokens", 0) or 0
+            self.metrics.cache_read_tokens += getattr(message.usage, "cache_read_input_tokens", 0) or 0
             
             # Update average response time
             if self.metrics.tasks_completed == 1:
@@ -118,15 +130,76 @@ class ClaudeAgent:
             return task
             
         except Exception as e:
-            task.status = "failed"
+            self.tasks.set_status(task, "failed")
             task.completed_at = time.time()
             task.error = str(e)
             
             self.metrics.tasks_failed += 1
-            self.status = "error" if "API" in str(e) else "idle"
+            if isinstance(e, APIStatusError) and e.status_code in RETRYABLE_STATUS_CODES:
+                # Exhausted retries on a rate limit; the key is throttled, not broken
+                self.status = "idle"
+            else:
+                self.status = "error" if "API" in str(e) else "idle"
             
             return task
     
+    async def _create_message(self, prompt: str, max_tokens: int):
+        """Call the Messages API through the shared rate limiter with backoff on 429/529"""
+        request = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+        estimated_input = estimate_tokens(prompt)
+        
+        if self.system_context:
+            # Cache breakpoint after the system block: the context is billed once per cache window
+            request["system"] = [{
+                "type": "text",
+                "text": self.system_context,
+                "cache_control": {"type": "ephemeral"}
+            }]
+            request["extra_headers"] = {"anthropic-beta": PROMPT_CACHING_BETA}
+            estimated_input += estimate_tokens(self.system_context)
+        
+        attempt = 0
+        
+        while True:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(estimated_input)
+            
+            try:
+                message = await asyncio.to_thread(self.client.messages.create, **request)
+            except APIStatusError as e:
+                if e.status_code not in RETRYABLE_STATUS_CODES or attempt >= MAX_RATE_LIMIT_RETRIES:
+                    raise
+                delay = compute_backoff(attempt, self._retry_after(e))
+                if self.rate_limiter:
+                    self.rate_limiter.record_rate_limited(delay, estimated_input)
+                    # The rate limiter sleeps until the block lifts
+                else:
+                    await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            
+            if self.rate_limiter:
+                self.rate_limiter.record_usage(
+                    estimated_input,
+                    message.usage.input_tokens + (getattr(message.usage, "cache_creation_input_tokens", 0) or 0),
+                    message.usage.output_tokens
+                )
+            return message
+    
+    @staticmethod
+    def _retry_after(error: APIStatusError) -> Optional[float]:
+        """Parse the retry-after header from a provider error, if present"""
+        try:
+            return float(error.response.headers.get("retry-after"))
+        except (AttributeError, TypeError, ValueError):
+            return None
+    
     def get_status(self) -> Dict[str, Any]:
         """Get current agent status and metrics"""
         self.metrics.uptime_seconds = time.time() - self.start_time
@@ -135,9 +208,11 @@ class ClaudeAgent:
             "agent_id": self.agent_id,
             "model": self.model,
             "status": self.status,
+            "has_system_context": self.system_context is not None,
             "metrics": asdict(self.metrics),
-            "active_tasks": len([t for t in self.tasks.values() if t.status == "processing"]),
-            "total_tasks": len(self.tasks),
+            "active_tasks": self.tasks.status_counts.get("processing", 0),
+            "total_tasks": self.tasks.total_recorded,
+            "retained_tasks": len(self.tasks),
             "last_updated": time.time()
         }
     
@@ -147,10 +222,7 @@ class ClaudeAgent:
     
     def list_tasks(self, status_filter: Optional[str] = None) -> List[AgentTask]:
         """List tasks with optional status filter"""
-        tasks = list(self.tasks.values())
-        if status_filter:
-            tasks = [t for t in tasks if t.status == status_filter]
-        return sorted(tasks, key=lambda t: t.created_at, reverse=True)
+        return self.tasks.newest_first(status_filter)
 
 
 class ClaudeAgentPool:
@@ -159,6 +231,10 @@ class ClaudeAgentPool:
     def __init__(self):
         self.agents: Dict[str, ClaudeAgent] = {}
         self.round_robin_index = 0
+        self.response_cache = ResponseCache(
+            db_path=os.path.join(DATA_DIR, "response_cache.sqlite3"),
+            ttl_seconds=float(os.getenv("CLAUDE_RESPONSE_CACHE_TTL", 3600))
+        )
     
     def add_agent(self, agent_id: str, model: str = "claude-3-5-sonnet-20241022") -> ClaudeAgent:
         """Add new Claude agent to pool"""
@@ -175,8 +251,9 @@ class ClaudeAgentPool:
         return initialized
     
     def get_available_agent(self) -> Optional[ClaudeAgent]:
-        """Get next available agent using round-robin"""
-        available_agents = [a for a in self.agents.values() if a.status in ["idle", "active"]]
+        """Get next available agent using round-robin; agents without a client (not initialised) are skipped"""
+        available_agents = [a for a in self.agents.values()
+                            if a.status in ["idle", "active"] and a.client is not None]
         if not available_agents:
             return None
         
@@ -185,19 +262,43 @@ class ClaudeAgentPool:
         self.round_robin_index += 1
         return agent
     
-    async def execute_task_on_pool(self, task_id: str, prompt: str, max_tokens: int = 4000) -> Optional[AgentTask]:
-        """Execute task on any available agent in pool"""
+    async def execute_task_on_pool(self, task_id: str, prompt: str, max_tokens: int = 4000,
+                                   use_cache: bool = True) -> Optional[AgentTask]:
+        """Execute task on any available agent in pool, serving repeats from the response cache"""
         agent = self.get_available_agent()
         if not agent:
             return None
         
-        return await agent.execute_task(task_id, prompt, max_tokens)
+        if not use_cache:
+            return await agent.execute_task(task_id, prompt, max_tokens)
+        
+        key = make_cache_key(agent.model, agent.system_context, prompt, max_tokens)
+        result, source = await self.response_cache.get_or_compute(
+            key,
+            lambda: agent.execute_task(task_id, prompt, max_tokens),
+            lambda task: {"response": task.response, "tokens_used": task.tokens_used, "model": agent.model}
+            if task.status == "completed" else None
+        )
+        if source == "miss":
+            return result
+        
+        # Served from cache or coalesced onto an identical in-flight request
+        now = time.time()
+        return AgentTask(
+            id=task_id,
+            prompt=prompt,
+            status="completed",
+            created_at=now,
+            completed_at=now,
+            response=result["response"],
+            tokens_used=0
+        )
     
     def get_pool_status(self) -> Dict[str, Any]:
         """Get status of entire agent pool"""
         agent_statuses = {aid: agent.get_status() for aid, agent in self.agents.items()}
         
-        total_tasks = sum(len(agent.tasks) for agent in self.agents.values())
+        total_tasks = sum(agent.tasks.total_recorded for agent in self.agents.values())
         total_completed = sum(agent.metrics.tasks_completed for agent in self.agents.values())
         total_failed = sum(agent.metrics.tasks_failed for agent in self.agents.values())
         
@@ -208,6 +309,8 @@ class ClaudeAgentPool:
             "total_completed": total_completed,
             "total_failed": total_failed,
             "pool_efficiency": (total_completed / max(total_tasks, 1)) * 100,
+            "rate_limits": get_all_limiter_metrics(),
+            "response_cache": self.response_cache.get_stats(),
             "timestamp": time.time()
         }
 
@@ -6,12 +6,17 @@ Discovers projects and generates specialized Claude Code agents for each
 import os
 import json
 import asyncio
+import time
+import hashlib
 import subprocess
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Any, Iterator, AsyncIterator, Set, Callable, Awaitable
 from dataclasses import dataclass, asdict
 from pathlib import Path
-import git
-from claude_agent import ClaudeAgent, ClaudeAgentPool
+from git_metadata import read_git_metadata
+from manifests import read_manifest, project_dependencies
+from project_walker import walk_projects, relative_name
+from claude_agent import ClaudeAgent, ClaudeAgentPool, DATA_DIR
 
 @dataclass
 class ProjectInfo:
@@ -39,44 +44,64 @@ class SubAgentConfig:
     capabilities: List[str]
     tools_enabled: List[str]
 
+PACKAGE_FILES = ["package.json", "requirements.txt", "pyproject.toml", "Cargo.toml", "go.mod", "pom.xml"]
+ENTRY_POINT_FILES = ["main.py", "app.py", "index.js", "main.rs", "main.go"]
+
+DEPLOY_CONCURRENCY = int(os.getenv("AGENT_DEPLOY_CONCURRENCY", "8"))
+
 class ProjectDiscovery:
-    def __init__(self, base_directories: List[str] = None):
+    def __init__(self, base_directories: List[str] = None, max_workers: int = None,
+                 deployment_state_path: Optional[str] = None, max_depth: Optional[int] = None,
+                 ignore: Optional[List[str]] = None, visit_budget: Optional[int] = None):
         self.base_directories = base_directories or [
             os.path.expanduser("~/projects"),
             os.path.expanduser("~/dev"),
             os.path.expanduser("~/code"),
             "/Users/izverg/projects"  # Current directory
         ]
+        # Scanning is dominated by filesystem and git I/O, so threads overlap well
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 4) * 4)
+        # Nested project discovery limits (see project_walker)
+        self.walk_options = {"max_depth": max_depth, "ignore": ignore, "visit_budget": visit_budget}
         self.discovered_projects: Dict[str, ProjectInfo] = {}
         self.sub_agents: Dict[str, ClaudeAgent] = {}
         self.agent_configs: Dict[str, SubAgentConfig] = {}
+        # Per-agent (file stat key, content fingerprint) of the current system context
+        self.context_state: Dict[str, tuple[tuple, str]] = {}
+        # agent_id -> {"fingerprint", "project_path", "deployed_at"}, persisted across restarts
+        self.deployment_state_path = deployment_state_path or os.path.join(DATA_DIR, "agent_deployments.json")
+        self.deployment_state: Dict[str, Dict[str, Any]] = self._load_deployment_state()
+        self.last_deployment: Dict[str, Any] = {}
+    
+    def list_files(self, project_path: str) -> Set[str]:
+        """Names of regular files directly inside a directory (single scandir pass)"""
+        with os.scandir(project_path) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
     
-    def detect_project_type(self, project_path: str) -> tuple[str, str, Optional[str]]:
+    def detect_project_type(self, project_path: str, files: Optional[Set[str]] = None) -> tuple[str, str, Optional[str]]:
         """Detect project type, language, and framework"""
         path = Path(project_path)
         
         # Check for various project indicators
-        files = [f.name for f in path.iterdir() if f.is_file()]
+        if files is None:
+            files = self.list_files(project_path)
         
         # React/Next.js projects
         if "package.json" in files:
-            try:
-                with open(path / "package.json", 'r') as f:
-                    package_data = json.load(f)
-                    deps = {**package_data.get("dependencies", {}), **package_data.get("devDependencies", {})}
-                    
-                    if "next" in deps:
-                        return "react", "typescript", "nextjs"
-                    elif "react" in deps:
-                        return "react", "javascript", "react"
-                    elif "@vue/cli" in deps or "vue" in deps:
-                        return "vue", "javascript", "vue"
-                    elif "svelte" in deps:
-                        return "svelte", "javascript", "svelte"
-                    else:
-                        return "node", "javascript", "nodejs"
-            except:
-                pass
+            package = read_manifest(str(path / "package.json"))
+            if package:
+                deps = package.all_dependencies()
+                
+                if "next" in deps:
+                    return "react", "typescript", "nextjs"
+                elif "react" in deps:
+                    return "react", "javascript", "react"
+                elif "@vue/cli" in deps or "vue" in deps:
+                    return "vue", "javascript", "vue"
+                elif "svelte" in deps:
+                    return "svelte", "javascript", "svelte"
+                else:
+                    return "node", "javascript", "nodejs"
         
         # Python projects
         if any(f in files for f in ["requirements.txt", "pyproject.toml", "setup.py", "Pipfile"]):
@@ -105,129 +130,195 @@ class ProjectDiscovery:
         return "unknown", "unknown", None
     
     def extract_dependencies(self, project_path: str, project_type: str) -> Dict[str, str]:
-        """Extract project dependencies"""
-        path = Path(project_path)
-        dependencies = {}
-        
-        try:
-            if project_type == "react" or project_type == "node":
-                package_json = path / "package.json"
-                if package_json.exists():
-                    with open(package_json, 'r') as f:
-                        data = json.load(f)
-                        deps = data.get("dependencies", {})
-                        dev_deps = data.get("devDependencies", {})
-                        dependencies = {**deps, **dev_deps}
-            
-            elif project_type == "python":
-                # Check requirements.txt
-                req_file = path / "requirements.txt"
-                if req_file.exists():
-                    with open(req_file, 'r') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line and not line.startswith('#'):
-                                if '==' in line:
-                                    name, version = line.split('==', 1)
-                                    dependencies[name] = version
-                                else:
-                                    dependencies[line] = "latest"
-                
-                # Check pyproject.toml
-                pyproject = path / "pyproject.toml"
-                if pyproject.exists():
-                    # Simple parsing - would use toml library in production
-                    dependencies["pyproject"] = "detected"
-            
-            elif project_type == "rust":
-                cargo_toml = path / "Cargo.toml"
-                if cargo_toml.exists():
-                    dependencies["cargo"] = "detected"
-        
-        except Exception as e:
-            print(f"Error extracting dependencies from {project_path}: {e}")
-        
-        return dependencies
+        """Extract project dependencies (package.json, requirements.txt, pyproject.toml, Cargo.toml, go.mod)"""
+        return project_dependencies(project_path, project_type)
     
     def get_git_info(self, project_path: str) -> tuple[Optional[str], Optional[str]]:
-        """Get git repository info"""
+        """Get git repository info (origin URL and current branch) without forking git"""
         try:
-            repo = git.Repo(project_path)
-            remote_url = None
-            if repo.remotes:
-                remote_url = repo.remotes.origin.url
-            current_branch = repo.active_branch.name
-            return remote_url, current_branch
-        except:
+            info = read_git_metadata(project_path)
+        except Exception:
+            return None, None
+        if not info:
             return None, None
+        return info.remote_url, info.branch
+    
+    def scan_project(self, item_path: str, name: str, last_modified: float) -> Optional[ProjectInfo]:
+        """Analyze one candidate directory, listing it only once"""
+        try:
+            files = self.list_files(item_path)
+        except OSError:
+            return None
+        
+        # Check if it's a project directory
+        project_type, language, framework = self.detect_project_type(item_path, files)
+        if project_type == "unknown":
+            return None
+        
+        # Get git info
+        git_repo, git_branch = self.get_git_info(item_path)
+        
+        # Get dependencies
+        dependencies = self.extract_dependencies(item_path, project_type)
+        
+        return ProjectInfo(
+            path=item_path,
+            name=name,
+            type=project_type,
+            language=language,
+            framework=framework,
+            git_repo=git_repo,
+            git_branch=git_branch,
+            package_files=[f for f in PACKAGE_FILES if f in files],
+            entry_points=[f for f in ENTRY_POINT_FILES if f in files],
+            dependencies=dependencies,
+            claude_md_exists="CLAUDE.md" in files,
+            last_modified=last_modified
+        )
+    
+    def list_candidates(self, directory: str) -> List[tuple[str, str, float]]:
+        """(path, name, mtime) of the project directories under a base directory, nested ones included"""
+        candidates = []
+        walk = walk_projects(directory, **self.walk_options)
+        for path in walk.projects:
+            try:
+                candidates.append((path, relative_name(directory, path), os.path.getmtime(path)))
+            except OSError as e:
+                print(f"Error scanning directory {path}: {e}")
+        return candidates
+    
+    def _base_directories(self) -> List[str]:
+        """Existing base directories, without duplicates that resolve to the same place"""
+        seen = set()
+        directories = []
+        for directory in self.base_directories:
+            real = os.path.realpath(directory)
+            if real not in seen and os.path.isdir(real):
+                seen.add(real)
+                directories.append(directory)
+        return directories
+    
+    def iter_projects(self, directories: Optional[List[str]] = None) -> Iterator[tuple[int, ProjectInfo]]:
+        """Scan directories on a thread pool, yielding (directory index, project) as each completes"""
+        directories = directories if directories is not None else self._base_directories()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.scan_project, *candidate): index
+                for index, directory in enumerate(directories)
+                for candidate in self.list_candidates(directory)
+            }
+            for future in as_completed(futures):
+                try:
+                    project = future.result()
+                except Exception as e:
+                    print(f"Error scanning project: {e}")
+                    continue
+                if project:
+                    yield futures[future], project
     
     def scan_directory(self, directory: str) -> List[ProjectInfo]:
         """Scan directory for projects"""
-        projects = []
-        
         if not os.path.exists(directory):
-            return projects
-        
-        try:
-            for item in os.listdir(directory):
-                item_path = os.path.join(directory, item)
-                if os.path.isdir(item_path) and not item.startswith('.'):
-                    # Check if it's a project directory
-                    project_type, language, framework = self.detect_project_type(item_path)
-                    
-                    if project_type != "unknown":
-                        # Get git info
-                        git_repo, git_branch = self.get_git_info(item_path)
-                        
-                        # Get dependencies
-                        dependencies = self.extract_dependencies(item_path, project_type)
-                        
-                        # Check for CLAUDE.md
-                        claude_md = os.path.exists(os.path.join(item_path, "CLAUDE.md"))
-                        
-                        # Find package files and entry points
-                        package_files = []
-                        entry_points = []
-                        
-                        for file in os.listdir(item_path):
-                            if file in ["package.json", "requirements.txt", "Cargo.toml", "go.mod", "pom.xml"]:
-                                package_files.append(file)
-                            if file in ["main.py", "app.py", "index.js", "main.rs", "main.go"]:
-                                entry_points.append(file)
-                        
-                        project = ProjectInfo(
-                            path=item_path,
-                            name=item,
-                            type=project_type,
-                            language=language,
-                            framework=framework,
-                            git_repo=git_repo,
-                            git_branch=git_branch,
-                            package_files=package_files,
-                            entry_points=entry_points,
-                            dependencies=dependencies,
-                            claude_md_exists=claude_md,
-                            last_modified=os.path.getmtime(item_path)
-                        )
-                        projects.append(project)
+            return []
+        return [project for _, project in self.iter_projects([directory])]
+    
+    def _set_discovered(self, found: Dict[str, tuple[int, ProjectInfo]]) -> Dict[str, ProjectInfo]:
+        all_projects = {name: project for name, (_, project) in found.items()}
+        self.discovered_projects = all_projects
         
-        except Exception as e:
-            print(f"Error scanning directory {directory}: {e}")
+        # Keep already-deployed agents' cached context in step with the rescan
+        for project in all_projects.values():
+            self.refresh_agent_context(project)
         
-        return projects
+        return all_projects
+    
+    @staticmethod
+    def _merge(found: Dict[str, tuple[int, ProjectInfo]], index: int, project: ProjectInfo) -> bool:
+        """Later base directories win on name clashes, regardless of completion order"""
+        current = found.get(project.name)
+        if current and current[0] > index:
+            return False
+        found[project.name] = (index, project)
+        return True
     
     def discover_all_projects(self) -> Dict[str, ProjectInfo]:
         """Discover all projects in base directories"""
-        all_projects = {}
+        found: Dict[str, tuple[int, ProjectInfo]] = {}
+        for index, project in self.iter_projects():
+            self._merge(found, index, project)
+        return self._set_discovered(found)
+    
+    def _base_directory_of(self, path: str) -> Optional[str]:
+        """The (deepest) base directory containing path"""
+        real = os.path.realpath(path)
+        matches = [
+            d for d in self._base_directories()
+            if real.startswith(os.path.join(os.path.realpath(d), ""))
+        ]
+        return max(matches, key=lambda d: len(os.path.realpath(d)), default=None)
+    
+    def update_project(self, item_path: str) -> tuple[Optional[ProjectInfo], Optional[str]]:
+        """
+        Rescan one project directory under a base directory in place.
+        Returns (updated project, None), (None, removed project name) or (None, None).
+        """
+        return self.apply_project_update(item_path, self.rescan_project(item_path))
+    
+    def rescan_project(self, item_path: str) -> Optional[tuple[str, Optional[ProjectInfo]]]:
+        """(name, project or None if it is gone) for a directory under a base directory; reads only, safe in a thread"""
+        base = self._base_directory_of(item_path)
+        if base is None:
+            return None
         
-        for directory in self.base_directories:
-            if os.path.exists(directory):
-                projects = self.scan_directory(directory)
-                for project in projects:
-                    all_projects[project.name] = project
+        name = relative_name(os.path.realpath(base), os.path.realpath(item_path))
+        project = None
+        if os.path.isdir(item_path) and not os.path.basename(item_path).startswith('.'):
+            project = self.scan_project(item_path, name, os.path.getmtime(item_path))
+        return name, project
+    
+    def apply_project_update(self, item_path: str, rescanned: Optional[tuple[str, Optional[ProjectInfo]]]
+                             ) -> tuple[Optional[ProjectInfo], Optional[str]]:
+        """Store a rescan_project result in discovered_projects (on the event loop)"""
+        if rescanned is None:
+            return None, None
         
-        self.discovered_projects = all_projects
-        return all_projects
+        name, project = rescanned
+        if project is None:
+            current = self.discovered_projects.get(name)
+            if current and current.path == item_path:
+                del self.discovered_projects[name]
+                return None, name
+            return None, None
+        
+        self.discovered_projects[name] = project
+        self.refresh_agent_context(project)
+        return project, None
+    
+    async def stream_projects(self) -> AsyncIterator[ProjectInfo]:
+        """Discover all projects, yielding each one as soon as it has been scanned"""
+        loop = asyncio.get_running_loop()
+        directories = self._base_directories()
+        found: Dict[str, tuple[int, ProjectInfo]] = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            candidates = await asyncio.gather(*(
+                loop.run_in_executor(executor, self.list_candidates, directory) for directory in directories
+            ))
+            
+            async def scan(index: int, candidate: tuple) -> tuple[int, Optional[ProjectInfo]]:
+                return index, await loop.run_in_executor(executor, self.scan_project, *candidate)
+            
+            scans = [scan(index, c) for index, batch in enumerate(candidates) for c in batch]
+            for next_scan in asyncio.as_completed(scans):
+                try:
+                    index, project = await next_scan
+                except Exception as e:
+                    print(f"Error scanning project: {e}")
+                    continue
+                if project and self._merge(found, index, project):
+                    yield project
+        
+        self._set_discovered(found)
     
     def generate_sub_agent_config(self, project: ProjectInfo) -> SubAgentConfig:
         """Generate Claude Code sub-agent configuration for project"""
@@ -282,6 +373,20 @@ class ProjectDiscovery:
     
     async def deploy_sub_agent(self, project: ProjectInfo, api_key: str) -> Optional[ClaudeAgent]:
         """Deploy a specialized Claude Code sub-agent for project"""
+        # Client setup and context building read project files; keep them off the event loop,
+        # then register the agent here so the agent tables are only written from the loop
+        built = await asyncio.to_thread(self._build_sub_agent, project, api_key)
+        if built is None:
+            return None
+        
+        agent, config, context = built
+        self.agent_configs[config.agent_id] = config
+        self.sub_agents[config.agent_id] = agent
+        self._apply_agent_context(agent, config.agent_id, context)
+        return agent
+    
+    def _build_sub_agent(self, project: ProjectInfo, api_key: str) -> Optional[tuple]:
+        """(agent, config, loaded context) for project, or None if the key is rejected; touches no shared state"""
         config = self.generate_sub_agent_config(project)
         
         # Create specialized Claude agent
@@ -291,26 +396,72 @@ class ProjectDiscovery:
         if not agent.initialize(api_key):
             return None
         
-        # Store configuration
-        self.agent_configs[config.agent_id] = config
-        self.sub_agents[config.agent_id] = agent
+        # Project context becomes the agent's cached system prompt for every task
+        return agent, config, self._load_agent_context(project, config, None)
+    
+    def _context_stat_key(self, project: ProjectInfo) -> tuple:
+        """Cheap stat-based key over CLAUDE.md and the package files"""
+        key = []
+        for file in ["CLAUDE.md", *project.package_files]:
+            try:
+                st = os.stat(os.path.join(project.path, file))
+                key.append((file, st.st_mtime_ns, st.st_size))
+            except OSError:
+                key.append((file, None, None))
+        return tuple(key)
+    
+    def _read_claude_md(self, project: ProjectInfo) -> Optional[str]:
+        """Read the project's CLAUDE.md, if any"""
+        try:
+            with open(os.path.join(project.path, "CLAUDE.md"), 'r', errors='replace') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def refresh_agent_context(self, project: ProjectInfo) -> bool:
+        """Rebuild a deployed agent's system context if its dependencies or CLAUDE.md changed"""
+        config = self.generate_sub_agent_config(project)
+        agent = self.sub_agents.get(config.agent_id)
+        if not agent:
+            return False
         
-        # Create initial context prompt
-        context_prompt = self.build_context_prompt(project, config)
+        context = self._load_agent_context(project, config, self.context_state.get(config.agent_id))
+        return self._apply_agent_context(agent, config.agent_id, context)
+    
+    def _load_agent_context(self, project: ProjectInfo, config: SubAgentConfig,
+                            previous: Optional[tuple]) -> Optional[tuple]:
+        """
+        Read an agent's context files: None if their stat key matches `previous`, otherwise
+        (stat key, content fingerprint, system prompt or None when the content is unchanged)
+        """
+        stat_key = self._context_stat_key(project)
+        if previous and previous[0] == stat_key:
+            return None
         
-        # Send context to agent
-        try:
-            await agent.execute_task(
-                f"{config.agent_id}-context",
-                context_prompt,
-                max_tokens=1000
-            )
-        except Exception as e:
-            print(f"Failed to set context for agent {config.agent_id}: {e}")
+        # Files were touched; re-read them and only rebuild if the content actually differs
+        if previous:
+            project.dependencies = self.extract_dependencies(project.path, project.type)
+        claude_md = self._read_claude_md(project)
+        project.claude_md_exists = claude_md is not None
+        fingerprint = hashlib.sha256(json.dumps(
+            [project.dependencies, claude_md, asdict(config)], sort_keys=True
+        ).encode()).hexdigest()
         
-        return agent
+        if previous and previous[1] == fingerprint:
+            return stat_key, fingerprint, None
+        return stat_key, fingerprint, self.build_context_prompt(project, config, claude_md)
+    
+    def _apply_agent_context(self, agent: ClaudeAgent, agent_id: str, context: Optional[tuple]) -> bool:
+        if context is None:
+            return False
+        stat_key, fingerprint, prompt = context
+        self.context_state[agent_id] = (stat_key, fingerprint)
+        if prompt is None:
+            return False
+        agent.set_system_context(prompt)
+        return True
     
-    def build_context_prompt(self, project: ProjectInfo, config: SubAgentConfig) -> str:
+    def build_context_prompt(self, project: ProjectInfo, config: SubAgentConfig, claude_md: Optional[str] = None) -> str:
         """Build context prompt for sub-agent"""
         context = f"""You are a specialized Claude Code agent for the project "{project.name}".
 
@@ -329,31 +480,126 @@ Project structure includes:
 - Entry points: {', '.join(project.entry_points)}
 - CLAUDE.md exists: {project.claude_md_exists}
 
-Dependencies: {json.dumps(project.dependencies, indent=2)}
+Dependencies: {json.dumps(project.dependencies, indent=2, sort_keys=True)}
 
 You are ready to assist with development tasks for this project. Always consider the project context and use appropriate tools for the task."""
         
+        if claude_md:
+            context += f"\n\nProject instructions from CLAUDE.md:\n\n{claude_md}"
+        
         return context
     
-    async def deploy_all_agents(self, api_key: str) -> Dict[str, bool]:
-        """Deploy sub-agents for all discovered projects"""
-        deployment_results = {}
+    def _load_deployment_state(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.deployment_state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_deployment_state(self):
+        try:
+            os.makedirs(os.path.dirname(self.deployment_state_path), exist_ok=True)
+            tmp_path = f"{self.deployment_state_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.deployment_state, f)
+            os.replace(tmp_path, self.deployment_state_path)
+        except OSError as e:
+            print(f"Failed to save agent deployment state: {e}")
+    
+    def deployment_fingerprint(self, project: ProjectInfo, api_key: str) -> str:
+        """Everything an agent is built from: its config, the context files and the key it runs under"""
+        config = self.generate_sub_agent_config(project)
+        return hashlib.sha256(json.dumps([
+            asdict(config),
+            project.dependencies,
+            self._context_stat_key(project),
+            hashlib.sha256(api_key.encode()).hexdigest()
+        ], sort_keys=True, default=str).encode()).hexdigest()
+    
+    async def _deploy_project(self, project: ProjectInfo, api_key: str) -> str:
+        """Deploy one agent; returns 'deployed', 'restored', 'unchanged' or 'failed'"""
+        agent_id = self.generate_sub_agent_config(project).agent_id
+        fingerprint = await asyncio.to_thread(self.deployment_fingerprint, project, api_key)
+        previous = self.deployment_state.get(agent_id)
+        unchanged = previous is not None and previous.get("fingerprint") == fingerprint
         
-        for project_name, project in self.discovered_projects.items():
-            try:
-                agent = await self.deploy_sub_agent(project, api_key)
-                deployment_results[project_name] = agent is not None
-            except Exception as e:
-                print(f"Failed to deploy agent for {project_name}: {e}")
-                deployment_results[project_name] = False
+        if unchanged and agent_id in self.sub_agents:
+            return "unchanged"
+        
+        # Deploying builds a client and reads project files without calling the API, so there is
+        # nothing transient to retry: initialize() reports a rejected key as None
+        try:
+            agent = await self.deploy_sub_agent(project, api_key)
+        except Exception as e:
+            print(f"Failed to deploy agent for {project.name}: {e}")
+            return "failed"
+        
+        if agent is None:
+            return "failed"
+        
+        if unchanged:
+            # Same config as before the restart: rebuilt in memory, not a new deployment
+            return "restored"
+        
+        self.deployment_state[agent_id] = {
+            "fingerprint": fingerprint,
+            "project_path": project.path,
+            "deployed_at": time.time()
+        }
+        return "deployed"
+    
+    async def deploy_all_agents(self, api_key: str, concurrency: Optional[int] = None,
+                                on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, bool]:
+        """Deploy sub-agents for all discovered projects, skipping those whose config is unchanged"""
+        if concurrency is None:
+            concurrency = DEPLOY_CONCURRENCY
+        elif isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+            raise ValueError(f"concurrency must be a positive integer, got {concurrency!r}")
+        semaphore = asyncio.Semaphore(concurrency)
+        projects = list(self.discovered_projects.items())
+        outcomes: Dict[str, str] = {}
+        started = time.perf_counter()
+        
+        async def deploy(project_name: str, project: ProjectInfo):
+            async with semaphore:
+                outcomes[project_name] = await self._deploy_project(project, api_key)
+            if on_progress:
+                try:
+                    await on_progress({
+                        "project": project_name,
+                        "result": outcomes[project_name],
+                        "completed": len(outcomes),
+                        "total": len(projects)
+                    })
+                except Exception as e:
+                    print(f"Deployment progress callback failed: {e}")
+        
+        await asyncio.gather(*(deploy(name, project) for name, project in projects))
+        
+        # Forget agents whose projects are gone
+        live_ids = {self.generate_sub_agent_config(p).agent_id for _, p in projects}
+        for agent_id in [a for a in self.deployment_state if a not in live_ids]:
+            del self.deployment_state[agent_id]
+        await asyncio.to_thread(self._save_deployment_state)
+        
+        summary = {"deployed": 0, "restored": 0, "unchanged": 0, "failed": 0}
+        for outcome in outcomes.values():
+            summary[outcome] += 1
+        self.last_deployment = {
+            **summary,
+            "total": len(projects),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "results": outcomes
+        }
         
-        return deployment_results
+        return {name: outcome != "failed" for name, outcome in outcomes.items()}
     
     def get_project_status(self) -> Dict[str, Any]:
         """Get status of all projects and their agents"""
         return {
             "discovered_projects": len(self.discovered_projects),
             "deployed_agents": len(self.sub_agents),
+            "last_deployment": {k: v for k, v in self.last_deployment.items() if k != "results"},
             "projects": {name: asdict(project) for name, project in self.discovered_projects.items()},
             "agents": {aid: agent.get_status() for aid, agent in self.sub_agents.items()},
             "configurations": {aid: asdict(config) for aid, config in self.agent_configs.items()}
@@ -0,0 +1,170 @@
+"""
+Client-side Rate Limiting for Claude API Keys
+Token buckets for requests/min and input/output tokens/min, shared per API key
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Any
+
+
+class TokenBucket:
+    """Continuously refilling token bucket"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        self._refill()
+        # Requests larger than the bucket can never fit; let them through once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount: float):
+        """Take tokens; the balance may go negative to record overspend"""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float):
+        """Return tokens that were reserved but not used"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough input token estimate used before the provider reports real usage"""
+    return max(1, len(text) // 4)
+
+
+def compute_backoff(attempt: int, retry_after: Optional[float] = None,
+                    base_delay: float = 1.0, max_delay: float = 60.0) -> float:
+    """Exponential backoff with full jitter, honouring a provider retry-after hint"""
+    if retry_after is not None and retry_after > 0:
+        return min(retry_after, max_delay)
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class RateLimiter:
+    """Fair (FIFO) limiter over request, input-token and output-token buckets"""
+
+    def __init__(self, requests_per_minute: int = 50,
+                 input_tokens_per_minute: int = 40000,
+                 output_tokens_per_minute: int = 8000):
+        self.requests = TokenBucket(requests_per_minute)
+        self.input_tokens = TokenBucket(input_tokens_per_minute)
+        self.output_tokens = TokenBucket(output_tokens_per_minute)
+        self.blocked_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self.metrics = {
+            "requests_admitted": 0,
+            "queued_requests": 0,
+            "rate_limited_responses": 0,
+            "total_queue_wait": 0.0,
+            "max_queue_wait": 0.0,
+            "last_queue_wait": 0.0,
+        }
+
+    async def acquire(self, input_tokens: int) -> float:
+        """Wait for capacity for one request; returns the time spent queued"""
+        # asyncio.Lock wakes waiters in FIFO order, which keeps the queue fair
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        queued_at = time.monotonic()
+        self.metrics["queued_requests"] += 1
+        try:
+            async with self._lock:
+                while True:
+                    wait = max(
+                        self.blocked_until - time.monotonic(),
+                        self.requests.time_until(1),
+                        self.input_tokens.time_until(input_tokens),
+                        self.output_tokens.time_until(1),
+                    )
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+
+                self.requests.consume(1)
+                self.input_tokens.consume(input_tokens)
+        finally:
+            self.metrics["queued_requests"] -= 1
+
+        waited = time.monotonic() - queued_at
+        self.metrics["requests_admitted"] += 1
+        self.metrics["total_queue_wait"] += waited
+        self.metrics["last_queue_wait"] = waited
+        self.metrics["max_queue_wait"] = max(self.metrics["max_queue_wait"], waited)
+        return waited
+
+    def record_usage(self, estimated_input: int, input_tokens: int, output_tokens: int):
+        """Reconcile the input estimate with real usage and debit output tokens"""
+        if input_tokens > estimated_input:
+            self.input_tokens.consume(input_tokens - estimated_input)
+        else:
+            self.input_tokens.refund(estimated_input - input_tokens)
+        self.output_tokens.consume(output_tokens)
+
+    def record_rate_limited(self, delay: float, estimated_input: int = 0):
+        """Pause every caller sharing this key after a 429"""
+        self.metrics["rate_limited_responses"] += 1
+        # A rejected request did not spend its input tokens; the retry reserves them again
+        self.input_tokens.refund(estimated_input)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get limiter state and queue wait metrics"""
+        admitted = self.metrics["requests_admitted"]
+        return {
+            **self.metrics,
+            "average_queue_wait": self.metrics["total_queue_wait"] / max(admitted, 1),
+            "available_requests": round(max(self.requests.tokens, 0), 2),
+            "available_input_tokens": round(max(self.input_tokens.tokens, 0), 2),
+            "available_output_tokens": round(max(self.output_tokens.tokens, 0), 2),
+            "blocked_for": max(0.0, self.blocked_until - time.monotonic()),
+        }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+# Agents are initialised from worker threads (deploys) as well as the event loop
+_limiters_lock = threading.Lock()
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable, non-reversible identifier for an API key"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def get_rate_limiter(api_key: str) -> RateLimiter:
+    """Get the limiter shared by every agent using this API key"""
+    fingerprint = key_fingerprint(api_key)
+    with _limiters_lock:
+        if fingerprint not in _limiters:
+            _limiters[fingerprint] = RateLimiter(
+                requests_per_minute=int(os.getenv("CLAUDE_REQUESTS_PER_MINUTE", 50)),
+                input_tokens_per_minute=int(os.getenv("CLAUDE_INPUT_TOKENS_PER_MINUTE", 40000)),
+                output_tokens_per_minute=int(os.getenv("CLAUDE_OUTPUT_TOKENS_PER_MINUTE", 8000)),
+            )
+        return _limiters[fingerprint]
+
+
+def get_all_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """Get metrics for every API key limiter"""
+    with _limiters_lock:
+        limiters = list(_limiters.items())
+    return {fingerprint: limiter.get_metrics() for fingerprint, limiter in limiters}
@@ -0,0 +1,232 @@
+"""
+LLM Response Cache for Agent Tasks
+Memory + SQLite tiers keyed by a normalised request hash, with single-flight dedup
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Callable, Awaitable, Tuple
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Normalise text so trivially different prompts share a cache key"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n")
+    return "\n".join(line.rstrip() for line in text.strip().split("\n"))
+
+
+def make_cache_key(model: str, system: Optional[str], prompt: str, max_tokens: int) -> str:
+    """Hash of the normalised (model, system, prompt, max_tokens) request"""
+    payload = json.dumps(
+        [model, normalize_text(system), normalize_text(prompt), int(max_tokens)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier TTL cache with byte-size LRU eviction"""
+
+    def __init__(self, db_path: Optional[str] = None, ttl_seconds: float = 3600,
+                 max_memory_bytes: int = 32 * 1024 * 1024,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        # key -> (expires_at, size, entry)
+        self._memory: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self.memory_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.disk_bytes = 0
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "saved_tokens": 0,
+        }
+
+    # Memory tier
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._memory.get(key)
+        if not item:
+            return None
+        expires_at, size, entry = item
+        if expires_at < time.time():
+            self._memory_remove(key)
+            return None
+        self._memory.move_to_end(key)
+        return entry
+
+    def _memory_put(self, key: str, entry: Dict[str, Any], expires_at: float):
+        size = len(key) + len(json.dumps(entry).encode())
+        if size > self.max_memory_bytes:
+            return
+        self._memory_remove(key)
+        self._memory[key] = (expires_at, size, entry)
+        self.memory_bytes += size
+        while self.memory_bytes > self.max_memory_bytes:
+            oldest = next(iter(self._memory))
+            self._memory_remove(oldest)
+            self.stats["evictions"] += 1
+
+    def _memory_remove(self, key: str):
+        item = self._memory.pop(key, None)
+        if item:
+            self.memory_bytes -= item[1]
+
+    # SQLite tier
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.db_path:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, entry TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+            self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            self.disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        return self._db
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._db_lock:
+            db = self._connect()
+            if not db:
+                return None
+            row = db.execute("SELECT entry, size, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            if row[2] < time.time():
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+                self.disk_bytes -= row[1]
+                return None
+            db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            return row[2], json.loads(row[0])
+
+    def _disk_put(self, key: str, entry: Dict[str, Any], expires_at: float):
+        with self._db_lock:
+            db = self._connect()
+            if not db:
+                return
+            data = json.dumps(entry)
+            size = len(key) + len(data.encode())
+            previous = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, entry, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, expires_at, time.time())
+            )
+            self.disk_bytes += size - (previous[0] if previous else 0)
+
+            # Evict least recently used rows until back under the byte budget
+            while self.disk_bytes > self.max_disk_bytes:
+                victims = db.execute(
+                    "SELECT key, size FROM responses WHERE key != ? ORDER BY last_access LIMIT 64", (key,)
+                ).fetchall()
+                if not victims:
+                    break
+                for victim_key, victim_size in victims:
+                    db.execute("DELETE FROM responses WHERE key = ?", (victim_key,))
+                    self.disk_bytes -= victim_size
+                    self.stats["evictions"] += 1
+                    if self.disk_bytes <= self.max_disk_bytes:
+                        break
+            db.commit()
+
+    # Public API
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up an entry in memory, then on disk (promoting disk hits)"""
+        entry = self._memory_get(key)
+        if entry is not None:
+            self.stats["memory_hits"] += 1
+            return entry
+
+        if self.db_path:
+            found = await asyncio.to_thread(self._disk_get, key)
+            if found:
+                expires_at, entry = found
+                self._memory_put(key, entry, expires_at)
+                self.stats["disk_hits"] += 1
+                return entry
+
+        return None
+
+    async def put(self, key: str, entry: Dict[str, Any]):
+        """Store an entry in both tiers"""
+        expires_at = time.time() + self.ttl_seconds
+        self._memory_put(key, entry, expires_at)
+        if self.db_path:
+            await asyncio.to_thread(self._disk_put, key, entry, expires_at)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             to_entry: Callable[[Any], Optional[Dict[str, Any]]]) -> Tuple[Any, str]:
+        """
+        Return (result, source). Source is 'hit' or 'coalesced' with a cache entry
+        as result, or 'miss' with the value returned by compute().
+        Concurrent callers for the same key share one compute() (single-flight).
+        """
+        while True:
+            entry = await self.get(key)
+            if entry is not None:
+                self.stats["saved_tokens"] += entry.get("tokens_used") or 0
+                return entry, "hit"
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+
+            entry = await asyncio.shield(inflight)
+            if entry is not None:
+                self.stats["coalesced"] += 1
+                self.stats["saved_tokens"] += entry.get("tokens_used") or 0
+                return entry, "coalesced"
+            # The leader's result was not cacheable; try again (possibly as the new leader)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.stats["misses"] += 1
+        entry = None
+        try:
+            result = await compute()
+            entry = to_entry(result)
+            if entry is not None:
+                await self.put(key, entry)
+            return result, "miss"
+        finally:
+            del self._inflight[key]
+            future.set_result(entry)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit ratio, saved tokens and tier sizes"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["coalesced"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": self.disk_bytes,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,318 @@
+"""
+Persistent Batch Task Queue for the Claude Agent Pool
+SQLite-backed work queue drained by a configurable worker pool, resumable after restarts
+"""
+
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Any, Callable, Awaitable
+
+from claude_agent import ClaudeAgentPool, claude_pool
+
+ProgressCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# A claimed task belongs to its worker process while the lease is renewed; an expired lease
+# (crashed or restarted process) makes the task claimable again by any process sharing the database
+LEASE_SECONDS = float(os.getenv("BATCH_LEASE_SECONDS", "60"))
+
+
+class BatchTaskQueue:
+    """SQLite work queue of batch tasks"""
+
+    def __init__(self, db_path: str, lease_seconds: float = LEASE_SECONDS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        # Identifies this process's claims; several uvicorn workers may drain the same database
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS batches (
+                    id TEXT PRIMARY KEY,
+                    total INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS batch_tasks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    batch_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    task_id TEXT NOT NULL,
+                    prompt TEXT NOT NULL,
+                    max_tokens INTEGER NOT NULL,
+                    use_cache INTEGER NOT NULL DEFAULT 1,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    response TEXT,
+                    error TEXT,
+                    tokens_used INTEGER,
+                    completed_at REAL,
+                    owner TEXT,
+                    lease_until REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_batch_tasks_status ON batch_tasks(status, id);
+                CREATE INDEX IF NOT EXISTS idx_batch_tasks_batch ON batch_tasks(batch_id, seq);
+            """)
+            # Databases created before claims carried an owner and lease
+            columns = {row["name"] for row in self._db.execute("PRAGMA table_info(batch_tasks)")}
+            for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE batch_tasks ADD COLUMN {column} {kind}")
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_batch_tasks_batch_status ON batch_tasks(batch_id, status)"
+            )
+        return self._db
+
+    def create_batch(self, tasks: List[Dict[str, Any]], default_max_tokens: int = 4000,
+                     use_cache: bool = True) -> Dict[str, Any]:
+        """Enqueue a list of {prompt, task_id?, max_tokens?} tasks as one batch"""
+        batch_id = f"batch-{uuid.uuid4().hex[:12]}"
+        rows = [
+            (
+                batch_id,
+                seq,
+                task.get("task_id") or f"{batch_id}-{seq}",
+                task["prompt"],
+                int(task.get("max_tokens") or default_max_tokens),
+                int(task.get("use_cache", use_cache)),
+            )
+            for seq, task in enumerate(tasks)
+        ]
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute("INSERT INTO batches (id, total, created_at) VALUES (?, ?, ?)",
+                           (batch_id, len(rows), time.time()))
+                db.executemany(
+                    "INSERT INTO batch_tasks (batch_id, seq, task_id, prompt, max_tokens, use_cache) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        return {"batch_id": batch_id, "total": len(rows)}
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Move the oldest queued task (or one whose lease expired) to processing under this owner"""
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            with db:
+                # One statement, so concurrent processes cannot both claim the same row
+                row = db.execute(
+                    "UPDATE batch_tasks SET status = 'processing', owner = ?, lease_until = ? "
+                    "WHERE id = (SELECT id FROM batch_tasks WHERE status = 'queued' "
+                    "            OR (status = 'processing' AND (lease_until IS NULL OR lease_until < ?)) "
+                    "            ORDER BY id LIMIT 1) "
+                    "RETURNING *",
+                    (self.owner, now + self.lease_seconds, now)
+                ).fetchone()
+            return dict(row) if row else None
+
+    def renew_leases(self) -> int:
+        """Extend the leases of every task this process is working on"""
+        with self._lock:
+            db = self._connect()
+            with db:
+                return db.execute(
+                    "UPDATE batch_tasks SET lease_until = ? WHERE status = 'processing' AND owner = ?",
+                    (time.time() + self.lease_seconds, self.owner)
+                ).rowcount
+
+    def complete(self, row_id: int, status: str, response: Optional[str] = None,
+                 error: Optional[str] = None, tokens_used: Optional[int] = None):
+        """Record a task result (ignored if the claim was lost to another process)"""
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "UPDATE batch_tasks SET status = ?, response = ?, error = ?, tokens_used = ?, completed_at = ?, "
+                    "owner = NULL, lease_until = NULL WHERE id = ? AND owner = ?",
+                    (status, response, error, tokens_used, time.time(), row_id, self.owner)
+                )
+
+    def requeue(self, row_id: int):
+        """Put a claimed task back at its place in the queue"""
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "UPDATE batch_tasks SET status = 'queued', owner = NULL, lease_until = NULL "
+                    "WHERE id = ? AND owner = ?",
+                    (row_id, self.owner)
+                )
+
+    def recover(self) -> int:
+        """Requeue tasks whose owner stopped renewing their lease (e.g. a previous server run)"""
+        with self._lock:
+            db = self._connect()
+            with db:
+                return db.execute(
+                    "UPDATE batch_tasks SET status = 'queued', owner = NULL, lease_until = NULL "
+                    "WHERE status = 'processing' AND (lease_until IS NULL OR lease_until < ?)",
+                    (time.time(),)
+                ).rowcount
+
+    def has_pending(self, batch_id: str) -> bool:
+        """Whether a batch still has queued or processing tasks (an index lookup, not a count)"""
+        with self._lock:
+            db = self._connect()
+            return db.execute(
+                "SELECT 1 FROM batch_tasks WHERE batch_id = ? AND status IN ('queued', 'processing') LIMIT 1",
+                (batch_id,)
+            ).fetchone() is not None
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Get batch progress counts"""
+        with self._lock:
+            db = self._connect()
+            batch = db.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+            if not batch:
+                return None
+            counts = dict(db.execute(
+                "SELECT status, COUNT(*) FROM batch_tasks WHERE batch_id = ? GROUP BY status", (batch_id,)
+            ).fetchall())
+
+        done = counts.get("completed", 0) + counts.get("failed", 0)
+        return {
+            "batch_id": batch_id,
+            "total": batch["total"],
+            "queued": counts.get("queued", 0),
+            "processing": counts.get("processing", 0),
+            "completed": counts.get("completed", 0),
+            "failed": counts.get("failed", 0),
+            "progress": done / max(batch["total"], 1),
+            "status": "completed" if done >= batch["total"] else "running",
+            "created_at": batch["created_at"]
+        }
+
+    def get_results(self, batch_id: str, offset: int = 0, limit: int = 100,
+                    status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Page through task results in submission order"""
+        query = ("SELECT seq, task_id, status, response, error, tokens_used, completed_at "
+                 "FROM batch_tasks WHERE batch_id = ?")
+        params: List[Any] = [batch_id]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY seq LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+        with self._lock:
+            db = self._connect()
+            return [dict(row) for row in db.execute(query, params).fetchall()]
+
+
+class BatchWorkerPool:
+    """Drains the batch queue through the Claude agent pool"""
+
+    def __init__(self, queue: BatchTaskQueue, pool: ClaudeAgentPool, workers: int = 4,
+                 progress_interval: float = 0.5):
+        self.queue = queue
+        self.pool = pool
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.on_progress: Optional[ProgressCallback] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_progress: Dict[str, float] = {}
+
+    async def start(self, on_progress: Optional[ProgressCallback] = None):
+        """Recover interrupted tasks and start the workers"""
+        if self._tasks:
+            return
+        self.on_progress = on_progress
+        self._wakeup = asyncio.Event()
+        recovered = await asyncio.to_thread(self.queue.recover)
+        if recovered:
+            print(f"Resuming {recovered} batch tasks interrupted by a restart")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._renew_leases()))
+
+    async def stop(self):
+        """Stop the workers; in-flight tasks are requeued"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, tasks: List[Dict[str, Any]], default_max_tokens: int = 4000,
+                     use_cache: bool = True) -> Dict[str, Any]:
+        """Enqueue a batch and wake idle workers"""
+        batch = await asyncio.to_thread(self.queue.create_batch, tasks, default_max_tokens, use_cache)
+        if self._wakeup:
+            self._wakeup.set()
+        return batch
+
+    async def _renew_leases(self):
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.queue.renew_leases)
+            except Exception as e:
+                print(f"Failed to renew batch task leases: {e}")
+
+    async def _worker(self):
+        while True:
+            row = await asyncio.to_thread(self.queue.claim_next)
+            if row is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                task = await self.pool.execute_task_on_pool(
+                    row["task_id"], row["prompt"], row["max_tokens"], bool(row["use_cache"])
+                )
+            except asyncio.CancelledError:
+                await asyncio.to_thread(self.queue.requeue, row["id"])
+                raise
+            except Exception as e:
+                await asyncio.to_thread(self.queue.complete, row["id"], "failed", None, str(e))
+            else:
+                if task is None:
+                    # No agent is available (e.g. not initialised yet); retry later
+                    await asyncio.to_thread(self.queue.requeue, row["id"])
+                    await asyncio.sleep(5)
+                    continue
+                await asyncio.to_thread(
+                    self.queue.complete, row["id"], task.status, task.response, task.error, task.tokens_used
+                )
+
+            await self._report_progress(row["batch_id"])
+
+    async def _report_progress(self, batch_id: str):
+        if not self.on_progress:
+            return
+        now = time.monotonic()
+        # Throttled updates only need to know the batch is not finished, which is an index lookup
+        if now - self._last_progress.get(batch_id, 0) < self.progress_interval:
+            if await asyncio.to_thread(self.queue.has_pending, batch_id):
+                return
+        summary = await asyncio.to_thread(self.queue.get_batch, batch_id)
+        finished = summary["status"] == "completed"
+        self._last_progress[batch_id] = now
+        if finished:
+            self._last_progress.pop(batch_id, None)
+        try:
+            await self.on_progress(batch_id, summary)
+        except Exception as e:
+            print(f"Failed to report progress for {batch_id}: {e}")
+
+
+# Global batch queue and worker pool instances
+batch_queue = BatchTaskQueue(os.path.join(
+    os.getenv("DIRK_DATA_DIR", os.path.expanduser("~/.dirk-brain")), "batch_tasks.sqlite3"
+))
+batch_workers = BatchWorkerPool(batch_queue, claude_pool, workers=int(os.getenv("BATCH_WORKERS", 4)))
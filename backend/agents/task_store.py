@@ -0,0 +1,173 @@
+"""
+Bounded Task Storage for Claude Agents
+Compact task records, disk spill for large responses and O(1) status counters
+"""
+
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+from typing import Dict, List, Optional, Iterator
+
+
+class AgentTask:
+    """Compact task record; large responses live on disk"""
+
+    __slots__ = ("id", "prompt", "status", "created_at", "completed_at",
+                 "_response", "_response_path", "error", "tokens_used")
+
+    def __init__(self, id: str, prompt: str, status: str, created_at: float,
+                 completed_at: Optional[float] = None, response: Optional[str] = None,
+                 error: Optional[str] = None, tokens_used: Optional[int] = None):
+        self.id = id
+        self.prompt = prompt
+        self.status = status  # 'queued', 'processing', 'completed', 'failed'
+        self.created_at = created_at
+        self.completed_at = completed_at
+        self._response = response
+        self._response_path: Optional[str] = None
+        self.error = error
+        self.tokens_used = tokens_used
+
+    @property
+    def response(self) -> Optional[str]:
+        if self._response_path:
+            try:
+                with open(self._response_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+            except OSError:
+                return None
+        return self._response
+
+    @response.setter
+    def response(self, value: Optional[str]):
+        self._response = value
+        self._response_path = None
+
+    def __repr__(self) -> str:
+        return f"AgentTask(id={self.id!r}, status={self.status!r}, created_at={self.created_at!r})"
+
+
+class TaskStore:
+    """Capped, insertion-ordered task window with per-status counters"""
+
+    def __init__(self, max_tasks: int = 1000, spill_threshold: int = 64 * 1024,
+                 spill_dir: Optional[str] = None):
+        self.max_tasks = max_tasks
+        self.spill_threshold = spill_threshold
+        # Spilled responses are only reachable from the process that wrote them: each process spills
+        # into its own subdirectory and clears out those of processes that have exited
+        self.spill_dir = os.path.join(spill_dir, str(os.getpid())) if spill_dir else None
+        if spill_dir:
+            self._sweep_spill_dir(spill_dir)
+        self._tasks: "OrderedDict[str, AgentTask]" = OrderedDict()
+        # Lifetime counts per status; 'processing' and 'queued' are live counts
+        self.status_counts: Dict[str, int] = {}
+        self.total_recorded = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._tasks
+
+    def get(self, task_id: str) -> Optional[AgentTask]:
+        return self._tasks.get(task_id)
+
+    def values(self) -> Iterator[AgentTask]:
+        return iter(self._tasks.values())
+
+    def add(self, task: AgentTask):
+        """Record a new task and evict the oldest finished tasks past the cap"""
+        previous = self._tasks.pop(task.id, None)
+        if previous:
+            if previous.status in ("queued", "processing"):
+                self._count(previous.status, -1)
+            self._forget(previous)
+        self._tasks[task.id] = task
+        self._count(task.status, 1)
+        self.total_recorded += 1
+        self._evict()
+
+    def set_status(self, task: AgentTask, status: str):
+        """Transition a task, keeping the counters in step"""
+        if task.status in ("queued", "processing"):
+            self._count(task.status, -1)
+        self._count(status, 1)
+        task.status = status
+
+    def set_response(self, task: AgentTask, response: Optional[str]):
+        """Store a response inline, or spill it to disk past the size threshold"""
+        self._forget(task)
+        task.response = response
+        if not response or not self.spill_dir or len(response) < self.spill_threshold:
+            return
+        path = os.path.join(self.spill_dir, hashlib.sha1(task.id.encode()).hexdigest() + ".txt")
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(response)
+            task._response = None
+            task._response_path = path
+        except OSError as e:
+            print(f"Failed to spill response for task {task.id}: {e}")
+
+    def newest_first(self, status_filter: Optional[str] = None) -> List[AgentTask]:
+        """Tasks in reverse creation order, optionally filtered by status"""
+        return [t for t in reversed(self._tasks.values()) if not status_filter or t.status == status_filter]
+
+    def _count(self, status: str, delta: int):
+        self.status_counts[status] = self.status_counts.get(status, 0) + delta
+
+    def _evict(self):
+        excess = len(self._tasks) - self.max_tasks
+        if excess <= 0:
+            return
+        # Oldest first; tasks still running are never evicted
+        victims = []
+        for task in self._tasks.values():
+            if task.status not in ("queued", "processing"):
+                victims.append(task)
+                if len(victims) == excess:
+                    break
+        for task in victims:
+            del self._tasks[task.id]
+            self._forget(task)
+            self.evicted += 1
+
+    @staticmethod
+    def _sweep_spill_dir(root: str):
+        """Remove spill files left by exited processes (and by the old flat layout)"""
+        try:
+            entries = list(os.scandir(root))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if not entry.is_dir(follow_symlinks=False):
+                    os.remove(entry.path)
+                elif entry.name.isdigit() and not _process_alive(int(entry.name)):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def _forget(self, task: AgentTask):
+        if task._response_path:
+            try:
+                os.remove(task._response_path)
+            except OSError:
+                pass
+            task._response_path = None
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name != "posix":
+        return True  # no cheap liveness probe; leave the directory alone
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
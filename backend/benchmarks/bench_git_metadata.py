@@ -0,0 +1,55 @@
+"""
+Git metadata benchmark
+  python benchmarks/bench_git_metadata.py ~/projects [~/dev ...]
+Reads each repository's last commit date from .git and compares time and results with forking `git log -1`
+"""
+
+import os
+import sys
+import time
+import subprocess
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from git_metadata import find_git_dir, read_git_metadata
+
+
+def git_metadata_benchmark(roots: List[str]):
+    repos = []
+    for root in roots:
+        root = os.path.expanduser(root)
+        for name in sorted(os.listdir(root)):
+            path = os.path.join(root, name)
+            if find_git_dir(path):
+                repos.append(path)
+    if not repos:
+        print("No git repositories found")
+        return
+
+    start = time.perf_counter()
+    forked = {}
+    for path in repos:
+        result = subprocess.run(["git", "log", "-1", "--format=%ai"], cwd=path, capture_output=True, text=True)
+        forked[path] = result.stdout.strip() or None
+    fork_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = {}
+    for path in repos:
+        info = read_git_metadata(path)
+        parsed[path] = info.last_commit_date if info else None
+    read_seconds = time.perf_counter() - start
+
+    mismatches = [p for p in repos if forked[p] != parsed[p]]
+    print(f"{len(repos)} repositories")
+    print(f"  git log fork : {fork_seconds * 1000:8.1f} ms ({fork_seconds / len(repos) * 1e6:7.0f} us/repo)")
+    print(f"  .git reader  : {read_seconds * 1000:8.1f} ms ({read_seconds / len(repos) * 1e6:7.0f} us/repo)")
+    print(f"  speedup      : {fork_seconds / max(read_seconds, 1e-9):.1f}x, mismatches: {len(mismatches)}")
+    for path in mismatches[:10]:
+        print(f"    {path}: git={forked[path]!r} reader={parsed[path]!r}")
+
+
+
+if __name__ == "__main__":
+    git_metadata_benchmark(sys.argv[1:] or ["~/projects"])
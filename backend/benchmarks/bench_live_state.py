@@ -0,0 +1,59 @@
+"""
+Live state benchmark
+  python benchmarks/bench_live_state.py [agents] [seconds] [updates per agent per second]
+Agents updating a few status fields at a time: bytes and frames as full messages vs JSON Patch diffs
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live_state import StateStore
+
+
+async def live_state_benchmark(agents: int, seconds: int, rate: int):
+    rng = random.Random(5)
+    patches: List[Dict[str, Any]] = []
+    store = StateStore(lambda key, patch: patches.append(patch), window=0.1)
+    statuses = {
+        f"agent-{i}": {
+            "state": "idle", "model": "claude", "project": f"project-{i % 40}", "task_id": None,
+            "progress": 0.0, "cpu": 1.0, "memory_mb": 300, "capabilities": ["code", "review", "test"],
+            "started_at": datetime.now().isoformat(), "errors": 0
+        } for i in range(agents)
+    }
+    full_bytes = full_frames = 0
+    cpu = time.process_time()
+    for step in range(int(seconds / store.window)):
+        for _ in range(int(agents * rate * store.window)):
+            agent_id = f"agent-{rng.randrange(agents)}"
+            status = statuses[agent_id]
+            status["cpu"] = round(rng.uniform(0, 100), 1)
+            if rng.random() < 0.2:
+                status["progress"] = round(min(1.0, status["progress"] + 0.05), 2)
+            if rng.random() < 0.02:
+                status["state"] = rng.choice(["idle", "busy", "waiting"])
+            full_bytes += len(json.dumps({"type": "agent_status_update", "agent_id": agent_id, "status": status,
+                                          "timestamp": datetime.now().isoformat()}))
+            full_frames += 1
+            store.update(f"agent:{agent_id}", status)
+        store.flush()
+    cpu = time.process_time() - cpu
+
+    patch_bytes = sum(len(json.dumps(p)) for p in patches)
+    print(f"{agents} agents x {rate}/s for {seconds}s: full updates {full_frames} frames / {full_bytes // 1024} KB; "
+          f"patches {len(patches)} frames / {patch_bytes // 1024} KB ({patch_bytes / max(full_bytes, 1):.0%}); "
+          f"store CPU {cpu * 1000:.0f} ms; {store.stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(live_state_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+                                     int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+                                     int(sys.argv[3]) if len(sys.argv) > 3 else 4))
@@ -0,0 +1,62 @@
+"""
+Project search benchmark
+  python benchmarks/bench_project_search.py [project count]
+Index build time and typical dashboard queries against a synthetic project set
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project_search import ProjectSearchIndex
+
+
+def search_benchmark(count: int):
+    rng = random.Random(7)
+    technologies = ["React", "Python", "FastAPI", "Node.js", "Go", "Rust", "Docker", "TypeScript", "Vue", "Django"]
+    words = ["agent", "portal", "crawler", "service", "dashboard", "pipeline", "gateway", "brain", "vision", "sync"]
+    projects = [{
+        "id": f"project_{i}",
+        "name": f"{rng.choice(words)}-{rng.choice(words)}-{i}",
+        "description": " ".join(rng.choice(words) for _ in range(6)),
+        "technologies": rng.sample(technologies, rng.randint(1, 4)),
+        "type": rng.choice(["nodejs", "python", "go", "rust", "github"]),
+        "source": rng.choice(["Local", "GitHub", "GitLab"]),
+        "status": rng.choice(["active", "archived", "planning"]),
+        "last_modified": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00Z"
+    } for i in range(count)]
+
+    index = ProjectSearchIndex()
+    start = time.perf_counter()
+    index.replace_all(projects)
+    print(f"indexed {count} projects in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    queries = [
+        ("everything", "", {}),
+        ("one facet", "", {"technologies": ["React"]}),
+        ("facets", "", {"technologies": ["Python", "Go"], "status": ["active"], "source": ["GitHub"]}),
+        ("prefix", "da", {}),
+        ("substring", "peline", {}),
+        ("text + facet", "agent portal", {"type": ["python"]}),
+    ]
+    for label, query, filters in queries:
+        timings = []
+        for _ in range(50):
+            start = time.perf_counter()
+            result = index.search(query, filters, offset=20, limit=20)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"  {label:14s}: {result['total']:6d} hits  p50 {timings[25] * 1000:6.2f} ms  "
+              f"max {timings[-1] * 1000:6.2f} ms")
+
+    start = time.perf_counter()
+    index.upsert({**projects[0], "status": "archived", "description": "renamed"})
+    print(f"  single upsert : {(time.perf_counter() - start) * 1000:.3f} ms")
+
+
+
+if __name__ == "__main__":
+    search_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,154 @@
+"""
+WebSocket manager benchmarks
+  python benchmarks/bench_websocket.py load [clients] [messages]   broadcast fan-out under each slow-consumer policy
+  python benchmarks/bench_websocket.py output [lines] [monitors]   command output batching: frames and CPU
+  python benchmarks/bench_websocket.py encoding [rounds]           bytes and encode CPU per frame format
+"""
+
+import os
+import sys
+import time
+import zlib
+import random
+import asyncio
+import logging
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_manager import WebSocketManager, encode_frame, msgpack, DEFAULT_FORMAT, SLOW_CONSUMER_POLICIES
+
+
+class SimulatedSocket:
+    """Stand-in WebSocket client; a delay makes it a slow reader"""
+    
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received = 0
+    
+    async def accept(self):
+        pass
+    
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+    
+    async def send_bytes(self, data: bytes):
+        await self.send_text("")
+    
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def load_test(clients: int, messages: int, policy: str, slow_fraction: float = 0.05):
+    """Broadcast to many simulated clients and report enqueue latency, delivery time and drops"""
+    rng = random.Random(3)
+    manager = WebSocketManager(max_queue=64, policy=policy)
+    sockets = [SimulatedSocket(0.02 if rng.random() < slow_fraction else 0) for _ in range(clients)]
+    for socket in sockets:
+        await manager.connect(socket)
+    
+    timings = []
+    start = time.perf_counter()
+    for i in range(messages):
+        began = time.perf_counter()
+        if i % 2:
+            await manager.broadcast({"type": "metrics_update", "metrics": {"cpu": i}})
+        else:
+            await manager.broadcast({"type": "project_discovered", "project": {"id": f"p{i}", "name": "x" * 200}})
+        timings.append(time.perf_counter() - began)
+        await asyncio.sleep(0)
+    
+    fast = [s for s in sockets if not s.delay]
+    while any(s.received < messages + 1 for s in fast):
+        await asyncio.sleep(0.005)
+    delivered_in = time.perf_counter() - start
+    metrics = manager.get_metrics()
+    timings.sort()
+    print(f"{policy:12s}: broadcast p50 {timings[len(timings) // 2] * 1000:.2f} ms  "
+          f"max {timings[-1] * 1000:.2f} ms  fast clients done in {delivered_in:.2f} s  "
+          f"sent {metrics['sent']}  dropped {metrics['dropped']}  coalesced {metrics['coalesced']}  "
+          f"slow disconnects {metrics['slow_disconnects']}  peak depth {metrics['peak_queue_depth']}")
+    
+    for socket in list(manager.clients):
+        await manager.disconnect(socket)
+
+
+async def output_benchmark(lines: int, monitors: int):
+    """Stream a chatty command to one viewer plus activity monitors; report frames and CPU"""
+    manager = WebSocketManager(max_queue=100000)
+    viewer = SimulatedSocket(0)
+    await manager.connect(viewer)
+    for _ in range(monitors):
+        monitor = SimulatedSocket(0)
+        await manager.connect(monitor)
+        manager.subscribe(monitor, ["commands"])
+    
+    command = f"{sys.executable} -c \"for i in range({lines}): print('output line', i)\""
+    cpu, wall = time.process_time(), time.perf_counter()
+    await manager.stream_command_execution(viewer, {"command": command, "session_id": "bench"})
+    while any(client.queue for client in manager.clients.values()):
+        await asyncio.sleep(0.005)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    
+    output = manager.command_sessions["bench"]["output"]
+    frames = manager.get_metrics()["sent"] - (monitors + 1)  # minus the connection messages
+    print(f"{output['lines']} lines in {output['chunks']} chunks: {frames} frames to {monitors + 1} clients, "
+          f"CPU {cpu * 1000:.0f} ms, wall {wall * 1000:.0f} ms "
+          f"(per-line streaming sent {lines * (monitors + 1) + 2} frames)")
+
+
+def encoding_benchmark(rounds: int):
+    """Bytes per frame and encode CPU for each frame format on typical dashboard messages"""
+    now = datetime.now().isoformat()
+    samples = {
+        "command_output": {"type": "command_output", "session_id": "session-1760000000.123456", "seq": 42,
+                           "offset": 688128, "stream": "stdout", "lines": 160, "timestamp": now,
+                           "data": "".join(f"[build] compiled module {i} in 12ms\n" for i in range(160))},
+        "agent_status_update": {"type": "agent_status_update", "agent_id": "claude-agent-7", "timestamp": now,
+                                "status": {"state": "busy", "task_id": "task-981", "progress": 0.42,
+                                           "cpu": 12.5, "memory_mb": 512, "updated_at": now}},
+        "metrics_update": {"type": "metrics_update", "timestamp": now,
+                           "metrics": {f"agent-{i}": {"cpu": 10.5 + i, "memory": 400 + i, "tasks": i % 3}
+                                       for i in range(20)}},
+    }
+    formats = [("json", False, False), ("json", True, False), ("json", True, True)]
+    if msgpack is not None:
+        formats += [("msgpack", False, False), ("msgpack", True, False), ("msgpack", True, True)]
+    else:
+        print("(msgpack not installed; skipping msgpack formats)")
+    
+    for name, data in samples.items():
+        print(name)
+        for frame_format in formats:
+            start = time.process_time()
+            for _ in range(rounds):
+                frame = encode_frame(data, frame_format)
+            cpu_us = (time.process_time() - start) / rounds * 1e6
+            label = f"{frame_format[0]}{' compact' if frame_format[1] else ''}{' deflate' if frame_format[2] else ''}"
+            print(f"  {label:24s} {len(frame):6d} bytes  {cpu_us:7.1f} us/encode")
+        
+        # What permessage-deflate (context takeover) puts on the wire for a run of same-type frames
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        wire = []
+        for i in range(20):
+            text = encode_frame({**data, "seq": i, "timestamp": datetime.now().isoformat()}, DEFAULT_FORMAT)
+            wire.append(len(compressor.compress(text.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)))
+        print(f"  {'json + permessage-deflate':24s} {sum(wire[1:]) // 19:6d} bytes  (transport-level, after the first frame)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    mode = sys.argv[1] if len(sys.argv) > 1 else "load"
+    if mode == "load":
+        for slow_policy in SLOW_CONSUMER_POLICIES:
+            asyncio.run(load_test(int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+                                  int(sys.argv[3]) if len(sys.argv) > 3 else 200, slow_policy))
+    elif mode == "encoding":
+        encoding_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
+    elif mode == "output":
+        asyncio.run(output_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 100000,
+                                     int(sys.argv[3]) if len(sys.argv) > 3 else 50))
+    else:
+        sys.exit(__doc__)
@@ -0,0 +1,326 @@
+"""
+Event Backplane
+Fans WebSocket events out across backend worker processes: in-process for a single worker, Redis
+pub/sub, or a local Unix-socket broker when running several uvicorn workers on one host
+"""
+
+import os
+import sys
+import json
+import uuid
+import fcntl
+import asyncio
+import logging
+import tempfile
+from typing import Dict, Any, Optional, Callable, Set
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# 'memory', 'redis', 'unix', or 'auto' (redis if REDIS_URL is set, unix if EVENT_BROKER_SOCKET is set)
+EVENT_BACKPLANE = os.getenv("EVENT_BACKPLANE", "auto")
+REDIS_URL = os.getenv("REDIS_URL")
+EVENT_BROKER_SOCKET = os.getenv("EVENT_BROKER_SOCKET")
+EVENT_CHANNEL = os.getenv("EVENT_CHANNEL", "dirk:events")
+
+DEFAULT_BROKER_SOCKET = os.path.join(tempfile.gettempdir(), "dirk-events.sock")
+MAX_EVENT_BYTES = 16 * 1024 * 1024
+# Events waiting to leave this worker; beyond this they are dropped rather than blocking producers
+OUTBOX_SIZE = 10000
+MAX_PEER_BUFFER = 8 * 1024 * 1024
+
+Handler = Callable[[Optional[str], Dict[str, Any]], None]
+
+
+class InProcessBackplane:
+    """Single worker: local delivery only (also the base for cross-process backplanes)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.handler: Optional[Handler] = None
+        self.stats = {"forwarded": 0, "received": 0, "dropped": 0}
+
+    async def start(self, handler: Handler):
+        """handler(topic, data) is called for each event published by another worker"""
+        self.handler = handler
+
+    async def stop(self):
+        pass
+
+    def forward(self, topic: Optional[str], text: str):
+        """Send an event (data already serialised as JSON) to the other workers without blocking"""
+
+    def _envelope(self, topic: Optional[str], text: str) -> bytes:
+        # The payload is spliced in as-is so it is not serialised a second time
+        return f'{{"origin":"{self.origin}","topic":{json.dumps(topic)},"data":{text}}}\n'.encode()
+
+    def _receive(self, payload: bytes):
+        try:
+            envelope = json.loads(payload)
+        except ValueError:
+            logger.debug("Ignoring malformed backplane event")
+            return
+        if envelope.get("origin") == self.origin or self.handler is None:
+            return
+        self.stats["received"] += 1
+        try:
+            self.handler(envelope.get("topic"), envelope.get("data") or {})
+        except Exception as e:
+            logger.error(f"Backplane event handler failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "origin": self.origin, **self.stats}
+
+
+class RedisBackplane(InProcessBackplane):
+    """Redis pub/sub on one channel; each worker publishes and subscribes"""
+
+    name = "redis"
+
+    def __init__(self, url: str, channel: str = EVENT_CHANNEL):
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self.client = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self, handler: Handler):
+        if aioredis is None:
+            raise RuntimeError("redis package is not installed")
+        await super().start(handler)
+        self.client = aioredis.from_url(self.url)
+        self._outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._send())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def forward(self, topic: Optional[str], text: str):
+        try:
+            self._outbox.put_nowait(self._envelope(topic, text))
+        except (asyncio.QueueFull, AttributeError):
+            self.stats["dropped"] += 1
+
+    async def _send(self):
+        while True:
+            payload = await self._outbox.get()
+            try:
+                await self.client.publish(self.channel, payload)
+                self.stats["forwarded"] += 1
+            except Exception as e:
+                self.stats["dropped"] += 1
+                logger.warning(f"Redis publish failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _listen(self):
+        delay = 0.5
+        while True:
+            try:
+                pubsub = self.client.pubsub()
+                await pubsub.subscribe(self.channel)
+                delay = 0.5
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._receive(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Redis subscription lost ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+class UnixSocketBroker:
+    """Relays newline-delimited events between every process connected to a Unix socket"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.peers: Set[asyncio.StreamWriter] = set()
+        self.handlers: Set[asyncio.Task] = set()
+        self.server = None
+        self.stats = {"relayed": 0, "slow_peers_dropped": 0}
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # stale socket from a broker that died; callers hold the broker lock
+        self.server = await asyncio.start_unix_server(self._handle, self.path, limit=MAX_EVENT_BYTES)
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.peers):
+                writer.close()
+            self.peers.clear()
+            # Closed peers read EOF, so their handlers finish on their own
+            if self.handlers:
+                await asyncio.wait(self.handlers, timeout=1)
+            self.server = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.peers.add(writer)
+        self.handlers.add(asyncio.current_task())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for peer in list(self.peers):
+                    if peer is writer:
+                        continue
+                    # Never wait on a peer; one that stops reading is cut off instead
+                    if peer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+                        self.stats["slow_peers_dropped"] += 1
+                        self.peers.discard(peer)
+                        peer.close()
+                        continue
+                    peer.write(line)
+                self.stats["relayed"] += 1
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            logger.debug(f"Broker peer dropped: {e}")
+        finally:
+            self.handlers.discard(asyncio.current_task())
+            self.peers.discard(writer)
+            writer.close()
+
+
+class UnixSocketBackplane(InProcessBackplane):
+    """
+    Local multi-worker fan-out without external services. Whichever worker holds the lock file
+    runs the broker; the others connect to it, and take over if it goes away.
+    """
+
+    name = "unix"
+
+    def __init__(self, path: str = DEFAULT_BROKER_SOCKET):
+        super().__init__()
+        self.path = path
+        self.broker: Optional[UnixSocketBroker] = None
+        self._lock_file = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self.connected = asyncio.Event()
+
+    async def start(self, handler: Handler):
+        await super().start(handler)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.broker is not None:
+            await self.broker.stop()
+            self.broker = None
+        if self._lock_file is not None:
+            self._lock_file.close()  # releases the flock
+            self._lock_file = None
+
+    def _try_become_broker(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        lock_file = open(f"{self.path}.lock", "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def _run(self):
+        delay = 0.05
+        while True:
+            try:
+                if self.broker is None and self._try_become_broker():
+                    self.broker = UnixSocketBroker(self.path)
+                    await self.broker.start()
+                    logger.info(f"Event broker listening on {self.path}")
+
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=MAX_EVENT_BYTES)
+                self.connected.set()
+                delay = 0.05
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self._receive(line)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.LimitOverrunError, ValueError) as e:
+                logger.debug(f"Event broker connection failed: {e}")
+
+            self.connected.clear()
+            self._writer = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 2.0)
+
+    def forward(self, topic: Optional[str], text: str):
+        writer = self._writer
+        if writer is None or writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+            self.stats["dropped"] += 1
+            return
+        writer.write(self._envelope(topic, text))
+        self.stats["forwarded"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update({"socket": self.path, "connected": self.connected.is_set(), "broker": self.broker is not None})
+        if self.broker is not None:
+            stats.update(self.broker.stats, peers=len(self.broker.peers))
+        return stats
+
+
+def create_backplane(kind: Optional[str] = None) -> InProcessBackplane:
+    """Backplane selected by EVENT_BACKPLANE / REDIS_URL / EVENT_BROKER_SOCKET"""
+    kind = (kind or EVENT_BACKPLANE).lower()
+    if kind == "auto":
+        kind = "redis" if REDIS_URL else "unix" if EVENT_BROKER_SOCKET else "memory"
+
+    if kind == "redis":
+        if aioredis is None or not REDIS_URL:
+            logger.warning("Redis backplane needs the redis package and REDIS_URL; using in-process events")
+            return InProcessBackplane()
+        return RedisBackplane(REDIS_URL)
+    if kind == "unix":
+        return UnixSocketBackplane(EVENT_BROKER_SOCKET or DEFAULT_BROKER_SOCKET)
+    return InProcessBackplane()
+
+
+async def _run_broker(path: str):
+    broker = UnixSocketBroker(path)
+    lock_file = open(f"{path}.lock", "w")
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    await broker.start()
+    print(f"Event broker listening on {path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.stop()
+
+
+if __name__ == "__main__":
+    # Standalone broker, for when no worker should own it: python event_backplane.py broker [socket path]
+    if len(sys.argv) < 2 or sys.argv[1] != "broker":
+        sys.exit("Usage: python event_backplane.py broker [socket path]")
+    asyncio.run(_run_broker(sys.argv[2] if len(sys.argv) > 2 else EVENT_BROKER_SOCKET or DEFAULT_BROKER_SOCKET))
@@ -0,0 +1,300 @@
+"""
+Lightweight Git Metadata Reader
+Reads HEAD, refs, config and the latest commit date straight from .git - no forks
+"""
+
+import os
+import mmap
+import zlib
+import glob
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG = 1, 2, 3, 4
+OBJ_OFS_DELTA, OBJ_REF_DELTA = 6, 7
+OBJECT_TYPES = {OBJ_COMMIT: "commit", OBJ_TREE: "tree", OBJ_BLOB: "blob", OBJ_TAG: "tag"}
+
+
+@dataclass
+class GitInfo:
+    git_dir: str
+    branch: Optional[str]
+    head_sha: Optional[str]
+    remote_url: Optional[str]
+    last_commit_time: Optional[float]
+    last_commit_date: Optional[str]  # same format as `git log -1 --format=%ai`
+
+
+def find_git_dir(project_path: str) -> Optional[str]:
+    """Locate the git directory, following `gitdir:` files used by worktrees and submodules"""
+    dot_git = os.path.join(project_path, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git, 'r') as f:
+            line = f.readline().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if line.startswith("gitdir:"):
+        git_dir = line[7:].strip()
+        return os.path.normpath(os.path.join(project_path, git_dir))
+    return None
+
+
+def _common_dir(git_dir: str) -> str:
+    """Shared git directory (refs, objects, config) for linked worktrees"""
+    try:
+        with open(os.path.join(git_dir, "commondir"), 'r') as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except (OSError, UnicodeDecodeError):
+        return git_dir
+
+
+def _read_packed_refs(common_dir: str) -> Dict[str, str]:
+    refs = {}
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), 'r') as f:
+            for line in f:
+                if line.startswith(("#", "^")):
+                    continue
+                parts = line.split()
+                if len(parts) == 2:
+                    refs[parts[1]] = parts[0]
+    except (OSError, UnicodeDecodeError):
+        pass
+    return refs
+
+
+def resolve_ref(git_dir: str, ref: str, depth: int = 0) -> Optional[str]:
+    """Resolve a (possibly symbolic) ref name to a commit sha"""
+    if depth > 5:
+        return None
+    common_dir = _common_dir(git_dir)
+    for base in (git_dir, common_dir):
+        try:
+            with open(os.path.join(base, ref), 'r') as f:
+                value = f.read().strip()
+        except (OSError, UnicodeDecodeError):
+            continue
+        if value.startswith("ref: "):
+            return resolve_ref(git_dir, value[5:], depth + 1)
+        return value or None
+    return _read_packed_refs(common_dir).get(ref)
+
+
+def read_head(git_dir: str) -> Tuple[Optional[str], Optional[str]]:
+    """(branch name or None when detached, head sha)"""
+    try:
+        with open(os.path.join(git_dir, "HEAD"), 'r') as f:
+            head = f.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return None, None
+    if head.startswith("ref: "):
+        ref = head[5:]
+        branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+        return branch, resolve_ref(git_dir, ref)
+    return None, head or None
+
+
+def read_config(git_dir: str) -> Dict[str, Dict[str, str]]:
+    """Parse .git/config into {'remote "origin"': {'url': ...}} sections"""
+    sections: Dict[str, Dict[str, str]] = {}
+    current = None
+    try:
+        with open(os.path.join(_common_dir(git_dir), "config"), 'r') as f:
+            for raw in f:
+                line = raw.strip()
+                if not line or line.startswith(("#", ";")):
+                    continue
+                if line.startswith("[") and line.endswith("]"):
+                    current = sections.setdefault(line[1:-1].strip(), {})
+                elif current is not None and "=" in line:
+                    key, value = line.split("=", 1)
+                    current[key.strip().lower()] = value.strip().strip('"')
+    except (OSError, UnicodeDecodeError):
+        pass
+    return sections
+
+
+# Object access
+
+def _read_loose(common_dir: str, sha: str) -> Optional[Tuple[str, bytes]]:
+    try:
+        with open(os.path.join(common_dir, "objects", sha[:2], sha[2:]), 'rb') as f:
+            raw = zlib.decompress(f.read())
+    except (OSError, zlib.error):
+        return None
+    header, _, body = raw.partition(b"\0")
+    return header.split(b" ", 1)[0].decode(), body
+
+
+def _find_in_idx(idx_path: str, sha: str) -> Optional[int]:
+    """Pack offset of an object from a version 2 .idx file (binary search over the mmap)"""
+    target = bytes.fromhex(sha)
+    with open(idx_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as idx:
+        if idx[:4] != b"\377tOc" or struct.unpack(">I", idx[4:8])[0] != 2:
+            return None
+        fanout = 8
+        lo = struct.unpack(">I", idx[fanout + 4 * (target[0] - 1):fanout + 4 * target[0]])[0] if target[0] else 0
+        hi = struct.unpack(">I", idx[fanout + 4 * target[0]:fanout + 4 * target[0] + 4])[0]
+        total = struct.unpack(">I", idx[fanout + 4 * 255:fanout + 1024])[0]
+        names = fanout + 1024
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name = idx[names + 20 * mid:names + 20 * mid + 20]
+            if name < target:
+                lo = mid + 1
+            elif name > target:
+                hi = mid
+            else:
+                offsets = names + 24 * total  # after names (20*N) and crc32s (4*N)
+                offset = struct.unpack(">I", idx[offsets + 4 * mid:offsets + 4 * mid + 4])[0]
+                if offset & 0x80000000:
+                    large = offsets + 4 * total + 8 * (offset & 0x7fffffff)
+                    offset = struct.unpack(">Q", idx[large:large + 8])[0]
+                return offset
+    return None
+
+
+def _inflate(pack, offset: int) -> bytes:
+    pack.seek(offset)
+    decompressor = zlib.decompressobj()
+    out = []
+    while not decompressor.eof:
+        chunk = pack.read(16 * 1024)
+        if not chunk:
+            break
+        out.append(decompressor.decompress(chunk))
+    return b"".join(out)
+
+
+def _delta_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    _, pos = _delta_varint(delta, 0)  # source size
+    _, pos = _delta_varint(delta, pos)  # target size
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            copy_offset = copy_size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    copy_offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    copy_size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[copy_offset:copy_offset + (copy_size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+    return bytes(out)
+
+
+def _read_packed_at(common_dir: str, pack, offset: int, depth: int = 0) -> Optional[Tuple[str, bytes]]:
+    if depth > 50:
+        return None
+    pack.seek(offset)
+    byte = pack.read(1)[0]
+    obj_type = (byte >> 4) & 0x7
+    pos = offset + 1
+    while byte & 0x80:
+        byte = pack.read(1)[0]
+        pos += 1
+
+    if obj_type == OBJ_OFS_DELTA:
+        byte = pack.read(1)[0]
+        pos += 1
+        base_distance = byte & 0x7f
+        while byte & 0x80:
+            byte = pack.read(1)[0]
+            pos += 1
+            base_distance = ((base_distance + 1) << 7) | (byte & 0x7f)
+        base = _read_packed_at(common_dir, pack, offset - base_distance, depth + 1)
+        delta = _inflate(pack, pos)
+    elif obj_type == OBJ_REF_DELTA:
+        base_sha = pack.read(20).hex()
+        delta = _inflate(pack, pos + 20)
+        base = read_object(common_dir, base_sha, depth + 1)
+    else:
+        return OBJECT_TYPES.get(obj_type, "unknown"), _inflate(pack, pos)
+
+    if base is None:
+        return None
+    return base[0], _apply_delta(base[1], delta)
+
+
+def read_object(git_dir: str, sha: str, depth: int = 0) -> Optional[Tuple[str, bytes]]:
+    """(type, body) of an object from loose storage or any packfile"""
+    common_dir = _common_dir(git_dir)
+    found = _read_loose(common_dir, sha)
+    if found:
+        return found
+    for idx_path in glob.glob(os.path.join(common_dir, "objects", "pack", "*.idx")):
+        try:
+            offset = _find_in_idx(idx_path, sha)
+            if offset is None:
+                continue
+            with open(idx_path[:-4] + ".pack", 'rb') as pack:
+                return _read_packed_at(common_dir, pack, offset, depth)
+        except (OSError, ValueError, IndexError, struct.error, zlib.error):
+            continue
+    return None
+
+
+def commit_author_date(body: bytes) -> Tuple[Optional[float], Optional[str]]:
+    """Author timestamp of a commit, and the same date formatted like %ai"""
+    for line in body.split(b"\n"):
+        if not line:
+            break
+        if line.startswith(b"author "):
+            try:
+                seconds, tz = line.rsplit(b" ", 2)[1:]
+                seconds, tz = int(seconds), tz.decode()
+                sign = -1 if tz.startswith("-") else 1
+                offset = timedelta(hours=int(tz[1:3]), minutes=int(tz[3:5])) * sign
+                local = datetime.fromtimestamp(seconds, timezone(offset))
+                return float(seconds), f"{local.strftime('%Y-%m-%d %H:%M:%S')} {tz}"
+            except (ValueError, IndexError):
+                return None, None
+    return None, None
+
+
+def read_git_metadata(project_path: str) -> Optional[GitInfo]:
+    """Read branch, head, origin URL and last commit date of a repository without forking"""
+    git_dir = find_git_dir(project_path)
+    if not git_dir:
+        return None
+
+    branch, head_sha = read_head(git_dir)
+    origin = read_config(git_dir).get('remote "origin"', {})
+
+    last_commit_time = last_commit_date = None
+    if head_sha:
+        commit = read_object(git_dir, head_sha)
+        if commit and commit[0] == "commit":
+            last_commit_time, last_commit_date = commit_author_date(commit[1])
+
+    return GitInfo(
+        git_dir=git_dir,
+        branch=branch,
+        head_sha=head_sha,
+        remote_url=origin.get("url"),
+        last_commit_time=last_commit_time,
+        last_commit_date=last_commit_date
+    )
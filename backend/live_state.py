@@ -0,0 +1,131 @@
+"""
+Live State Store
+Versioned agent status and metrics state for dashboards: a snapshot on subscribe, then JSON Patch
+(RFC 6902) diffs, with updates inside a short window coalesced into one patch per key
+"""
+
+import os
+import copy
+import asyncio
+import fnmatch
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Set
+
+logger = logging.getLogger(__name__)
+
+STATE_WINDOW_MS = int(os.getenv("WS_STATE_WINDOW_MS", "100"))
+
+
+def _pointer(path: str, key: Any) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """JSON Patch operations turning old into new; objects are diffed per key, lists replaced whole"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in old.items():
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(path, key)})
+            elif value != new[key]:
+                ops.extend(diff(value, new[key], _pointer(path, key)))
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document: Any, ops: List[Dict[str, Any]]) -> Any:
+    """Apply add/remove/replace operations (what diff emits) to a copy of document"""
+    document = copy.deepcopy(document)
+    for op in ops:
+        if op["path"] == "":
+            document = copy.deepcopy(op["value"])
+            continue
+        parts = [p.replace("~1", "/").replace("~0", "~") for p in op["path"].split("/")[1:]]
+        target = document
+        for part in parts[:-1]:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        if op["op"] == "remove":
+            del target[parts[-1]]
+        else:
+            target[parts[-1]] = copy.deepcopy(op["value"])
+    return document
+
+
+class StateStore:
+    """Current and last-published value per key (e.g. agent:{id}, metrics), with a version per publish"""
+
+    def __init__(self, on_patch: Callable[[str, Dict[str, Any]], None], window: float = STATE_WINDOW_MS / 1000):
+        self.on_patch = on_patch
+        self.window = window
+        self.current: Dict[str, Any] = {}
+        self.published: Dict[str, Any] = {}
+        self.versions: Dict[str, int] = {}
+        self.dirty: Set[str] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {"updates": 0, "patches": 0, "coalesced": 0, "unchanged": 0}
+
+    def update(self, key: str, value: Any):
+        """Record a new value; subscribers get one patch per key per window"""
+        self.stats["updates"] += 1
+        if key in self.dirty:
+            self.stats["coalesced"] += 1
+        self.current[key] = copy.deepcopy(value)
+        self.dirty.add(key)
+        if self.window <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+
+    def remove(self, key: str):
+        self.current.pop(key, None)
+        self.published.pop(key, None)
+        self.versions.pop(key, None)
+        self.dirty.discard(key)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        dirty, self.dirty = self.dirty, set()
+        for key in sorted(dirty):
+            if key not in self.current:
+                continue
+            value = self.current[key]
+            if key in self.published:
+                ops = diff(self.published[key], value)
+                if not ops:
+                    self.stats["unchanged"] += 1
+                    continue
+            else:
+                ops = [{"op": "replace", "path": "", "value": value}]
+            base_version = self.versions.get(key, 0)
+            self.versions[key] = base_version + 1
+            self.published[key] = value
+            self.stats["patches"] += 1
+            self.on_patch(key, {
+                "type": "state_patch",
+                "key": key,
+                "base_version": base_version,
+                "version": base_version + 1,
+                "ops": ops
+            })
+
+    def snapshot(self, key: str) -> Dict[str, Any]:
+        """Last published value; patches that follow have base_version equal to this version"""
+        return {
+            "type": "state_snapshot",
+            "key": key,
+            "version": self.versions.get(key, 0),
+            "value": self.published.get(key),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def keys_matching(self, patterns) -> List[str]:
+        return sorted(key for key in self.published
+                      if any(fnmatch.fnmatchcase(key, pattern) for pattern in patterns))
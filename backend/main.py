@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
@@ -10,6 +10,7 @@ import json
 import subprocess
 import asyncio
 from datetime import datetime
+from dataclasses import asdict
 import logging
 from dotenv import load_dotenv
 
@@ -33,9 +34,11 @@ try:
     from cli_orchestrator import CLIOrchestrator
     cli_orchestrator = CLIOrchestrator()
     
-    # Import Real Agent Systems
-    from agents.claude_agent import claude_pool
-    from agents.project_discovery import project_discovery
+    # Import Real Agent Systems (agent modules import their siblings by name)
+    sys.path.append(os.path.join(os.path.dirname(__file__), 'agents'))
+    from claude_agent import claude_pool
+    from project_discovery import project_discovery
+    from task_queue import batch_workers
     logger.info("Real agent systems initialized")
     
 except ImportError as e:
@@ -45,8 +48,7 @@ except ImportError as e:
     godmode_orchestrator = None
     claude_pool = None
     project_discovery = None
-
-active_websockets = []
+    batch_workers = None
 
 # Add CORS middleware to allow frontend to communicate with backend
 app.add_middleware(
@@ -831,7 +833,7 @@ async def deploy_agent(deployment: AgentDeploy):
 from project_manager import project_manager
 
 @app.get("/api/projects")
-async def get_projects():
+async def get_projects(stream: bool = False):
     """Get projects from configured sources"""
     # Try to load settings first
     settings = await get_settings()
@@ -846,7 +848,10 @@ async def get_projects():
                     "type": "local",
                     "name": source.get("name", "Local"),
                     "path": source.get("path", "~/projects"),
-                    "enabled": source.get("enabled", True)
+                    "enabled": source.get("enabled", True),
+                    "max_depth": source.get("maxDepth"),
+                    "ignore": source.get("ignore"),
+                    "visit_budget": source.get("visitBudget")
                 })
             elif source.get("type") == "github":
                 sources.append({
@@ -875,8 +880,20 @@ async def get_projects():
             "enabled": True
         }]
     
-    # Discover projects
-    projects = await project_manager.discover_projects(sources)
+    if stream:
+        # NDJSON: one line per source as soon as it answers, then a summary line
+        async def source_lines():
+            async for report, source_projects in project_manager.iter_discovery(sources):
+                yield json.dumps({"source": report, "projects": source_projects}) + "\n"
+            yield json.dumps({
+                "done": True,
+                "count": len(project_manager.projects_cache),
+                "last_scan": project_manager.last_scan
+            }) + "\n"
+        return StreamingResponse(source_lines(), media_type="application/x-ndjson")
+    
+    # Serve from the project index; stale entries are revalidated in the background
+    projects = await project_manager.get_projects(sources)
     
     # Add default projects if no projects found
     if not projects:
@@ -913,7 +930,12 @@ async def get_projects():
             }
         ]
     
-    return {"projects": projects, "last_scan": project_manager.last_scan}
+    return {
+        "projects": projects,
+        "last_scan": project_manager.last_scan,
+        "refreshing": project_manager.is_refreshing(),
+        "sources": project_manager.last_scan_report
+    }
 
 # Import MrWolf security validator
 from mrwolf_security import mr_wolf
@@ -1000,6 +1022,49 @@ async def generate_security_report(request: dict):
     
     return report
 
+# Live project updates from the filesystem
+from project_watcher import project_watcher
+
+@app.on_event("startup")
+async def start_project_watcher():
+    """Watch local project sources and push per-project deltas to dashboards"""
+    settings = await get_settings()
+    project_watcher.start(settings.get("projectSources", []), project_discovery)
+
+@app.on_event("shutdown")
+async def stop_project_watcher():
+    await project_watcher.close()
+
+@app.get("/api/projects/watcher")
+async def get_project_watcher_status():
+    """Get filesystem watcher mode and event counters"""
+    return project_watcher.get_stats()
+
+@app.get("/api/projects/search")
+async def search_projects(
+    q: str = "",
+    technologies: Optional[str] = None,
+    type: Optional[str] = None,
+    source: Optional[str] = None,
+    status: Optional[str] = None,
+    order: str = "desc",
+    offset: int = 0,
+    limit: int = 50
+):
+    """Faceted project search; facet parameters take comma-separated values"""
+    filters = {
+        facet: [value.strip() for value in values.split(",") if value.strip()]
+        for facet, values in (("technologies", technologies), ("type", type),
+                              ("source", source), ("status", status))
+        if values
+    }
+    return project_manager.search.search(
+        q, filters,
+        offset=max(offset, 0),
+        limit=min(max(limit, 1), 500),
+        descending=order != "asc"
+    )
+
 @app.get("/api/projects/{project_id}")
 async def get_project(project_id: str):
     """Get specific project details"""
@@ -1019,7 +1084,7 @@ async def refresh_projects():
             sources.append(source)
     
     projects = await project_manager.discover_projects(sources)
-    return {"projects": projects, "count": len(projects)}
+    return {"projects": projects, "count": len(projects), "sources": project_manager.last_scan_report}
 
 @app.post("/api/projects/create")
 async def create_project(project_data: dict):
@@ -1112,6 +1177,10 @@ async def save_settings(new_settings: dict):
     
     # Also save to file for persistence
     settings_file = os.path.join(os.path.dirname(__file__), "settings.json")
+    
+    # Follow any change to the local project sources
+    project_watcher.start(new_settings.get("projectSources", []), project_discovery)
+    
     try:
         with open(settings_file, 'w') as f:
             json.dump(new_settings, f, indent=2)
@@ -1154,17 +1223,13 @@ async def execute_cli_command(cmd: CLICommand):
         # Execute command
         result = await asyncio.to_thread(cli_orchestrator.executeCommand, config)
         
-        # Broadcast to WebSocket clients
-        for ws in active_websockets:
-            try:
-                await ws.send_json({
-                    "type": "command_complete",
-                    "commandId": result["commandId"],
-                    "exitCode": result["exitCode"],
-                    "output": result["output"]
-                })
-            except:
-                pass
+        # Queued for orchestrator clients; the response does not wait on their sockets
+        ws_manager.publish({
+            "type": "command_complete",
+            "commandId": result["commandId"],
+            "exitCode": result["exitCode"],
+            "output": result["output"]
+        }, topic="orchestrator")
         
         return result
     except Exception as e:
@@ -1349,18 +1414,14 @@ async def godmode_execute(request: dict):
     
     result = await godmode_orchestrator.execute_workflow(task_request, context)
     
-    # Broadcast through WebSocket
-    for ws in active_websockets:
-        try:
-            await ws.send_json({
-                "type": "godmode_execution",
-                "workflow_id": result.get("workflow_id"),
-                "status": "completed" if result.get("success") else "failed",
-                "tasks": result.get("tasks", []),
-                "timestamp": datetime.now().isoformat()
-            })
-        except:
-            pass
+    # Broadcast through WebSocket (queued; does not delay the response)
+    ws_manager.publish({
+        "type": "godmode_execution",
+        "workflow_id": result.get("workflow_id"),
+        "status": "completed" if result.get("success") else "failed",
+        "tasks": result.get("tasks", []),
+        "timestamp": datetime.now().isoformat()
+    }, topic="orchestrator")
     
     return result
 
@@ -1406,57 +1467,62 @@ async def godmode_task_status(task_id: str):
     task = godmode_orchestrator.tasks[task_id]
     return godmode_orchestrator.task_to_dict(task)
 
+async def run_orchestrator_command(websocket: WebSocket, message: Dict[str, Any]):
+    """Execute an orchestrator command and send its output back to the requesting socket"""
+    command = message.get("command", "")
+    try:
+        result = await orchestrator.execute(command)
+    except Exception as e:
+        logger.error(f"Orchestrator command failed: {e}")
+        result = {"output": "", "error": str(e), "success": False, "exit_code": 1}
+    
+    await ws_manager.send_to_client(websocket, {
+        "type": "command_output",
+        "commandId": message.get("commandId"),
+        "output": result.get("output", ""),
+        "error": result.get("error"),
+        "success": result.get("success")
+    })
+    
+    await ws_manager.send_to_client(websocket, {
+        "type": "command_complete",
+        "commandId": message.get("commandId"),
+        "exitCode": result.get("exit_code", 0)
+    })
+
 # WebSocket endpoint for orchestrator real-time updates
 @app.websocket("/ws/orchestrator")
 async def websocket_orchestrator(websocket: WebSocket):
-    await websocket.accept()
-    active_websockets.append(websocket)
+    # Same hub as /ws/terminal; orchestrator clients follow the 'orchestrator' topic
+    await ws_manager.connect(websocket, topics=["orchestrator"])
     
     try:
         while True:
             # Receive commands from frontend
             data = await websocket.receive_text()
+            ws_manager.touch(websocket)
             message = json.loads(data)
             
             if message.get("type") == "execute":
-                # Execute command and stream output
-                command = message.get("command", "")
-                result = await orchestrator.execute(command)
-                
-                await websocket.send_json({
-                    "type": "command_output",
-                    "commandId": message.get("commandId"),
-                    "output": result.get("output", ""),
-                    "error": result.get("error"),
-                    "success": result.get("success")
-                })
-                
-                await websocket.send_json({
-                    "type": "command_complete",
-                    "commandId": message.get("commandId"),
-                    "exitCode": result.get("exit_code", 0)
-                })
+                # Execute in the background so heartbeats keep being read
+                ws_manager.run_in_background(run_orchestrator_command(websocket, message))
             
             elif message.get("type") == "agent_status":
-                # Update agent status
-                agent_id = message.get("agentId")
-                status = message.get("status")
-                
-                # Broadcast to all connected clients
-                for ws in active_websockets:
-                    if ws != websocket:
-                        await ws.send_json({
-                            "type": "agent_status",
-                            "agentId": agent_id,
-                            "status": status
-                        })
+                # Relay to the other orchestrator clients
+                ws_manager.publish({
+                    "type": "agent_status",
+                    "agentId": message.get("agentId"),
+                    "status": message.get("status")
+                }, topic="orchestrator", exclude=websocket)
+            
+            else:
+                await ws_manager.handle_message(websocket, message)
             
     except WebSocketDisconnect:
-        active_websockets.remove(websocket)
+        await ws_manager.disconnect(websocket)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        if websocket in active_websockets:
-            active_websockets.remove(websocket)
+        await ws_manager.disconnect(websocket)
     """Get currently active executions"""
     if not orchestrator:
         return {}
@@ -1466,6 +1532,16 @@ async def websocket_orchestrator(websocket: WebSocket):
 # Import WebSocket manager
 from websocket_manager import ws_manager
 
+@app.on_event("startup")
+async def start_event_backplane():
+    """Share WebSocket broadcasts with the other uvicorn workers"""
+    await ws_manager.start_backplane()
+
+@app.on_event("shutdown")
+async def stop_websockets():
+    """Stop running terminal commands and leave the backplane"""
+    await ws_manager.close()
+
 # WebSocket for real-time terminal output
 @app.websocket("/ws/terminal")
 async def websocket_terminal(websocket: WebSocket):
@@ -1475,13 +1551,15 @@ async def websocket_terminal(websocket: WebSocket):
         while True:
             # Receive and handle messages
             data = await websocket.receive_text()
+            ws_manager.touch(websocket)
             try:
                 message = json.loads(data)
                 await ws_manager.handle_message(websocket, message)
             except json.JSONDecodeError:
                 # Handle plain text messages for backward compatibility
                 if data == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    ws_manager.touch(websocket, heartbeat=True)
+                    await ws_manager.send_to_client(websocket, {"type": "pong"})
                 else:
                     await ws_manager.handle_message(websocket, {"type": "execute_command", "command": data})
     except WebSocketDisconnect:
@@ -1514,6 +1592,11 @@ async def get_metrics():
         }
     }
 
+@app.get("/api/websockets/metrics")
+async def get_websocket_metrics():
+    """Outbound queue depth, drop and delivery counters for WebSocket clients"""
+    return ws_manager.get_metrics()
+
 # REAL AGENT SYSTEM ENDPOINTS
 
 @app.get("/api/real-agents")
@@ -1569,13 +1652,14 @@ async def execute_real_task(request: dict):
     task_id = request.get("task_id", f"task-{datetime.now().isoformat()}")
     prompt = request.get("prompt")
     max_tokens = request.get("max_tokens", 4000)
+    use_cache = request.get("use_cache", True)
     
     if not prompt:
         raise HTTPException(status_code=400, detail="Prompt required")
     
     try:
         # Execute task on available agent
-        task_result = await claude_pool.execute_task_on_pool(task_id, prompt, max_tokens)
+        task_result = await claude_pool.execute_task_on_pool(task_id, prompt, max_tokens, use_cache)
         
         if not task_result:
             raise HTTPException(status_code=503, detail="No available agents")
@@ -1594,14 +1678,78 @@ async def execute_real_task(request: dict):
         logger.error(f"Real task execution failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/real-agents/batch")
+async def submit_batch_tasks(request: dict):
+    """Enqueue a batch of tasks for the agent pool workers"""
+    if not batch_workers:
+        raise HTTPException(status_code=503, detail="Agent pool not available")
+    
+    tasks = request.get("tasks") or [{"prompt": p} for p in request.get("prompts", [])]
+    if not tasks or not all(isinstance(t, dict) and t.get("prompt") for t in tasks):
+        raise HTTPException(status_code=400, detail="A non-empty list of tasks with prompts is required")
+    
+    def valid_max_tokens(value) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool) and value > 0
+    
+    max_tokens = request.get("max_tokens", 4000)
+    if not valid_max_tokens(max_tokens) or not all(
+            t.get("max_tokens") is None or valid_max_tokens(t["max_tokens"]) for t in tasks):
+        raise HTTPException(status_code=400, detail="max_tokens must be a positive integer")
+    
+    batch = await batch_workers.submit(tasks, max_tokens, request.get("use_cache", True))
+    return {"success": True, **batch}
+
+@app.get("/api/real-agents/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Get progress of a task batch"""
+    if not batch_workers:
+        raise HTTPException(status_code=503, detail="Agent pool not available")
+    
+    summary = await asyncio.to_thread(batch_workers.queue.get_batch, batch_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return summary
+
+@app.get("/api/real-agents/batch/{batch_id}/results")
+async def get_batch_results(batch_id: str, offset: int = 0, limit: int = 100, status: Optional[str] = None):
+    """Page through (partial) results of a task batch"""
+    if not batch_workers:
+        raise HTTPException(status_code=503, detail="Agent pool not available")
+    
+    limit = max(1, min(limit, 1000))
+    results = await asyncio.to_thread(batch_workers.queue.get_results, batch_id, offset, limit, status)
+    return {"batch_id": batch_id, "offset": offset, "limit": limit, "results": results}
+
+async def broadcast_batch_progress(batch_id: str, summary: Dict[str, Any]):
+    """Push batch progress to dashboard clients"""
+    await ws_manager.send_task_progress(batch_id, summary["progress"], summary)
+
+@app.on_event("startup")
+async def start_batch_workers():
+    """Start batch workers, resuming anything interrupted by a restart"""
+    if batch_workers:
+        await batch_workers.start(on_progress=broadcast_batch_progress)
+
+@app.on_event("shutdown")
+async def stop_batch_workers():
+    if batch_workers:
+        await batch_workers.stop()
+
 @app.get("/api/projects/discover")
-async def discover_projects():
+async def discover_projects(stream: bool = False):
     """Discover projects and their potential agents"""
     if not project_discovery:
         return {"projects": [], "status": "disabled"}
     
-    # Discover all projects
-    projects = project_discovery.discover_all_projects()
+    if stream:
+        # NDJSON: one project per line as soon as its scan finishes
+        async def project_lines():
+            async for project in project_discovery.stream_projects():
+                yield json.dumps(asdict(project)) + "\n"
+        return StreamingResponse(project_lines(), media_type="application/x-ndjson")
+    
+    # Discover all projects (off the event loop; scanning is filesystem bound)
+    projects = await asyncio.to_thread(project_discovery.discover_all_projects)
     
     # Get project status including any deployed agents
     status = project_discovery.get_project_status()
@@ -1623,14 +1771,34 @@ async def deploy_project_agents(request: dict):
     if not api_key:
         raise HTTPException(status_code=400, detail="API key required")
     
-    # Deploy agents for all projects
-    results = await project_discovery.deploy_all_agents(api_key)
+    async def broadcast_deployment_progress(progress: Dict[str, Any]):
+        await ws_manager.broadcast({
+            "type": "agent_deployment_progress",
+            **progress,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    # Deploy agents for all projects (bounded concurrency, unchanged agents skipped)
+    try:
+        results = await project_discovery.deploy_all_agents(
+            api_key,
+            concurrency=request.get("concurrency"),
+            on_progress=broadcast_deployment_progress
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    summary = project_discovery.last_deployment
     
     return {
         "success": True,
         "deployment_results": results,
         "total_projects": len(project_discovery.discovered_projects),
-        "successful_deployments": sum(results.values())
+        "successful_deployments": sum(results.values()),
+        "deployed": summary["deployed"],
+        "restored": summary["restored"],
+        "unchanged": summary["unchanged"],
+        "failed": summary["failed"],
+        "duration_ms": summary["duration_ms"]
     }
 
 @app.get("/api/projects/{project_name}/agent")
@@ -1662,6 +1830,10 @@ async def execute_project_task(project_name: str, request: dict):
     
     agent = project_discovery.sub_agents[agent_id]
     
+    # Rebuild the cached project context only if CLAUDE.md or dependencies changed
+    if project_name in project_discovery.discovered_projects:
+        project_discovery.refresh_agent_context(project_discovery.discovered_projects[project_name])
+    
     task_id = request.get("task_id", f"project-task-{datetime.now().isoformat()}")
     prompt = request.get("prompt")
     max_tokens = request.get("max_tokens", 4000)
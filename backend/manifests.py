@@ -0,0 +1,271 @@
+"""
+Project Manifest Parsing
+One parser per manifest format (package.json, requirements.txt, pyproject.toml, Cargo.toml, go.mod),
+memoised per (path, mtime, size) so each file is parsed once per change
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Iterable
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+logger = logging.getLogger(__name__)
+
+# Requirement name, optional extras, then the rest of the specifier (PEP 508, without URLs)
+REQUIREMENT_PATTERN = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*([^;]*)")
+GO_REQUIRE_PATTERN = re.compile(r"^(\S+)\s+(\S+)")
+MAX_CACHED_MANIFESTS = 4096
+
+
+@dataclass
+class Manifest:
+    ecosystem: str  # 'npm', 'python', 'cargo', 'go'
+    path: str
+    name: Optional[str] = None
+    version: Optional[str] = None
+    description: Optional[str] = None
+    dependencies: Dict[str, str] = field(default_factory=dict)
+    dev_dependencies: Dict[str, str] = field(default_factory=dict)
+    workspaces: List[str] = field(default_factory=list)  # member globs of a monorepo root
+
+    def all_dependencies(self) -> Dict[str, str]:
+        return {**self.dependencies, **self.dev_dependencies}
+
+
+def canonical_name(name: str) -> str:
+    """PEP 503 normalised package name (Flask_SQLAlchemy -> flask-sqlalchemy)"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_requirement(line: str) -> Optional[tuple[str, str]]:
+    """(name, version) from a PEP 508 requirement; pinned versions bare, other specifiers verbatim"""
+    match = REQUIREMENT_PATTERN.match(line)
+    if not match:
+        return None
+    name, _extras, spec = match.groups()
+    spec = spec.strip().strip("()").strip()
+    if spec.startswith("==") and not any(c in spec[2:] for c in ",<>!~=*"):
+        return name, spec[2:].strip()
+    return name, spec or "latest"
+
+
+def parse_package_json(path: str, text: str) -> Manifest:
+    data = json.loads(text)
+    workspaces = data.get("workspaces") or []
+    if isinstance(workspaces, dict):  # Yarn's {"packages": [...]} form
+        workspaces = workspaces.get("packages") or []
+    return Manifest(
+        ecosystem="npm",
+        path=path,
+        name=data.get("name"),
+        version=data.get("version"),
+        description=data.get("description"),
+        dependencies=dict(data.get("dependencies") or {}),
+        dev_dependencies=dict(data.get("devDependencies") or {}),
+        workspaces=[w for w in workspaces if isinstance(w, str)]
+    )
+
+
+def parse_requirements_txt(path: str, text: str) -> Manifest:
+    manifest = Manifest(ecosystem="python", path=path)
+    for raw in text.splitlines():
+        line = raw.split(" #", 1)[0].strip()
+        # Comments, pip options (-r, -e, --index-url ...) and direct URLs carry no name==version
+        if not line or line.startswith(("#", "-")) or "://" in line:
+            continue
+        requirement = parse_requirement(line)
+        if requirement:
+            manifest.dependencies[requirement[0]] = requirement[1]
+    return manifest
+
+
+def _requirements(entries: Iterable[str]) -> Dict[str, str]:
+    return dict(r for r in (parse_requirement(entry) for entry in entries) if r)
+
+
+def _poetry_version(spec: Any) -> str:
+    if isinstance(spec, dict):
+        return str(spec.get("version") or ("git" if "git" in spec else "path" if "path" in spec else "latest"))
+    return str(spec)
+
+
+def parse_pyproject_toml(path: str, text: str) -> Manifest:
+    data = tomllib.loads(text)
+    project = data.get("project", {})
+    poetry = data.get("tool", {}).get("poetry", {})
+    manifest = Manifest(
+        ecosystem="python",
+        path=path,
+        name=project.get("name") or poetry.get("name"),
+        version=project.get("version") or poetry.get("version"),
+        description=project.get("description") or poetry.get("description"),
+        workspaces=list(data.get("tool", {}).get("uv", {}).get("workspace", {}).get("members", []))
+    )
+
+    # PEP 621
+    manifest.dependencies.update(_requirements(project.get("dependencies", [])))
+    for extra in project.get("optional-dependencies", {}).values():
+        manifest.dev_dependencies.update(_requirements(extra))
+    for group in data.get("dependency-groups", {}).values():
+        manifest.dev_dependencies.update(_requirements(g for g in group if isinstance(g, str)))
+
+    # Poetry
+    for name, spec in poetry.get("dependencies", {}).items():
+        if name.lower() != "python":
+            manifest.dependencies[name] = _poetry_version(spec)
+    dev_tables = [poetry.get("dev-dependencies", {})]
+    dev_tables += [group.get("dependencies", {}) for group in poetry.get("group", {}).values()]
+    for table in dev_tables:
+        for name, spec in table.items():
+            manifest.dev_dependencies[name] = _poetry_version(spec)
+    return manifest
+
+
+def _cargo_version(spec: Any) -> str:
+    if isinstance(spec, dict):
+        if spec.get("workspace"):
+            return "workspace"
+        return str(spec.get("version") or ("git" if "git" in spec else "path" if "path" in spec else "*"))
+    return str(spec)
+
+
+def parse_cargo_toml(path: str, text: str) -> Manifest:
+    data = tomllib.loads(text)
+    package = data.get("package", {})
+    manifest = Manifest(
+        ecosystem="cargo",
+        path=path,
+        name=package.get("name"),
+        version=package.get("version") if isinstance(package.get("version"), str) else None,
+        description=package.get("description") if isinstance(package.get("description"), str) else None,
+        workspaces=list(data.get("workspace", {}).get("members", []))
+    )
+    # Workspace roots declare shared versions under [workspace.dependencies]
+    for table in (data.get("workspace", {}).get("dependencies", {}), data.get("dependencies", {}),
+                  data.get("build-dependencies", {})):
+        for name, spec in table.items():
+            manifest.dependencies[name] = _cargo_version(spec)
+    for name, spec in data.get("dev-dependencies", {}).items():
+        manifest.dev_dependencies[name] = _cargo_version(spec)
+    return manifest
+
+
+def parse_go_mod(path: str, text: str) -> Manifest:
+    manifest = Manifest(ecosystem="go", path=path)
+    in_require = False
+    for raw in text.splitlines():
+        line = raw.split("//", 1)[0].strip()
+        if not line:
+            continue
+        if in_require:
+            if line == ")":
+                in_require = False
+                continue
+            entry = line
+        elif line.startswith("module "):
+            manifest.name = line[len("module "):].strip().strip('"')
+            continue
+        elif line.startswith("require"):
+            entry = line[len("require"):].strip()
+            if entry == "(":
+                in_require = True
+                continue
+        else:
+            continue  # go / toolchain / replace / exclude / retract
+
+        match = GO_REQUIRE_PATTERN.match(entry)
+        if match:
+            manifest.dependencies[match.group(1)] = match.group(2)
+    return manifest
+
+
+PARSERS = {
+    "package.json": parse_package_json,
+    "requirements.txt": parse_requirements_txt,
+    "pyproject.toml": parse_pyproject_toml,
+    "Cargo.toml": parse_cargo_toml,
+    "go.mod": parse_go_mod,
+}
+
+# Manifests each project type takes its dependencies from
+TYPE_MANIFESTS = {
+    "react": ["package.json"],
+    "node": ["package.json"],
+    "nodejs": ["package.json"],
+    "vue": ["package.json"],
+    "svelte": ["package.json"],
+    "python": ["requirements.txt", "pyproject.toml"],
+    "rust": ["Cargo.toml"],
+    "go": ["go.mod"],
+}
+
+_cache: "OrderedDict[str, tuple[int, int, Optional[Manifest]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+stats = {"hits": 0, "parsed": 0, "errors": 0}
+
+
+def read_manifest(path: str) -> Optional[Manifest]:
+    """Parsed manifest at path (None if missing, unknown or unparsable); callers must not mutate it"""
+    parser = PARSERS.get(os.path.basename(path))
+    if parser is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _cache.move_to_end(path)
+            stats["hits"] += 1
+            return cached[2]
+
+    manifest = None
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        if parser in (parse_pyproject_toml, parse_cargo_toml) and tomllib is None:
+            raise ValueError("no TOML parser available (Python 3.11+ or tomli required)")
+        manifest = parser(path, text)
+        stats["parsed"] += 1
+    except Exception as e:
+        stats["errors"] += 1
+        logger.debug(f"Could not parse {path}: {e}")
+
+    with _cache_lock:
+        _cache[path] = (st.st_mtime_ns, st.st_size, manifest)
+        _cache.move_to_end(path)
+        while len(_cache) > MAX_CACHED_MANIFESTS:
+            _cache.popitem(last=False)
+    return manifest
+
+
+def project_manifests(project_path: str, names: Optional[Iterable[str]] = None) -> List[Manifest]:
+    """Parsed manifests present in a project directory, in PARSERS order unless names are given"""
+    manifests = []
+    for name in names or PARSERS:
+        manifest = read_manifest(os.path.join(project_path, name))
+        if manifest:
+            manifests.append(manifest)
+    return manifests
+
+
+def project_dependencies(project_path: str, project_type: str) -> Dict[str, str]:
+    """Runtime and development dependencies from the manifests that matter for a project type"""
+    dependencies: Dict[str, str] = {}
+    for manifest in project_manifests(project_path, TYPE_MANIFESTS.get(project_type, [])):
+        dependencies.update(manifest.all_dependencies())
+    return dependencies
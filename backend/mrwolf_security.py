@@ -9,6 +9,7 @@ import os
 import json
 import hashlib
 import logging
+from manifests import read_manifest
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import subprocess
@@ -350,45 +351,26 @@ class MrWolfAdvisor:
             "recommendations": []
         }
         
-        try:
-            with open(package_file, 'r') as f:
-                if file_type == "package.json":
-                    data = json.load(f)
-                    deps = {**data.get("dependencies", {}), **data.get("devDependencies", {})}
-                    
-                    # Check against known vulnerabilities
-                    npm_vulns = self.vulnerability_database["dependency_vulnerabilities"]["npm"]
-                    
-                    for package, version in deps.items():
-                        if package in npm_vulns:
-                            # Simple version check (in production, use proper semver)
-                            results["vulnerable_packages"].append({
-                                "package": package,
-                                "current": version,
-                                "vulnerability": npm_vulns[package],
-                                "severity": "HIGH"
-                            })
-                    
-                elif file_type == "requirements.txt":
-                    # Parse requirements.txt
-                    with open(package_file, 'r') as f:
-                        lines = f.readlines()
-                    
-                    python_vulns = self.vulnerability_database["dependency_vulnerabilities"]["python"]
-                    
-                    for line in lines:
-                        if '==' in line:
-                            package, version = line.strip().split('==')
-                            if package in python_vulns:
-                                results["vulnerable_packages"].append({
-                                    "package": package,
-                                    "current": version,
-                                    "vulnerability": python_vulns[package],
-                                    "severity": "HIGH"
-                                })
-        
-        except Exception as e:
-            logger.error(f"Error checking dependencies: {e}")
+        # Parsed once per file change and shared with project discovery
+        manifest = read_manifest(package_file)
+        if manifest is None:
+            logger.error(f"Error checking dependencies: could not parse {package_file} ({file_type})")
+        else:
+            ecosystem_vulns = self.vulnerability_database["dependency_vulnerabilities"].get(manifest.ecosystem, {})
+            # Python distribution names are case-insensitive
+            case_insensitive = manifest.ecosystem == "python"
+            
+            for package, version in manifest.all_dependencies().items():
+                key = package.lower() if case_insensitive else package
+                # Unconstrained requirements resolve to current releases
+                if key in ecosystem_vulns and version != "latest":
+                    # Simple version check (in production, use proper semver)
+                    results["vulnerable_packages"].append({
+                        "package": package,
+                        "current": version,
+                        "vulnerability": ecosystem_vulns[key],
+                        "severity": "HIGH"
+                    })
         
         # Determine risk level
         if len(results["vulnerable_packages"]) > 5:
@@ -0,0 +1,127 @@
+"""
+Persistent Project Index
+Caches local project analysis keyed by path and a cheap filesystem fingerprint
+"""
+
+import os
+import copy
+import json
+import logging
+import threading
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Files whose changes can alter a project's analysis
+MANIFEST_FILES = [
+    "package.json", "requirements.txt", "setup.py", "pyproject.toml",
+    "go.mod", "Cargo.toml", "pom.xml", "build.gradle",
+    "Dockerfile", "docker-compose.yml"
+]
+
+# Bump whenever analyze_local_project output changes
+INDEX_VERSION = 4
+
+
+def _stat_key(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def git_head_fingerprint(project_path: str) -> Optional[List[Any]]:
+    """HEAD contents plus the stat of the ref it points to (moves on every commit)"""
+    git_dir = os.path.join(project_path, ".git")
+    try:
+        with open(os.path.join(git_dir, "HEAD"), 'r') as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+
+    ref_stat = None
+    if head.startswith("ref: "):
+        ref_stat = _stat_key(os.path.join(git_dir, head[5:]))
+        if ref_stat is None:
+            ref_stat = _stat_key(os.path.join(git_dir, "packed-refs"))
+    return [head, ref_stat]
+
+
+def project_fingerprint(project_path: str) -> List[Any]:
+    """Directory mtime, manifest stats and git HEAD state of a project directory"""
+    return [
+        _stat_key(project_path),
+        [[name, _stat_key(os.path.join(project_path, name))] for name in MANIFEST_FILES],
+        git_head_fingerprint(project_path),
+    ]
+
+
+class ProjectIndex:
+    """Path-keyed analysis cache persisted as JSON"""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.snapshot: Dict[str, Any] = {}
+        self.dirty = False
+        self.stats = {"reused": 0, "analyzed": 0}
+        # Local sources are scanned in parallel worker threads
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """Load the index from disk, discarding incompatible versions"""
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.entries = data.get("entries", {})
+                self.snapshot = data.get("snapshot", {})
+        except (OSError, ValueError) as e:
+            logger.debug(f"Project index not loaded: {e}")
+
+    def save(self):
+        """Atomically write the index if anything changed"""
+        with self._lock:
+            if not self.dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+                tmp_path = f"{self.index_path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump({"version": INDEX_VERSION, "entries": self.entries, "snapshot": self.snapshot}, f)
+                os.replace(tmp_path, self.index_path)
+                self.dirty = False
+            except OSError as e:
+                logger.error(f"Failed to save project index: {e}")
+
+    def lookup(self, path: str, fingerprint: List[Any]) -> tuple[bool, Optional[Dict[str, Any]]]:
+        """(hit, info) for a path; info is None for directories known not to be projects"""
+        with self._lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                self.stats["reused"] += 1
+                return True, copy.deepcopy(entry["info"])
+        return False, None
+
+    def store(self, path: str, fingerprint: List[Any], info: Optional[Dict[str, Any]]):
+        """Record a fresh analysis"""
+        with self._lock:
+            self.stats["analyzed"] += 1
+            self.entries[path] = {"fingerprint": fingerprint, "info": info}
+            self.dirty = True
+
+    def prune(self, root: str, live_paths: set):
+        """Forget entries under root that no longer exist"""
+        prefix = os.path.join(root, "")
+        with self._lock:
+            for path in [p for p in self.entries if p.startswith(prefix) and p not in live_paths]:
+                del self.entries[path]
+                self.dirty = True
+
+    def set_snapshot(self, sources_key: str, projects: List[Dict[str, Any]], last_scan: str):
+        """Remember the last full discovery result so it can be served after a restart"""
+        with self._lock:
+            self.snapshot = {"sources_key": sources_key, "projects": projects, "last_scan": last_scan}
+            self.dirty = True
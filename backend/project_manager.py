@@ -7,13 +7,27 @@ import os
 import json
 import asyncio
 import aiohttp
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
+import time
+from typing import Dict, List, Any, Optional, AsyncIterator, Tuple
 from datetime import datetime
 from pathlib import Path
 
+from project_index import ProjectIndex, project_fingerprint
+from project_search import ProjectSearchIndex
+from git_metadata import read_git_metadata
+from manifests import read_manifest, project_manifests, canonical_name
+from project_walker import walk_projects, source_walk_options, relative_name
+from remote_sources import ConditionalFetcher, RemoteSourceError
+
 logger = logging.getLogger(__name__)
 
+DATA_DIR = os.getenv("DIRK_DATA_DIR", os.path.expanduser("~/.dirk-brain"))
+
+# Seconds each source may take before discovery moves on without it (override per source with "timeout")
+SOURCE_TIMEOUTS = {"local": 60.0, "github": 20.0, "gitlab": 20.0, "remote": 15.0}
+
 class ProjectManager:
     """Manages project discovery from multiple sources"""
     
@@ -21,76 +35,247 @@ class ProjectManager:
         self.projects_cache = {}
         self.sources = []
         self.last_scan = None
+        self.last_scan_time = 0.0
+        self.last_scan_report: List[Dict[str, Any]] = []
+        self.index = ProjectIndex(os.path.join(DATA_DIR, "project_index.json"))
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.remote_fetcher = ConditionalFetcher(os.path.join(DATA_DIR, "http_cache"))
+        self.search = ProjectSearchIndex()
+        
+        # Serve the last known project list straight after a restart
+        snapshot = self.index.snapshot
+        if snapshot.get("projects"):
+            self.projects_cache = {p["id"]: p for p in snapshot["projects"]}
+            self.search.replace_all(self.projects_cache.values())
+            self.last_scan = snapshot.get("last_scan")
+            self._sources_key = snapshot.get("sources_key")
+        else:
+            self._sources_key = None
+    
+    @staticmethod
+    def sources_key(sources: List[Dict[str, Any]]) -> str:
+        """Stable hash of a source configuration (without storing credentials)"""
+        return hashlib.sha256(json.dumps(sources, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def is_refreshing(self) -> bool:
+        return self._refresh_task is not None and not self._refresh_task.done()
+    
+    async def get_projects(self, sources: List[Dict[str, Any]], max_age: float = 30.0) -> List[Dict[str, Any]]:
+        """Serve projects from the cache immediately, revalidating in the background when stale"""
+        if not self.projects_cache or self._sources_key != self.sources_key(sources):
+            return await self.discover_projects(sources)
+        
+        if time.time() - self.last_scan_time > max_age and not self.is_refreshing():
+            self._refresh_task = asyncio.create_task(self._background_refresh(sources))
+        
+        return self.get_all_projects()
+    
+    async def _background_refresh(self, sources: List[Dict[str, Any]]):
+        try:
+            await self.discover_projects(sources)
+        except Exception as e:
+            logger.error(f"Background project refresh failed: {e}")
         
     async def discover_projects(self, sources: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        """Discover projects from configured sources"""
+        """Discover projects from configured sources (concurrently, see iter_discovery)"""
+        async for _report, _projects in self.iter_discovery(sources):
+            pass
+        return self.get_all_projects()
+    
+    async def iter_discovery(self, sources: List[Dict[str, Any]] = None) -> AsyncIterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Query all enabled sources at once, yielding (report, projects) per source as it finishes.
+        The cache is updated once every source has reported.
+        """
         if sources:
             self.sources = sources
         
-        all_projects = []
+        enabled = [source for source in self.sources if source.get("enabled", True)]
+        tasks = [asyncio.create_task(self._discover_source(position, source))
+                 for position, source in enumerate(enabled)]
+        results: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]] = [None] * len(tasks)
         
-        for source in self.sources:
-            if not source.get("enabled", True):
-                continue
-            
-            source_type = source.get("type", "local")
-            
-            if source_type == "local":
-                projects = await self.discover_local_projects(source)
-                all_projects.extend(projects)
-            elif source_type == "github":
-                projects = await self.discover_github_projects(source)
-                all_projects.extend(projects)
-            elif source_type == "gitlab":
-                projects = await self.discover_gitlab_projects(source)
-                all_projects.extend(projects)
-            elif source_type == "remote":
-                projects = await self.discover_remote_projects(source)
-                all_projects.extend(projects)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                position, report, projects = await next_done
+                results[position] = (report, projects)
+                yield report, projects
+        finally:
+            # Consumer went away (e.g. a closed stream): don't leave sources running
+            for task in tasks:
+                task.cancel()
+        
+        # Keep source order so ids colliding across sources resolve the same way as before
+        all_projects = [project for _report, projects in results for project in projects]
+        self.last_scan_report = [report for report, _projects in results]
         
         # Update cache
         self.projects_cache = {p["id"]: p for p in all_projects}
+        await asyncio.to_thread(self.search.replace_all, list(self.projects_cache.values()))
         self.last_scan = datetime.now().isoformat()
+        self.last_scan_time = time.time()
+        self._sources_key = self.sources_key(self.sources)
+        
+        self.index.set_snapshot(self._sources_key, all_projects, self.last_scan)
+        await asyncio.to_thread(self.index.save)
+    
+    async def _discover_source(self, position: int, source: Dict[str, Any]) -> Tuple[int, Dict[str, Any], List[Dict[str, Any]]]:
+        """Run one source with its timeout; failures keep that source's last known projects"""
+        source_type = source.get("type", "local")
+        handlers = {
+            "local": self.discover_local_projects,
+            "github": self.discover_github_projects,
+            "gitlab": self.discover_gitlab_projects,
+            "remote": self.discover_remote_projects,
+        }
+        report = {
+            "name": source.get("name", source_type),
+            "type": source_type,
+            "status": "ok",
+            "count": 0,
+            "duration_ms": 0.0,
+            "error": None,
+            "stale": False
+        }
+        timeout = source.get("timeout") or SOURCE_TIMEOUTS.get(source_type, 30.0)
+        start = time.perf_counter()
+        projects: List[Dict[str, Any]] = []
         
-        return all_projects
+        try:
+            if source_type not in handlers:
+                raise ValueError(f"Unknown source type: {source_type}")
+            projects = await asyncio.wait_for(handlers[source_type](source), timeout)
+        except asyncio.TimeoutError:
+            report["status"] = "timeout"
+            report["error"] = f"No response within {timeout:g}s"
+        except Exception as e:
+            report["status"] = "error"
+            report["error"] = str(e) or type(e).__name__
+        
+        report["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        if report["status"] != "ok":
+            logger.error(f"{report['name']} discovery failed ({report['status']}): {report['error']}")
+            projects = self._previous_source_projects(source)
+            report["stale"] = bool(projects)
+        report["count"] = len(projects)
+        return position, report, projects
+    
+    def _previous_source_projects(self, source: Dict[str, Any]) -> List[Dict[str, Any]]:
+        source_type = source.get("type", "local")
+        previous = [p for p in self.projects_cache.values() if p.get("source_type") == source_type]
+        if source_type == "local":
+            previous = [p for p in previous if p.get("source") == source.get("name", "Local")]
+        elif source_type == "remote":
+            previous = [p for p in previous if p.get("source") == source.get("name", "Remote")]
+        elif source_type in ("github", "gitlab"):
+            # Every GitHub/GitLab source shares one label; the account (and GitLab host) tell them apart
+            previous = [p for p in previous if p.get("source_key") == self.source_key(source)]
+        return previous
+    
+    @staticmethod
+    def source_key(source: Dict[str, Any]) -> str:
+        """Account a GitHub/GitLab source lists, e.g. github:acme or gitlab:https://gitlab.com/jane"""
+        if source.get("type") == "github":
+            return f"github:{(source.get('organization') or source.get('username') or '').lower()}"
+        base_url = source.get("url", "https://gitlab.com").rstrip("/")
+        return f"gitlab:{base_url}/{source.get('username', '').lower()}"
     
     async def discover_local_projects(self, source: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Discover projects from local filesystem"""
-        path = os.path.expanduser(source.get("path", "~/projects"))
+        """Discover projects from local filesystem (in a worker thread)"""
+        return await asyncio.to_thread(self.scan_local_source, source)
+    
+    def scan_local_source(self, source: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Blocking scan of one local source directory"""
+        path = self.source_root(source)
         projects = []
         
         if not os.path.exists(path):
             logger.warning(f"Local path does not exist: {path}")
             return projects
         
-        try:
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                
-                # Skip hidden directories and non-directories
-                if item.startswith('.') or not os.path.isdir(item_path):
-                    continue
-                
-                # Detect project type
-                project_info = self.analyze_local_project(item_path)
-                
-                if project_info:
-                    projects.append({
-                        "id": item.lower().replace(" ", "_").replace("-", "_"),
-                        "name": item,
-                        "path": item_path,
-                        "source": source.get("name", "Local"),
-                        "source_type": "local",
-                        **project_info
-                    })
-            
-            logger.info(f"Discovered {len(projects)} local projects in {path}")
+        # Nested projects too (monorepo packages, grouping folders), within depth and visit limits
+        walk = walk_projects(path, **source_walk_options(source))
+        for item_path in walk.projects:
+            # Detect project type (reusing the index when nothing changed)
+            project_info = self.analyze_local_project_cached(item_path)
             
-        except Exception as e:
-            logger.error(f"Error discovering local projects: {e}")
+            if project_info:
+                projects.append(self.local_project_entry(item_path, source, project_info))
+        
+        # A truncated walk did not see everything; keep what it missed
+        if not walk.truncated:
+            self.index.prune(path, set(walk.projects))
+        logger.info(f"Discovered {len(projects)} local projects in {path} ({walk.visited} entries visited, "
+                    f"index reused {self.index.stats['reused']}, analyzed {self.index.stats['analyzed']} in total)")
         
         return projects
     
+    @staticmethod
+    def local_project_id(path: str, root: Optional[str] = None) -> str:
+        """Id from the path below the source root (just the directory name for top-level projects)"""
+        name = relative_name(root, path, "_") if root else os.path.basename(path)
+        return name.lower().replace(" ", "_").replace("-", "_")
+    
+    @staticmethod
+    def source_root(source: Dict[str, Any]) -> str:
+        return os.path.expanduser(source.get("path", "~/projects"))
+    
+    def local_project_entry(self, path: str, source: Dict[str, Any], project_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the cache entry for an analyzed local project"""
+        root = self.source_root(source)
+        return {
+            "id": self.local_project_id(path, root),
+            "name": os.path.basename(path),
+            "path": path,
+            "relative_path": os.path.relpath(path, root),
+            "source": source.get("name", "Local"),
+            "source_type": "local",
+            **project_info
+        }
+    
+    def update_local_project(self, path: str, source: Dict[str, Any]) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Re-analyze a single local project directory in place.
+        Returns (updated project, None), (None, removed project id) or (None, None) if nothing changed.
+        """
+        return self.apply_local_update(path, source, self.analyze_local_update(path, source))
+    
+    def analyze_local_update(self, path: str, source: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cache entry for a local directory, or None if it is no longer a project; reads only, safe in a thread"""
+        project_info = None
+        if os.path.isdir(path) and not os.path.basename(path).startswith('.'):
+            project_info = self.analyze_local_project_cached(path)
+        return self.local_project_entry(path, source, project_info) if project_info is not None else None
+    
+    def apply_local_update(self, path: str, source: Dict[str, Any],
+                           project: Optional[Dict[str, Any]]) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Store an analyze_local_update result in the cache and search index (on the event loop)"""
+        project_id = self.local_project_id(path, self.source_root(source))
+        current = self.projects_cache.get(project_id)
+        if project is None:
+            if current and current.get("path") == path:
+                del self.projects_cache[project_id]
+                self.search.remove(project_id)
+                return None, project_id
+            return None, None
+        
+        if current == project:
+            return None, None
+        self.projects_cache[project_id] = project
+        self.search.upsert(project)
+        return project, None
+    
+    def analyze_local_project_cached(self, path: str) -> Optional[Dict[str, Any]]:
+        """analyze_local_project, skipped when the project's fingerprint is unchanged"""
+        fingerprint = project_fingerprint(path)
+        hit, info = self.index.lookup(path, fingerprint)
+        if hit:
+            return info
+        
+        info = self.analyze_local_project(path)
+        self.index.store(path, fingerprint, info)
+        return info
+    
     def analyze_local_project(self, path: str) -> Optional[Dict[str, Any]]:
         """Analyze a local directory to determine if it's a project"""
         project_info = {
@@ -101,24 +286,13 @@ class ProjectManager:
             "last_modified": None
         }
         
-        # Check for version control
-        if os.path.exists(os.path.join(path, ".git")):
+        # Check for version control (read straight from .git, no git process)
+        git_info = read_git_metadata(path)
+        if git_info:
             project_info["has_git"] = True
             project_info["status"] = "active"
-            
-            # Try to get last commit date
-            try:
-                import subprocess
-                result = subprocess.run(
-                    ["git", "log", "-1", "--format=%ai"],
-                    cwd=path,
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode == 0:
-                    project_info["last_modified"] = result.stdout.strip()
-            except:
-                pass
+            project_info["last_modified"] = git_info.last_commit_date
+            project_info["git_branch"] = git_info.branch
         
         # Detect project type and technologies
         files = os.listdir(path)
@@ -129,55 +303,46 @@ class ProjectManager:
             project_info["technologies"].append("JavaScript")
             
             # Read package.json for more info
-            try:
-                with open(os.path.join(path, "package.json"), 'r') as f:
-                    pkg = json.load(f)
-                    
-                    # Detect frameworks
-                    deps = {**pkg.get("dependencies", {}), **pkg.get("devDependencies", {})}
-                    
-                    if "react" in deps:
-                        project_info["technologies"].append("React")
-                    if "next" in deps:
-                        project_info["technologies"].append("Next.js")
-                    if "vue" in deps:
-                        project_info["technologies"].append("Vue")
-                    if "angular" in deps:
-                        project_info["technologies"].append("Angular")
-                    if "express" in deps:
-                        project_info["technologies"].append("Express")
-                    if "fastify" in deps:
-                        project_info["technologies"].append("Fastify")
-                    
-                    project_info["description"] = pkg.get("description", "")
-                    project_info["version"] = pkg.get("version", "")
-                    
-            except Exception as e:
-                logger.debug(f"Could not read package.json: {e}")
+            pkg = read_manifest(os.path.join(path, "package.json"))
+            if pkg:
+                # Detect frameworks
+                deps = pkg.all_dependencies()
+                
+                if "react" in deps:
+                    project_info["technologies"].append("React")
+                if "next" in deps:
+                    project_info["technologies"].append("Next.js")
+                if "vue" in deps:
+                    project_info["technologies"].append("Vue")
+                if "angular" in deps:
+                    project_info["technologies"].append("Angular")
+                if "express" in deps:
+                    project_info["technologies"].append("Express")
+                if "fastify" in deps:
+                    project_info["technologies"].append("Fastify")
+                
+                project_info["description"] = pkg.description or ""
+                project_info["version"] = pkg.version or ""
         
         # Python project
         if "requirements.txt" in files or "setup.py" in files or "pyproject.toml" in files:
             project_info["type"] = "python"
             project_info["technologies"].append("Python")
             
-            # Check for specific frameworks
-            req_file = os.path.join(path, "requirements.txt")
-            if os.path.exists(req_file):
-                try:
-                    with open(req_file, 'r') as f:
-                        requirements = f.read().lower()
-                        
-                        if "django" in requirements:
-                            project_info["technologies"].append("Django")
-                        if "flask" in requirements:
-                            project_info["technologies"].append("Flask")
-                        if "fastapi" in requirements:
-                            project_info["technologies"].append("FastAPI")
-                        if "tensorflow" in requirements or "torch" in requirements:
-                            project_info["technologies"].append("ML/AI")
-                            
-                except:
-                    pass
+            # Check for specific frameworks (requirements.txt and pyproject.toml)
+            manifests = project_manifests(path, ["requirements.txt", "pyproject.toml"])
+            requirements = {canonical_name(name) for m in manifests for name in m.all_dependencies()}
+            
+            if "django" in requirements:
+                project_info["technologies"].append("Django")
+            if "flask" in requirements:
+                project_info["technologies"].append("Flask")
+            if "fastapi" in requirements:
+                project_info["technologies"].append("FastAPI")
+            if requirements & {"tensorflow", "tensorflow-cpu", "tensorflow-gpu", "torch"}:
+                project_info["technologies"].append("ML/AI")
+            
+            self._describe_from(project_info, manifests)
         
         # Go project
         if "go.mod" in files:
@@ -188,6 +353,7 @@ class ProjectManager:
         if "Cargo.toml" in files:
             project_info["type"] = "rust"
             project_info["technologies"].append("Rust")
+            self._describe_from(project_info, project_manifests(path, ["Cargo.toml"]))
         
         # Java project
         if "pom.xml" in files or "build.gradle" in files:
@@ -214,8 +380,17 @@ class ProjectManager:
         
         return None
     
+    @staticmethod
+    def _describe_from(project_info: Dict[str, Any], manifests: List[Any]):
+        """Fill description/version from the first manifest declaring them, unless package.json did"""
+        for manifest in manifests:
+            if manifest.description and not project_info.get("description"):
+                project_info["description"] = manifest.description
+            if manifest.version and not project_info.get("version"):
+                project_info["version"] = manifest.version
+    
     async def discover_github_projects(self, source: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Discover projects from GitHub"""
+        """Discover projects from GitHub (all pages, conditional requests)"""
         projects = []
         api_key = source.get("api_key", "")
         username = source.get("username", "")
@@ -232,52 +407,45 @@ class ProjectManager:
         if api_key:
             headers["Authorization"] = f"token {api_key}"
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                # Determine endpoint
-                if org:
-                    url = f"https://api.github.com/orgs/{org}/repos"
-                else:
-                    url = f"https://api.github.com/users/{username}/repos"
+        async with aiohttp.ClientSession() as session:
+            # Determine endpoint
+            if org:
+                url = f"https://api.github.com/orgs/{org}/repos"
+            else:
+                url = f"https://api.github.com/users/{username}/repos"
+            
+            repos = await self.remote_fetcher.fetch_all_pages(session, url, headers)
+            
+            for repo in repos:
+                # Extract technologies from language
+                technologies = []
+                if repo.get("language"):
+                    technologies.append(repo["language"])
                 
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        repos = await response.json()
-                        
-                        for repo in repos:
-                            # Extract technologies from language
-                            technologies = []
-                            if repo.get("language"):
-                                technologies.append(repo["language"])
-                            
-                            projects.append({
-                                "id": repo["name"].lower().replace("-", "_"),
-                                "name": repo["name"],
-                                "path": repo["clone_url"],
-                                "source": "GitHub",
-                                "source_type": "github",
-                                "status": "active" if not repo.get("archived") else "archived",
-                                "type": "github",
-                                "technologies": technologies,
-                                "description": repo.get("description", ""),
-                                "url": repo["html_url"],
-                                "stars": repo.get("stargazers_count", 0),
-                                "forks": repo.get("forks_count", 0),
-                                "last_modified": repo.get("updated_at"),
-                                "private": repo.get("private", False)
-                            })
-                        
-                        logger.info(f"Discovered {len(projects)} GitHub projects")
-                    else:
-                        logger.error(f"GitHub API error: {response.status}")
-                        
-        except Exception as e:
-            logger.error(f"Error discovering GitHub projects: {e}")
+                projects.append({
+                    "id": repo["name"].lower().replace("-", "_"),
+                    "name": repo["name"],
+                    "path": repo["clone_url"],
+                    "source": "GitHub",
+                    "source_type": "github",
+                    "source_key": self.source_key(source),
+                    "status": "active" if not repo.get("archived") else "archived",
+                    "type": "github",
+                    "technologies": technologies,
+                    "description": repo.get("description", ""),
+                    "url": repo["html_url"],
+                    "stars": repo.get("stargazers_count", 0),
+                    "forks": repo.get("forks_count", 0),
+                    "last_modified": repo.get("updated_at"),
+                    "private": repo.get("private", False)
+                })
+            
+            logger.info(f"Discovered {len(projects)} GitHub projects")
         
         return projects
     
     async def discover_gitlab_projects(self, source: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Discover projects from GitLab"""
+        """Discover projects from GitLab (all pages, conditional requests)"""
         projects = []
         api_key = source.get("api_key", "")
         base_url = source.get("url", "https://gitlab.com")
@@ -291,34 +459,27 @@ class ProjectManager:
         if api_key:
             headers["PRIVATE-TOKEN"] = api_key
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{base_url}/api/v4/users/{username}/projects"
-                
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        repos = await response.json()
-                        
-                        for repo in repos:
-                            projects.append({
-                                "id": repo["path"].lower().replace("-", "_"),
-                                "name": repo["name"],
-                                "path": repo["ssh_url_to_repo"],
-                                "source": "GitLab",
-                                "source_type": "gitlab",
-                                "status": "active",
-                                "type": "gitlab",
-                                "description": repo.get("description", ""),
-                                "url": repo["web_url"],
-                                "last_modified": repo.get("last_activity_at")
-                            })
-                        
-                        logger.info(f"Discovered {len(projects)} GitLab projects")
-                    else:
-                        logger.error(f"GitLab API error: {response.status}")
-                        
-        except Exception as e:
-            logger.error(f"Error discovering GitLab projects: {e}")
+        async with aiohttp.ClientSession() as session:
+            url = f"{base_url}/api/v4/users/{username}/projects"
+            
+            repos = await self.remote_fetcher.fetch_all_pages(session, url, headers)
+            
+            for repo in repos:
+                projects.append({
+                    "id": repo["path"].lower().replace("-", "_"),
+                    "name": repo["name"],
+                    "path": repo["ssh_url_to_repo"],
+                    "source": "GitLab",
+                    "source_type": "gitlab",
+                    "source_key": self.source_key(source),
+                    "status": "active",
+                    "type": "gitlab",
+                    "description": repo.get("description", ""),
+                    "url": repo["web_url"],
+                    "last_modified": repo.get("last_activity_at")
+                })
+            
+            logger.info(f"Discovered {len(projects)} GitLab projects")
         
         return projects
     
@@ -336,33 +497,29 @@ class ProjectManager:
         if api_key:
             headers["Authorization"] = f"Bearer {api_key}"
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        # Assume the API returns a list of projects
-                        if isinstance(data, list):
-                            projects = data
-                        elif isinstance(data, dict) and "projects" in data:
-                            projects = data["projects"]
-                        
-                        # Normalize project data
-                        for i, project in enumerate(projects):
-                            if "id" not in project:
-                                project["id"] = f"remote_project_{i}"
-                            if "source_type" not in project:
-                                project["source_type"] = "remote"
-                            if "source" not in project:
-                                project["source"] = source.get("name", "Remote")
-                        
-                        logger.info(f"Discovered {len(projects)} remote projects")
-                    else:
-                        logger.error(f"Remote API error: {response.status}")
-                        
-        except Exception as e:
-            logger.error(f"Error discovering remote projects: {e}")
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    
+                    # Assume the API returns a list of projects
+                    if isinstance(data, list):
+                        projects = data
+                    elif isinstance(data, dict) and "projects" in data:
+                        projects = data["projects"]
+                    
+                    # Normalize project data
+                    for i, project in enumerate(projects):
+                        if "id" not in project:
+                            project["id"] = f"remote_project_{i}"
+                        if "source_type" not in project:
+                            project["source_type"] = "remote"
+                        if "source" not in project:
+                            project["source"] = source.get("name", "Remote")
+                    
+                    logger.info(f"Discovered {len(projects)} remote projects")
+                else:
+                    raise RemoteSourceError(f"Remote API error: {response.status}", response.status)
         
         return projects
     
@@ -388,9 +545,11 @@ class ProjectManager:
             path = project.get("path")
             if path and os.path.exists(path):
                 updated_info = self.analyze_local_project(path)
+                self.index.store(path, project_fingerprint(path), updated_info)
                 if updated_info:
                     project.update(updated_info)
                     project["last_refreshed"] = datetime.now().isoformat()
+                    self.search.upsert(project)
         
         return project
     
@@ -443,6 +602,7 @@ class ProjectManager:
         
         # Add to cache
         self.projects_cache[project_id] = project
+        self.search.upsert(project)
         
         return project
 
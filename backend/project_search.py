@@ -0,0 +1,238 @@
+"""
+Project Search Index
+In-memory faceted search over the project cache: inverted facet indexes, prefix/trigram text search
+over the name and description vocabulary, and pagination ordered by last_modified
+"""
+
+import re
+import bisect
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Set, Iterable, Tuple
+
+FACETS = ("technologies", "type", "source", "status")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def parse_timestamp(value: Any) -> float:
+    """Epoch seconds for the last_modified formats sources produce (git %ai, ISO 8601); -inf if unknown"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value or not isinstance(value, str):
+        return float("-inf")
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S %z").timestamp()
+    except ValueError:
+        return float("-inf")
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ProjectSearchIndex:
+    """Incrementally maintained search index keyed by project id"""
+
+    def __init__(self):
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        # Indexed view of each project, kept so stale postings can be removed after in-place edits
+        self._fields: Dict[str, Tuple[Dict[str, List[str]], frozenset, Tuple[float, str]]] = {}
+        self.facets: Dict[str, Dict[str, Set[str]]] = {facet: {} for facet in FACETS}
+        self.labels: Dict[str, Dict[str, str]] = {facet: {} for facet in FACETS}
+        # Text: word -> project ids, and trigram -> words (the vocabulary is far smaller than the corpus)
+        self.word_postings: Dict[str, Set[str]] = {}
+        self.trigram_words: Dict[str, Set[str]] = {}
+        self._sorted_words: Optional[List[str]] = None
+        self._order: List[Tuple[float, str]] = []  # ascending (timestamp, id)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.projects)
+
+    # Updates
+
+    @staticmethod
+    def _facet_values(project: Dict[str, Any]) -> Dict[str, List[str]]:
+        values = {}
+        for facet in FACETS:
+            raw = project.get(facet)
+            if raw is None:
+                raw = []
+            elif not isinstance(raw, (list, tuple, set)):
+                raw = [raw]
+            values[facet] = sorted({str(v) for v in raw if v not in (None, "")})
+        return values
+
+    def upsert(self, project: Dict[str, Any]):
+        """Index a new project or re-index a changed one"""
+        with self._lock:
+            self._upsert(project)
+
+    def remove(self, project_id: str):
+        with self._lock:
+            self._remove(project_id)
+
+    def replace_all(self, projects: Iterable[Dict[str, Any]]):
+        """Sync with a full project list, touching only entries that changed"""
+        with self._lock:
+            incoming = {p["id"]: p for p in projects}
+            for project_id in [pid for pid in self.projects if pid not in incoming]:
+                self._remove(project_id)
+            for project_id, project in incoming.items():
+                if self._fields.get(project_id) != self._index_fields(project):
+                    self._upsert(project)
+                else:
+                    self.projects[project_id] = project
+
+    def _index_fields(self, project: Dict[str, Any]):
+        text = " ".join(str(project.get(key) or "") for key in ("name", "description")).lower()
+        words = frozenset(WORD_PATTERN.findall(text))
+        return self._facet_values(project), words, (parse_timestamp(project.get("last_modified")), project["id"])
+
+    def _upsert(self, project: Dict[str, Any]):
+        project_id = project["id"]
+        if project_id in self.projects:
+            self._remove(project_id)
+        fields = self._index_fields(project)
+        facet_values, words, order_key = fields
+        self.projects[project_id] = project
+        self._fields[project_id] = fields
+
+        for facet, values in facet_values.items():
+            for value in values:
+                key = value.lower()
+                self.facets[facet].setdefault(key, set()).add(project_id)
+                self.labels[facet].setdefault(key, value)
+        for word in words:
+            if word not in self.word_postings:
+                self.word_postings[word] = set()
+                for gram in trigrams(word):
+                    self.trigram_words.setdefault(gram, set()).add(word)
+                self._sorted_words = None
+            self.word_postings[word].add(project_id)
+        bisect.insort(self._order, order_key)
+
+    def _remove(self, project_id: str):
+        fields = self._fields.pop(project_id, None)
+        self.projects.pop(project_id, None)
+        if fields is None:
+            return
+        facet_values, words, order_key = fields
+
+        for facet, values in facet_values.items():
+            for value in values:
+                key = value.lower()
+                ids = self.facets[facet].get(key)
+                if ids is not None:
+                    ids.discard(project_id)
+                    if not ids:
+                        del self.facets[facet][key]
+                        self.labels[facet].pop(key, None)
+        for word in words:
+            ids = self.word_postings.get(word)
+            if ids is not None:
+                ids.discard(project_id)
+                if not ids:
+                    del self.word_postings[word]
+                    for gram in trigrams(word):
+                        grams = self.trigram_words.get(gram)
+                        if grams is not None:
+                            grams.discard(word)
+                            if not grams:
+                                del self.trigram_words[gram]
+                    self._sorted_words = None
+        position = bisect.bisect_left(self._order, order_key)
+        if position < len(self._order) and self._order[position] == order_key:
+            del self._order[position]
+
+    # Queries
+
+    def _matching_words(self, term: str) -> List[str]:
+        """Vocabulary words containing term (trigrams), or starting with it for terms under 3 chars"""
+        if len(term) >= 3:
+            grams = sorted(trigrams(term), key=lambda g: len(self.trigram_words.get(g, ())))
+            candidates = set(self.trigram_words.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= self.trigram_words.get(gram, set())
+            # Trigrams can match out of order; confirm the substring
+            return [word for word in candidates if term in word]
+
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self.word_postings)
+        words = []
+        position = bisect.bisect_left(self._sorted_words, term)
+        while position < len(self._sorted_words) and self._sorted_words[position].startswith(term):
+            words.append(self._sorted_words[position])
+            position += 1
+        return words
+
+    def _match_term(self, term: str) -> Set[str]:
+        words = self._matching_words(term)
+        if len(words) == 1:
+            return self.word_postings[words[0]]
+        return set().union(*(self.word_postings[word] for word in words))
+
+    def search(self, query: str = "", filters: Optional[Dict[str, List[str]]] = None,
+               offset: int = 0, limit: int = 50, descending: bool = True) -> Dict[str, Any]:
+        """
+        Filter by facets (any of the values within a facet, all facets together) and text terms
+        (all must match), returning one page ordered by last_modified plus facet counts.
+        """
+        with self._lock:
+            matched: Optional[Set[str]] = None  # None means every project
+
+            for facet, values in (filters or {}).items():
+                if facet not in self.facets or not values:
+                    continue
+                ids: Set[str] = set()
+                for value in values:
+                    ids |= self.facets[facet].get(value.lower(), set())
+                matched = ids if matched is None else matched & ids
+
+            for term in WORD_PATTERN.findall(query.lower()):
+                if matched is not None and not matched:
+                    break
+                ids = self._match_term(term)
+                matched = ids if matched is None else matched & ids
+
+            wanted = offset + limit
+            if matched is None:
+                total = len(self._order)
+                window = self._order[-wanted:][::-1] if descending else self._order[:wanted]
+                page = [project_id for _, project_id in window]
+            elif len(matched) * 8 < len(self._order):
+                # Few hits: sorting them beats walking the global order
+                total = len(matched)
+                keys = sorted((self._fields[pid][2] for pid in matched), reverse=descending)
+                page = [project_id for _, project_id in keys[:wanted]]
+            else:
+                total = len(matched)
+                page = []
+                for _, project_id in (reversed(self._order) if descending else self._order):
+                    if project_id in matched:
+                        page.append(project_id)
+                        if len(page) == wanted:
+                            break
+
+            facet_counts = {}
+            for facet, postings in self.facets.items():
+                counts = {}
+                for key, ids in postings.items():
+                    count = len(ids) if matched is None else len(ids & matched)
+                    if count:
+                        counts[self.labels[facet][key]] = count
+                facet_counts[facet] = counts
+
+            return {
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+                "projects": [self.projects[pid] for pid in page[offset:]],
+                "facets": facet_counts
+            }
@@ -0,0 +1,137 @@
+"""
+Recursive Project Walker
+Bounded-depth scandir traversal of a source root that finds nested projects (monorepo packages,
+grouping folders) without descending into dependency or build directories
+"""
+
+import os
+import fnmatch
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Iterable
+
+from manifests import read_manifest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_DEPTH = int(os.getenv("PROJECT_SCAN_MAX_DEPTH", "3"))
+# Directory entries one walk may look at before giving up (guards against roots like ~)
+DEFAULT_VISIT_BUDGET = int(os.getenv("PROJECT_SCAN_VISIT_BUDGET", "50000"))
+
+DEFAULT_IGNORE = [
+    ".*", "node_modules", "bower_components", "venv", "env", "__pycache__",
+    "target", "dist", "build", "out", "vendor", "Pods", "site-packages"
+]
+
+# Any of these makes a directory a project root
+PROJECT_MARKERS = {
+    ".git", "package.json", "requirements.txt", "setup.py", "pyproject.toml", "Pipfile",
+    "go.mod", "Cargo.toml", "pom.xml", "build.gradle", "build.gradle.kts"
+}
+
+# Files that declare a monorepo whose members should be discovered individually
+WORKSPACE_MARKERS = {"pnpm-workspace.yaml", "lerna.json", "nx.json", "turbo.json", "rush.json", "go.work"}
+
+
+@dataclass
+class WalkResult:
+    root: str
+    projects: List[str] = field(default_factory=list)
+    containers: List[str] = field(default_factory=list)  # non-project directories that were descended into
+    visited: int = 0
+    truncated: bool = False
+
+
+def is_ignored(name: str, ignore: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in ignore)
+
+
+def is_workspace_root(path: str, names: Iterable[str]) -> bool:
+    """Monorepo roots: workspace marker files, or package.json/Cargo.toml/pyproject.toml listing members"""
+    names = set(names)
+    if names & WORKSPACE_MARKERS:
+        return True
+    for manifest_name in ("package.json", "Cargo.toml", "pyproject.toml"):
+        if manifest_name in names:
+            manifest = read_manifest(os.path.join(path, manifest_name))
+            if manifest and manifest.workspaces:
+                return True
+    return False
+
+
+def walk_projects(root: str, max_depth: Optional[int] = None, ignore: Optional[List[str]] = None,
+                  visit_budget: Optional[int] = None) -> WalkResult:
+    """
+    Find project directories under root (depth 1 = its children).
+    Project roots are not descended into unless they are workspace (monorepo) roots.
+    """
+    max_depth = max_depth or DEFAULT_MAX_DEPTH
+    ignore = DEFAULT_IGNORE if ignore is None else ignore
+    visit_budget = visit_budget or DEFAULT_VISIT_BUDGET
+    result = WalkResult(root=root)
+    seen = set()
+
+    # Depth-first with an explicit stack; children pushed in reverse so output is sorted
+    stack = [(root, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                children = []
+                names = []
+                for entry in entries:
+                    result.visited += 1
+                    if result.visited > visit_budget:
+                        result.truncated = True
+                        break
+                    names.append(entry.name)
+                    if depth < max_depth and not is_ignored(entry.name, ignore):
+                        try:
+                            if entry.is_dir():
+                                children.append(entry)
+                        except OSError:
+                            continue
+        except OSError as e:
+            logger.debug(f"Cannot scan {directory}: {e}")
+            continue
+
+        if result.truncated:
+            logger.warning(f"Project walk of {root} stopped after {visit_budget} entries; "
+                           f"narrow the source path or raise PROJECT_SCAN_VISIT_BUDGET")
+            break
+
+        if depth > 0:
+            if PROJECT_MARKERS.intersection(names):
+                result.projects.append(directory)
+                if not is_workspace_root(directory, names):
+                    continue
+            else:
+                result.containers.append(directory)
+
+        for entry in sorted(children, key=lambda e: e.name, reverse=True):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            # Symlinked directories can form cycles
+            if (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            stack.append((entry.path, depth + 1))
+
+    result.projects.sort()
+    return result
+
+
+def source_walk_options(source: Dict[str, Any]) -> Dict[str, Any]:
+    """walk_projects keyword arguments from a local source config (snake_case or settings camelCase)"""
+    return {
+        "max_depth": source.get("max_depth") or source.get("maxDepth"),
+        "ignore": source.get("ignore"),
+        "visit_budget": source.get("visit_budget") or source.get("visitBudget")
+    }
+
+
+def relative_name(root: str, path: str, separator: str = "-") -> str:
+    """Name of a project relative to its source root; plain directory name for direct children"""
+    return os.path.relpath(path, root).replace(os.sep, separator)
@@ -0,0 +1,401 @@
+"""
+Project Filesystem Watcher
+Pushes live project updates from inotify events (polling fallback off Linux)
+"""
+
+import os
+import sys
+import ctypes
+import ctypes.util
+import struct
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Set
+
+from project_index import project_fingerprint
+from project_walker import (walk_projects, source_walk_options, is_ignored, PROJECT_MARKERS,
+                            DEFAULT_MAX_DEPTH, DEFAULT_IGNORE)
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+PROJECT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ATTRIB | IN_ONLYDIR
+# Git updates HEAD and refs via lock file + rename
+GIT_MASK = IN_MOVED_TO | IN_CREATE | IN_CLOSE_WRITE | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal ctypes binding for Linux inotify"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[tuple[int, int, str]]:
+        """Drain pending events as (wd, mask, name)"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                events.append((wd, mask, name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ProjectWatcher:
+    """Watches local project sources and applies debounced per-project updates"""
+
+    def __init__(self, project_manager, ws_manager, debounce: float = 0.25, poll_interval: float = 2.0):
+        self.project_manager = project_manager
+        self.ws_manager = ws_manager
+        self.project_discovery = None
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        self.sources: Dict[str, Dict[str, Any]] = {}  # root path -> source config
+        self.inotify: Optional[Inotify] = None
+        self.watches: Dict[int, tuple[str, str]] = {}  # wd -> (kind, path)
+        self.watched_paths: Dict[str, List[int]] = {}  # project/root path -> wds
+        self.containers: Set[str] = set()  # grouping directories below a root, watched like the root
+        self.pending: Set[str] = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._poll_state: Dict[str, Any] = {}
+        self.stats = {"events": 0, "flushes": 0, "updated": 0, "removed": 0}
+
+    def start(self, sources: List[Dict[str, Any]], project_discovery=None):
+        """(Re)start watching the enabled local sources"""
+        self.stop()
+        self.project_discovery = project_discovery
+        self.sources = {}
+        for source in sources:
+            if source.get("type", "local") == "local" and source.get("enabled", True):
+                root = os.path.expanduser(source.get("path", "~/projects"))
+                if os.path.isdir(root):
+                    self.sources[root] = source
+        if not self.sources:
+            return
+
+        if sys.platform.startswith("linux"):
+            try:
+                self.inotify = Inotify()
+                for root in self.sources:
+                    self._watch_root(root)
+                asyncio.get_running_loop().add_reader(self.inotify.fd, self._on_readable)
+                logger.info(f"Watching {len(self.sources)} project sources with inotify ({len(self.watches)} watches)")
+                return
+            except OSError as e:
+                logger.warning(f"inotify unavailable, falling back to polling: {e}")
+                self._close_inotify()
+
+        self._poll_task = asyncio.create_task(self._poll_loop())
+
+    def stop(self) -> List[asyncio.Task]:
+        """Stop watching; returns the cancelled flush/poll tasks for callers that want to await them"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        cancelled = []
+        for task in (self._flush_task, self._poll_task):
+            if task and not task.done():
+                task.cancel()
+                cancelled.append(task)
+        self._flush_task = None
+        self._poll_task = None
+        self._close_inotify()
+        return cancelled
+
+    async def close(self):
+        """Stop watching and wait for an in-flight flush or poll to unwind"""
+        await asyncio.gather(*self.stop(), return_exceptions=True)
+
+    def _close_inotify(self):
+        if self.inotify:
+            try:
+                asyncio.get_running_loop().remove_reader(self.inotify.fd)
+            except (RuntimeError, ValueError):
+                pass
+            self.inotify.close()
+            self.inotify = None
+        self.watches.clear()
+        self.watched_paths.clear()
+        self.containers.clear()
+
+    # inotify
+
+    def _add(self, kind: str, path: str, owner: str, mask: int):
+        try:
+            wd = self.inotify.add_watch(path, mask)
+        except OSError:
+            return
+        self.watches[wd] = (kind, owner)
+        self.watched_paths.setdefault(owner, []).append(wd)
+
+    def _watch_root(self, root: str):
+        # Directories between the root and nested projects are watched like the root itself
+        walk = self._walk(root)
+        self._add("root", root, root, ROOT_MASK)
+        for directory in walk.containers:
+            self._watch_container(directory)
+        for path in walk.projects:
+            self._watch_project(path)
+
+    def _watch_container(self, path: str):
+        if path in self.watched_paths:
+            return
+        self._add("root", path, path, ROOT_MASK)
+        self.containers.add(path)
+
+    def _watch_project(self, path: str):
+        if path in self.watched_paths:
+            return
+        self._add("project", path, path, PROJECT_MASK)
+        git_dir = os.path.join(path, ".git")
+        if os.path.isdir(git_dir):
+            self._add("git", git_dir, path, GIT_MASK)
+            self._add("git", os.path.join(git_dir, "refs", "heads"), path, GIT_MASK)
+
+    def _unwatch_project(self, path: str):
+        self.containers.discard(path)
+        for wd in self.watched_paths.pop(path, []):
+            self.watches.pop(wd, None)
+            self.inotify.rm_watch(wd)
+
+    def _on_readable(self):
+        for wd, mask, name in self.inotify.read_events():
+            self.stats["events"] += 1
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; recheck every project under every root
+                for root in self.sources:
+                    self.pending.update(self._walk(root).projects)
+                continue
+            if mask & IN_IGNORED or wd not in self.watches:
+                self.watches.pop(wd, None)
+                continue
+
+            kind, owner = self.watches[wd]
+            if kind == "root":
+                if name and not name.startswith('.'):
+                    self.pending.add(os.path.join(owner, name))
+                if name in PROJECT_MARKERS and owner in self.containers:
+                    # A grouping directory turning into a project (e.g. `npm init` in a new folder)
+                    self.pending.add(owner)
+            elif kind == "project" and name == ".git" and mask & (IN_CREATE | IN_MOVED_TO):
+                # `git init` / clone finishing: start following its refs too
+                self._unwatch_project(owner)
+                self._watch_project(owner)
+                self.pending.add(owner)
+            else:
+                self.pending.add(owner)
+
+        self._schedule_flush()
+
+    # Polling fallback
+
+    async def _poll_loop(self):
+        self._poll_state = await asyncio.to_thread(self._poll_scan)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            state = await asyncio.to_thread(self._poll_scan)
+            self.pending.update(
+                path for path in state.keys() | self._poll_state.keys()
+                if state.get(path) != self._poll_state.get(path)
+            )
+            self._poll_state = state
+            if self.pending:
+                await self.flush()
+
+    def _poll_scan(self) -> Dict[str, Any]:
+        return {path: project_fingerprint(path) for root in self.sources for path in self._walk(root).projects}
+
+    def _walk(self, root: str):
+        return walk_projects(root, **source_walk_options(self.sources[root]))
+
+    def _root_for(self, path: str) -> Optional[str]:
+        """The (deepest) watched root containing path"""
+        roots = [root for root in self.sources if path.startswith(os.path.join(root, ""))]
+        return max(roots, key=len) if roots else None
+
+    def _source_for(self, path: str) -> Optional[Dict[str, Any]]:
+        """Config of the (deepest) watched root containing path"""
+        root = self._root_for(path)
+        return self.sources[root] if root else None
+
+    @staticmethod
+    def _is_project(path: str) -> bool:
+        try:
+            return bool(PROJECT_MARKERS.intersection(os.listdir(path)))
+        except OSError:
+            return False
+
+    def _walk_new_containers(self, paths: Set[str]) -> Dict[str, Any]:
+        """Walks of newly seen directories that are not projects but may hold some, within the depth limit"""
+        walks = {}
+        for path in paths:
+            root = self._root_for(path)
+            if root is None or path in self.watched_paths or not os.path.isdir(path) or self._is_project(path):
+                continue
+            options = source_walk_options(self.sources[root])
+            ignore = DEFAULT_IGNORE if options["ignore"] is None else options["ignore"]
+            remaining = (options["max_depth"] or DEFAULT_MAX_DEPTH) - (os.path.relpath(path, root).count(os.sep) + 1)
+            if remaining < 1 or is_ignored(os.path.basename(path), ignore):
+                continue
+            walks[path] = walk_projects(path, **{**options, "max_depth": remaining})
+        return walks
+
+    # Debounced updates
+
+    def _schedule_flush(self):
+        # Fire `debounce` seconds after the first event of a burst, so latency stays bounded
+        if self.pending and self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.debounce, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        # One flush at a time; paths touched while it runs go in the next round
+        while self.pending:
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Project watcher flush failed")
+
+    async def flush(self):
+        """Re-analyze the projects touched since the last flush and push a delta"""
+        paths, self.pending = self.pending, set()
+        if not paths:
+            return
+        self.stats["flushes"] += 1
+
+        if self.inotify:
+            # Projects below a deleted directory go with it
+            for path in [p for p in paths if not os.path.isdir(p)]:
+                paths.update(p for p in self.watched_paths if p.startswith(os.path.join(path, "")))
+            # New grouping directories are followed like the containers found at startup
+            walks = await asyncio.to_thread(self._walk_new_containers, paths)
+            for container, walk in walks.items():
+                for directory in [container, *walk.containers]:
+                    self._watch_container(directory)
+                paths.update(walk.projects)
+
+        analyzed = await asyncio.to_thread(self._analyze, paths)
+        updated, removed = self._apply(analyzed)
+        if updated or removed:
+            await asyncio.to_thread(self.project_manager.index.save)
+        if self.inotify:
+            for path in paths:
+                if not os.path.isdir(path):
+                    self._unwatch_project(path)
+                    continue
+                if path in self.containers:
+                    if not self._is_project(path):
+                        continue
+                    self._unwatch_project(path)
+                self._watch_project(path)
+
+        if updated or removed:
+            self.stats["updated"] += len(updated)
+            self.stats["removed"] += len(removed)
+            await self.ws_manager.broadcast({
+                "type": "projects_delta",
+                "updated": updated,
+                "removed": removed,
+                "timestamp": datetime.now().isoformat()
+            })
+
+    def _analyze(self, paths: Set[str]) -> List[tuple]:
+        """Filesystem side of a flush (runs in a thread): re-analyze each path without touching the caches"""
+        analyzed = []
+        for path in paths:
+            source = self._source_for(path)
+            if source is None:
+                continue
+            project = self.project_manager.analyze_local_update(path, source)
+            rescanned = None
+            if self.project_discovery:
+                try:
+                    rescanned = self.project_discovery.rescan_project(path)
+                except Exception as e:
+                    logger.debug(f"Project discovery rescan failed for {path}: {e}")
+            analyzed.append((path, source, project, rescanned))
+        return analyzed
+
+    def _apply(self, analyzed: List[tuple]) -> tuple[List[Dict[str, Any]], List[str]]:
+        """Store analyzed paths in the project caches, on the event loop like every other cache update"""
+        updated, removed = [], []
+        for path, source, project, rescanned in analyzed:
+            project, removed_id = self.project_manager.apply_local_update(path, source, project)
+            if project:
+                updated.append(project)
+            if removed_id:
+                removed.append(removed_id)
+
+            if rescanned is not None and self.project_discovery:
+                try:
+                    self.project_discovery.apply_project_update(path, rescanned)
+                except Exception as e:
+                    logger.debug(f"Project discovery update failed for {path}: {e}")
+        return updated, removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "mode": "inotify" if self.inotify else ("polling" if self._poll_task else "stopped"),
+            "sources": list(self.sources),
+            "watches": len(self.watches),
+        }
+
+
+# Global project watcher instance
+from project_manager import project_manager
+from websocket_manager import ws_manager
+
+project_watcher = ProjectWatcher(project_manager, ws_manager)
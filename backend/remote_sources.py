@@ -0,0 +1,180 @@
+"""
+Remote Source Fetching for Project Discovery
+Paginated, conditional (ETag) JSON fetching with on-disk caching and rate-limit awareness
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlencode, urlsplit, parse_qs
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+LINK_PATTERN = re.compile(r'<([^>]+)>;\s*rel="([^"]+)"')
+
+
+class RemoteSourceError(Exception):
+    """A remote API request failed or was refused"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_link_header(value: Optional[str]) -> Dict[str, str]:
+    """{'next': url, 'last': url, ...} from an RFC 8288 Link header"""
+    return {rel: url for url, rel in LINK_PATTERN.findall(value or "")}
+
+
+def page_of(url: str) -> Optional[int]:
+    pages = parse_qs(urlsplit(url).query).get("page")
+    return int(pages[0]) if pages else None
+
+
+class ConditionalFetcher:
+    """GETs JSON with If-None-Match, caching bodies and ETags on disk"""
+
+    def __init__(self, cache_dir: str, max_concurrency: int = 8):
+        self.cache_dir = cache_dir
+        self.max_concurrency = max_concurrency
+        # host -> (remaining, reset epoch seconds)
+        self.rate_limits: Dict[str, Tuple[int, float]] = {}
+        self.stats = {"requests": 0, "not_modified": 0, "served_from_cache": 0}
+
+    def _cache_path(self, url: str, headers: Dict[str, str]) -> str:
+        # Credentials change what an API returns, so they are part of the key (hashed)
+        auth = headers.get("Authorization") or headers.get("PRIVATE-TOKEN") or ""
+        key = hashlib.sha256(f"{url}\n{auth}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, path: str, entry: Dict[str, Any]):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Could not cache {path}: {e}")
+
+    def _update_rate_limit(self, host: str, headers) -> None:
+        remaining = headers.get("X-RateLimit-Remaining") or headers.get("RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            try:
+                self.rate_limits[host] = (int(remaining), float(reset))
+            except ValueError:
+                pass
+
+    def rate_limited_until(self, host: str) -> Optional[float]:
+        """Epoch time the host's rate limit resets, if it is currently exhausted"""
+        remaining, reset = self.rate_limits.get(host, (1, 0.0))
+        if remaining <= 0 and reset > time.time():
+            return reset
+        return None
+
+    async def get_json(self, session: aiohttp.ClientSession, url: str,
+                       headers: Dict[str, str]) -> Tuple[Any, Dict[str, str]]:
+        """(body, selected response headers); unchanged resources are answered from cache via 304"""
+        host = urlsplit(url).netloc
+        cache_path = self._cache_path(url, headers)
+        cached = await asyncio.to_thread(self._load, cache_path)
+
+        if self.rate_limited_until(host):
+            if cached:
+                self.stats["served_from_cache"] += 1
+                return cached["body"], cached["headers"]
+            raise RemoteSourceError(f"Rate limit exhausted for {host}", 403)
+
+        request_headers = dict(headers)
+        if cached and cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+
+        self.stats["requests"] += 1
+        async with session.get(url, headers=request_headers) as response:
+            self._update_rate_limit(host, response.headers)
+
+            if response.status == 304 and cached:
+                self.stats["not_modified"] += 1
+                return cached["body"], cached["headers"]
+
+            if response.status != 200:
+                if cached and response.status in (403, 429):
+                    # Rate limited: stale data beats none
+                    self.stats["served_from_cache"] += 1
+                    return cached["body"], cached["headers"]
+                raise RemoteSourceError(f"{url} returned {response.status}", response.status)
+
+            body = await response.json()
+            kept_headers = {
+                name: response.headers[name]
+                for name in ("Link", "X-Total-Pages")
+                if name in response.headers
+            }
+            if response.headers.get("ETag"):
+                await asyncio.to_thread(self._store, cache_path, {
+                    "etag": response.headers["ETag"],
+                    "headers": kept_headers,
+                    "body": body
+                })
+            return body, kept_headers
+
+    async def fetch_all_pages(self, session: aiohttp.ClientSession, url: str,
+                              headers: Dict[str, str], per_page: int = 100) -> List[Any]:
+        """Fetch every page of a list endpoint, concurrently once the page count is known"""
+        def page_url(page: int) -> str:
+            separator = "&" if "?" in url else "?"
+            return f"{url}{separator}{urlencode({'per_page': per_page, 'page': page})}"
+
+        first, first_headers = await self.get_json(session, page_url(1), headers)
+        items = list(first)
+
+        links = parse_link_header(first_headers.get("Link"))
+        last_page = None
+        if first_headers.get("X-Total-Pages"):
+            last_page = int(first_headers["X-Total-Pages"])
+        elif "last" in links:
+            last_page = page_of(links["last"])
+
+        if last_page and last_page > 1:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def fetch(page: int) -> List[Any]:
+                async with semaphore:
+                    body, _ = await self.get_json(session, page_url(page), headers)
+                    return body
+
+            for page in await asyncio.gather(*(fetch(p) for p in range(2, last_page + 1))):
+                items.extend(page)
+        else:
+            # No page count advertised: follow rel="next" links one by one
+            next_url = links.get("next")
+            while next_url:
+                body, page_headers = await self.get_json(session, next_url, headers)
+                items.extend(body)
+                next_url = parse_link_header(page_headers.get("Link")).get("next")
+
+        return items
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "rate_limits": {
+                host: {"remaining": remaining, "reset": reset}
+                for host, (remaining, reset) in self.rate_limits.items()
+            }
+        }
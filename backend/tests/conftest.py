@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Backend modules import each other by bare name (the server runs from backend/)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, "agents")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Module-level singletons (project index, caches) must not touch the real ~/.dirk-brain
+os.environ.setdefault("DIRK_DATA_DIR", tempfile.mkdtemp(prefix="dirk-tests-"))
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pytest
+import pytest_asyncio
+
+from event_backplane import InProcessBackplane, UnixSocketBackplane, RedisBackplane, create_backplane
+
+WORKERS = 4
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def socket_path():
+    # Not pytest's tmp_path: Unix socket paths are limited to ~100 bytes
+    directory = tempfile.mkdtemp(prefix="bp-")
+    yield os.path.join(directory, "events.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest_asyncio.fixture
+async def planes(socket_path):
+    """WORKERS backplanes sharing one socket; one of them wins the lock and runs the broker"""
+    planes = [UnixSocketBackplane(socket_path) for _ in range(WORKERS)]
+    for plane in planes:
+        plane.received = []
+        await plane.start(lambda topic, data, plane=plane: plane.received.append((topic, data)))
+        await asyncio.wait_for(plane.connected.wait(), 5)
+    yield planes
+    for plane in planes:
+        await plane.stop()
+
+
+@pytest.mark.asyncio
+async def test_exactly_one_broker(planes):
+    assert sum(plane.broker is not None for plane in planes) == 1
+
+
+@pytest.mark.asyncio
+async def test_fan_out_reaches_every_other_worker(planes):
+    events = 2000
+    for n in range(events):
+        planes[n % WORKERS].forward("metrics", json.dumps({"type": "metrics_update", "n": n}))
+
+    expected = events - events // WORKERS  # everyone else's events, never its own
+    await wait_until(lambda: all(len(plane.received) >= expected for plane in planes))
+    await asyncio.sleep(0.05)
+
+    for i, plane in enumerate(planes):
+        assert len(plane.received) == expected
+        numbers = sorted(data["n"] for _, data in plane.received)
+        assert numbers == [n for n in range(events) if n % WORKERS != i]
+        assert all(topic == "metrics" for topic, _ in plane.received)
+    assert all(plane.stats["dropped"] == 0 for plane in planes)
+
+
+@pytest.mark.asyncio
+async def test_broker_failover(planes):
+    broker = next(plane for plane in planes if plane.broker is not None)
+    await broker.stop()
+    survivors = [plane for plane in planes if plane is not broker]
+
+    await wait_until(lambda: any(plane.broker is not None for plane in survivors)
+                     and all(plane.connected.is_set() for plane in survivors))
+    # A survivor may have been mid-reconnect when the new broker came up
+    await wait_until(lambda: len(next(p for p in survivors if p.broker).broker.peers) == len(survivors))
+    for plane in planes:
+        plane.received.clear()
+
+    survivors[0].forward("system", json.dumps({"type": "after_failover"}))
+
+    await wait_until(lambda: all(plane.received for plane in survivors[1:]))
+    await asyncio.sleep(0.05)
+    for plane in survivors[1:]:
+        assert plane.received == [("system", {"type": "after_failover"})]
+    assert survivors[0].received == []
+    assert broker.received == []
+    assert sum(plane.broker is not None for plane in survivors) == 1
+
+
+@pytest.mark.asyncio
+async def test_in_process_backplane_ignores_its_own_events():
+    plane = InProcessBackplane()
+    received = []
+    await plane.start(lambda topic, data: received.append((topic, data)))
+
+    plane._receive(plane._envelope("system", json.dumps({"type": "mine"})))
+    other = InProcessBackplane()
+    plane._receive(other._envelope("agent:7", json.dumps({"type": "theirs"})))
+    plane._receive(b"not json")
+
+    assert received == [("agent:7", {"type": "theirs"})]
+
+
+def test_create_backplane(monkeypatch, socket_path):
+    import event_backplane
+    monkeypatch.setattr(event_backplane, "REDIS_URL", None)
+    monkeypatch.setattr(event_backplane, "EVENT_BROKER_SOCKET", socket_path)
+
+    assert type(create_backplane("memory")) is InProcessBackplane
+    assert type(create_backplane("redis")) is InProcessBackplane  # no REDIS_URL: falls back
+    unix = create_backplane("auto")
+    assert isinstance(unix, UnixSocketBackplane) and unix.path == socket_path
+    if event_backplane.aioredis is not None:
+        monkeypatch.setattr(event_backplane, "REDIS_URL", "redis://localhost:6379/0")
+        assert isinstance(create_backplane("auto"), RedisBackplane)
@@ -0,0 +1,57 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from git_metadata import find_git_dir, read_git_metadata
+
+needs_git = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git(cwd, *args):
+    env = {**os.environ, "GIT_AUTHOR_DATE": "2025-03-04T05:06:07+0130", "GIT_COMMITTER_DATE": "2025-03-04T05:06:07+0130"}
+    return subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+                          cwd=cwd, env=env, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def test_undecodable_dot_git_file_is_not_a_repository(tmp_path):
+    (tmp_path / ".git").write_bytes(b"gitdir: \xff\xfe\x00broken\n")
+    assert find_git_dir(str(tmp_path)) is None
+    assert read_git_metadata(str(tmp_path)) is None
+
+
+def test_gitdir_file_is_followed(tmp_path):
+    (tmp_path / "real").mkdir()
+    (tmp_path / "work").mkdir()
+    (tmp_path / "work" / ".git").write_text("gitdir: ../real\n")
+    assert find_git_dir(str(tmp_path / "work")) == str(tmp_path / "real")
+
+
+@needs_git
+def test_metadata_matches_git_log(tmp_path):
+    git(tmp_path, "init", "-q", "-b", "main")
+    git(tmp_path, "remote", "add", "origin", "https://example.com/repo.git")
+    (tmp_path / "file.txt").write_text("one\n")
+    git(tmp_path, "add", "file.txt")
+    git(tmp_path, "commit", "-q", "-m", "first")
+
+    info = read_git_metadata(str(tmp_path))
+    assert info.branch == "main"
+    assert info.head_sha == git(tmp_path, "rev-parse", "HEAD")
+    assert info.remote_url == "https://example.com/repo.git"
+    assert info.last_commit_date == git(tmp_path, "log", "-1", "--format=%ai") == "2025-03-04 05:06:07 +0130"
+
+    # Same answer once the commit only exists in a packfile and the ref only in packed-refs
+    git(tmp_path, "gc", "-q", "--prune=now")
+    assert read_git_metadata(str(tmp_path)).last_commit_date == "2025-03-04 05:06:07 +0130"
+
+
+@needs_git
+def test_undecodable_config_does_not_break_metadata(tmp_path):
+    git(tmp_path, "init", "-q", "-b", "main")
+    with open(tmp_path / ".git" / "config", "ab") as f:
+        f.write(b"[user]\n\tname = \xff\xfe\n")
+
+    info = read_git_metadata(str(tmp_path))
+    assert info.branch == "main" and info.head_sha is None and info.remote_url is None
@@ -0,0 +1,75 @@
+import asyncio
+import random
+
+import pytest
+
+from live_state import StateStore, apply_patch, diff
+
+
+def test_diff_round_trips_through_apply_patch():
+    old = {"state": "idle", "cpu": 1.0, "tags": ["a"], "nested": {"x": 1, "gone": True}, "a/b": 1, "t~": 2}
+    new = {"state": "busy", "cpu": 1.0, "tags": ["a", "b"], "nested": {"x": 2, "y": None}, "a/b": 3, "extra": {}}
+
+    ops = diff(old, new)
+    assert apply_patch(old, ops) == new
+    assert old["nested"] == {"x": 1, "gone": True}  # the input document is not modified
+    assert {"op": "replace", "path": "/a~1b", "value": 3} in ops
+    assert {"op": "remove", "path": "/t~0"} in ops
+    assert not any(op["path"] == "/cpu" for op in ops)
+
+
+def test_diff_of_equal_documents_is_empty():
+    assert diff({"a": [1, 2], "b": {"c": None}}, {"a": [1, 2], "b": {"c": None}}) == []
+    assert diff(None, {"a": 1}) == [{"op": "replace", "path": "", "value": {"a": 1}}]
+
+
+def test_patches_replay_to_current_state():
+    rng = random.Random(5)
+    patches = []
+    store = StateStore(lambda key, patch: patches.append(patch), window=0)
+    statuses = {f"agent-{i}": {"state": "idle", "cpu": 1.0, "progress": 0.0, "errors": 0} for i in range(20)}
+
+    for _ in range(2000):
+        agent_id = f"agent-{rng.randrange(20)}"
+        status = statuses[agent_id]
+        status["cpu"] = round(rng.uniform(0, 100), 1)
+        if rng.random() < 0.2:
+            status["progress"] = round(min(1.0, status["progress"] + 0.05), 2)
+        if rng.random() < 0.05:
+            status["state"] = rng.choice(["idle", "busy", "waiting"])
+        store.update(f"agent:{agent_id}", status)
+
+    rebuilt = {}
+    for patch in patches:
+        rebuilt[patch["key"]] = apply_patch(rebuilt.get(patch["key"]), patch["ops"])
+    assert rebuilt == {f"agent:{a}": s for a, s in statuses.items()}
+
+
+def test_versions_chain_from_snapshot():
+    patches = []
+    store = StateStore(lambda key, patch: patches.append(patch), window=0)
+    store.update("metrics", {"cpu": 1})
+    snapshot = store.snapshot("metrics")
+    store.update("metrics", {"cpu": 2})
+    store.update("metrics", {"cpu": 2})  # unchanged: no patch, no version bump
+    store.update("metrics", {"cpu": 3})
+
+    assert snapshot["version"] == 1 and snapshot["value"] == {"cpu": 1}
+    assert [(p["base_version"], p["version"]) for p in patches] == [(0, 1), (1, 2), (2, 3)]
+    assert patches[0]["ops"] == [{"op": "replace", "path": "", "value": {"cpu": 1}}]
+    assert store.stats["unchanged"] == 1
+
+
+@pytest.mark.asyncio
+async def test_updates_within_a_window_are_coalesced():
+    patches = []
+    store = StateStore(lambda key, patch: patches.append(patch), window=0.02)
+    for cpu in range(10):
+        store.update("agent:a", {"cpu": cpu})
+    store.update("agent:b", {"cpu": 0})
+    assert patches == []
+
+    await asyncio.sleep(0.05)
+    assert [p["key"] for p in patches] == ["agent:a", "agent:b"]
+    assert patches[0]["ops"][0]["value"] == {"cpu": 9}
+    assert store.stats["coalesced"] == 9
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import claude_agent
+import rate_limiter
+from project_discovery import ProjectDiscovery
+
+
+class ThreadRecordingDict(dict):
+    """Agent table that records which threads write to it"""
+
+    def __init__(self):
+        super().__init__()
+        self.writers = set()
+
+    def __setitem__(self, key, value):
+        self.writers.add(threading.current_thread())
+        super().__setitem__(key, value)
+
+
+class OfflineClient:
+    """Deploying only constructs the API client; nothing here should reach the network"""
+
+    def __init__(self, api_key, max_retries=None):
+        self.api_key = api_key
+
+
+@pytest.fixture
+def discovery(tmp_path, monkeypatch):
+    monkeypatch.setattr(claude_agent, "Anthropic", OfflineClient)
+    root = tmp_path / "projects"
+    for i in range(6):
+        (root / f"p{i}").mkdir(parents=True)
+        (root / f"p{i}" / "package.json").write_text('{"name": "p%d", "dependencies": {"react": "18"}}' % i)
+    (root / "p0" / "CLAUDE.md").write_text("Use tabs.")
+    discovery = ProjectDiscovery([str(root)], deployment_state_path=str(tmp_path / "deployments.json"))
+    discovery.discover_all_projects()
+    return discovery
+
+
+@pytest.mark.asyncio
+async def test_agents_are_built_in_threads_and_registered_on_the_loop(discovery):
+    for table in ("sub_agents", "agent_configs", "context_state"):
+        setattr(discovery, table, ThreadRecordingDict())
+    built_in = set()
+    build = discovery._build_sub_agent
+
+    def recording_build(project, api_key):
+        built_in.add(threading.current_thread())
+        return build(project, api_key)
+
+    discovery._build_sub_agent = recording_build
+    results = await discovery.deploy_all_agents("sk-test", concurrency=3)
+
+    assert all(results.values()) and len(results) == 6
+    assert threading.main_thread() not in built_in
+    for table in (discovery.sub_agents, discovery.agent_configs, discovery.context_state):
+        assert table.writers == {threading.main_thread()} and len(table) == 6
+    agent = discovery.sub_agents[discovery.generate_sub_agent_config(discovery.discovered_projects["p0"]).agent_id]
+    assert "Use tabs." in agent.system_context
+
+
+@pytest.mark.asyncio
+async def test_redeploy_skips_unchanged_agents_and_picks_up_context_changes(discovery):
+    await discovery.deploy_all_agents("sk-test")
+    project = discovery.discovered_projects["p0"]
+    agent_id = discovery.generate_sub_agent_config(project).agent_id
+
+    assert await discovery._deploy_project(project, "sk-test") == "unchanged"
+    time.sleep(0.01)  # a distinct mtime for the stat key
+    with open(os.path.join(project.path, "CLAUDE.md"), "w") as f:
+        f.write("Use spaces.")
+    assert discovery.refresh_agent_context(project)
+    assert "Use spaces." in discovery.sub_agents[agent_id].system_context
+    assert not discovery.refresh_agent_context(project)
+
+
+@pytest.mark.asyncio
+async def test_deploy_failure_is_reported_without_retrying(discovery):
+    attempts = []
+
+    def failing_build(project, api_key):
+        attempts.append(project.name)
+        raise OSError("unreadable project")
+
+    discovery._build_sub_agent = failing_build
+    project = discovery.discovered_projects["p1"]
+    assert await discovery._deploy_project(project, "sk-test") == "failed"
+    assert attempts == ["p1"]
+
+
+@pytest.mark.asyncio
+async def test_deploy_concurrency_is_validated(discovery):
+    for bad in (0, -1, "4", 2.5, True):
+        with pytest.raises(ValueError):
+            await discovery.deploy_all_agents("sk-test", concurrency=bad)
+
+
+def test_rate_limiter_is_shared_across_threads(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    created = []
+    original = rate_limiter.RateLimiter
+
+    class SlowRateLimiter(original):
+        def __init__(self, *args, **kwargs):
+            time.sleep(0.01)  # widen the window between the membership check and the store
+            created.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(rate_limiter, "RateLimiter", SlowRateLimiter)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        limiters = list(executor.map(lambda _: rate_limiter.get_rate_limiter("sk-shared"), range(32)))
+
+    assert len(created) == 1
+    assert all(limiter is limiters[0] for limiter in limiters)
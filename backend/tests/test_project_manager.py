@@ -0,0 +1,54 @@
+import pytest
+
+from project_manager import ProjectManager
+
+
+def repo(name):
+    return {"name": name, "clone_url": f"https://github.com/x/{name}.git", "html_url": f"https://github.com/x/{name}"}
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = ProjectManager()
+    manager.projects_cache = {}
+    accounts = {
+        "https://api.github.com/orgs/acme/repos": [repo("rocket"), repo("anvil")],
+        "https://api.github.com/users/jane/repos": [repo("dotfiles")],
+    }
+    failing = set()
+
+    async def fetch_all_pages(session, url, headers):
+        if url in failing:
+            raise ConnectionError("GitHub unreachable")
+        return accounts[url]
+
+    monkeypatch.setattr(manager.remote_fetcher, "fetch_all_pages", fetch_all_pages)
+    manager.failing = failing
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_failed_github_source_keeps_only_its_own_projects(manager):
+    acme = {"type": "github", "name": "GitHub", "organization": "acme"}
+    jane = {"type": "github", "name": "GitHub", "username": "jane"}
+    for position, source in enumerate((acme, jane)):
+        _, report, projects = await manager._discover_source(position, source)
+        assert report["status"] == "ok"
+        manager.projects_cache.update((p["id"], p) for p in projects)
+
+    manager.failing.add("https://api.github.com/users/jane/repos")
+    _, report, projects = await manager._discover_source(1, jane)
+
+    assert report["status"] == "error" and report["stale"]
+    assert [p["name"] for p in projects] == ["dotfiles"]
+
+
+def test_source_keys_tell_accounts_and_hosts_apart():
+    keys = {ProjectManager.source_key(source) for source in (
+        {"type": "github", "organization": "Acme"},
+        {"type": "github", "username": "jane"},
+        {"type": "gitlab", "username": "jane"},
+        {"type": "gitlab", "username": "jane", "url": "https://git.example.com/"},
+    )}
+    assert keys == {"github:acme", "github:jane", "gitlab:https://gitlab.com/jane",
+                    "gitlab:https://git.example.com/jane"}
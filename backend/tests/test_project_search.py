@@ -0,0 +1,73 @@
+import random
+
+from project_search import ProjectSearchIndex, parse_timestamp
+
+TECHNOLOGIES = ["React", "Python", "FastAPI", "Go", "Rust", "Docker"]
+WORDS = ["agent", "portal", "crawler", "service", "dashboard", "pipeline", "gateway"]
+
+
+def make_projects(count: int):
+    rng = random.Random(7)
+    return [{
+        "id": f"project_{i}",
+        "name": f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{i}",
+        "description": " ".join(rng.choice(WORDS) for _ in range(3)),
+        "technologies": rng.sample(TECHNOLOGIES, rng.randint(1, 3)),
+        "source": rng.choice(["Local", "GitHub", "GitLab"]),
+        "status": rng.choice(["active", "archived"]),
+        "last_modified": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:{i % 60:02d}:00Z"
+    } for i in range(count)]
+
+
+def reference_search(projects, query, filters):
+    """Scan every project: facets are any-of within, all-of across; text terms all match a substring"""
+    def facet_match(project, facet, values):
+        raw = project.get(facet)
+        raw = raw if isinstance(raw, list) else [raw]
+        return any(str(v).lower() in {w.lower() for w in values} for v in raw)
+
+    def text_match(project, term):
+        words = f"{project['name']} {project['description']}".lower().replace("-", " ").split()
+        return any(word.startswith(term) if len(term) < 3 else term in word for word in words)
+
+    hits = [p for p in projects
+            if all(facet_match(p, f, v) for f, v in filters.items())
+            and all(text_match(p, t) for t in query.lower().split())]
+    return sorted(hits, key=lambda p: (parse_timestamp(p["last_modified"]), p["id"]), reverse=True)
+
+
+def test_search_matches_a_full_scan():
+    projects = make_projects(300)
+    index = ProjectSearchIndex()
+    index.replace_all(projects)
+
+    for query, filters in [
+        ("", {}),
+        ("", {"technologies": ["react"]}),
+        ("", {"technologies": ["Python", "Go"], "status": ["active"], "source": ["GitHub"]}),
+        ("da", {}),
+        ("peline", {}),
+        ("agent portal", {"source": ["Local"]}),
+    ]:
+        expected = reference_search(projects, query, filters)
+        result = index.search(query, filters, offset=5, limit=10)
+        assert result["total"] == len(expected), (query, filters)
+        assert [p["id"] for p in result["projects"]] == [p["id"] for p in expected[5:15]], (query, filters)
+
+
+def test_upsert_drops_stale_postings():
+    projects = make_projects(50)
+    index = ProjectSearchIndex()
+    index.replace_all(projects)
+
+    changed = {**projects[0], "name": "zebra", "description": "", "technologies": ["Elixir"]}
+    index.upsert(changed)
+    assert [p["id"] for p in index.search("zebra")["projects"]] == ["project_0"]
+    assert index.search("", {"technologies": ["elixir"]})["total"] == 1
+    old_word = projects[0]["name"].split("-")[0]
+    assert "project_0" not in {p["id"] for p in index.search(old_word, limit=100)["projects"]}
+
+    index.replace_all(projects[1:])
+    assert len(index) == 49
+    assert index.search("zebra")["total"] == 0
+    assert "Elixir" not in index.search()["facets"]["technologies"]
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import shutil
+import sys
+import threading
+
+import pytest
+
+from project_manager import ProjectManager
+from project_watcher import ProjectWatcher
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+
+
+class RecordingBroadcaster:
+    def __init__(self):
+        self.messages = []
+
+    async def broadcast(self, message):
+        self.messages.append(message)
+
+
+class LoopOnlyDict(dict):
+    """Project cache that records which threads mutate it"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.writers = set()
+
+    def __setitem__(self, key, value):
+        self.writers.add(threading.current_thread())
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.writers.add(threading.current_thread())
+        super().__delitem__(key)
+
+
+def make_project(path, marker="package.json"):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, marker), "w") as f:
+        f.write('{"name": "x"}')
+
+
+async def settle(watcher, seconds=0.4):
+    await asyncio.sleep(seconds)
+    if watcher._flush_task:
+        await watcher._flush_task
+
+
+@pytest.fixture
+def manager():
+    manager = ProjectManager()
+    manager.projects_cache = LoopOnlyDict()
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_updates_are_applied_on_the_event_loop(tmp_path, manager):
+    root = str(tmp_path)
+    make_project(f"{root}/existing")
+    broadcaster = RecordingBroadcaster()
+    watcher = ProjectWatcher(manager, broadcaster, debounce=0.05)
+    watcher.start([{"type": "local", "path": root}])
+    try:
+        make_project(f"{root}/added")
+        os.makedirs(f"{root}/group/nested")
+        await settle(watcher)
+        make_project(f"{root}/group/nested", "requirements.txt")
+        await settle(watcher)
+        shutil.rmtree(f"{root}/added")
+        await settle(watcher)
+    finally:
+        await watcher.close()
+
+    updated = [u["relative_path"] for m in broadcaster.messages for u in m["updated"]]
+    removed = [r for m in broadcaster.messages for r in m["removed"]]
+    assert updated == ["added", os.path.join("group", "nested")]
+    assert removed == ["added"]
+    assert set(manager.projects_cache) == {"group_nested"}
+    assert manager.projects_cache.writers == {threading.main_thread()}
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_a_pending_flush(tmp_path, manager):
+    root = str(tmp_path)
+    watcher = ProjectWatcher(manager, RecordingBroadcaster(), debounce=0.05)
+    watcher.start([{"type": "local", "path": root}])
+    analyzing = threading.Event()
+    release = threading.Event()
+    analyze = watcher._analyze
+
+    def slow_analyze(paths):
+        analyzing.set()
+        release.wait(5)
+        return analyze(paths)
+
+    watcher._analyze = slow_analyze
+    make_project(f"{root}/added")
+    try:
+        while not analyzing.is_set():
+            await asyncio.sleep(0.01)
+        flush_task = watcher._flush_task
+        await watcher.close()
+    finally:
+        release.set()
+
+    assert flush_task.cancelled()
+    assert watcher._flush_task is None and watcher._flush_handle is None
+    assert "added" not in manager.projects_cache
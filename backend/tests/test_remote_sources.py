@@ -0,0 +1,138 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from remote_sources import ConditionalFetcher, RemoteSourceError, parse_link_header, page_of
+
+TOTAL = 250
+EXPECTED = [{"id": i} for i in range(TOTAL)]
+
+
+class StubAPI:
+    """GitHub-style paginated list API; the route picks how the page count is advertised"""
+
+    def __init__(self):
+        self.requests: List[Tuple[str, int, Optional[str]]] = []  # (route, page, If-None-Match)
+        self.refuse: Dict[str, Tuple[int, bool]] = {}  # route -> (status, quota exhausted)
+        self.base_url = ""
+
+    async def handle(self, request: web.Request) -> web.Response:
+        route = request.match_info["route"]
+        page, per_page = int(request.query.get("page", 1)), int(request.query.get("per_page", 30))
+        self.requests.append((route, page, request.headers.get("If-None-Match")))
+        if route in self.refuse:
+            status, exhausted = self.refuse[route]
+            # Secondary limits refuse without touching the quota; a spent quota says so in its headers
+            headers = ({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 60)}
+                       if exhausted else {"Retry-After": "60"})
+            return web.Response(status=status, headers=headers)
+
+        pages = -(-TOTAL // per_page)
+        etag = f'"{route}-{page}"'
+        headers = {"ETag": etag, "X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": str(time.time() + 3600)}
+        base = f"{request.url.with_query(None)}?per_page={per_page}"
+        if route == "link-last":
+            headers["Link"] = f'<{base}&page={pages}>; rel="last"'
+        elif route == "link-next" and page < pages:
+            headers["Link"] = f'<{base}&page={page + 1}>; rel="next"'
+        elif route == "total-pages":
+            headers["X-Total-Pages"] = str(pages)
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers=headers)
+        items = [{"id": i} for i in range((page - 1) * per_page, min(page * per_page, TOTAL))]
+        return web.json_response(items, headers=headers)
+
+    def url(self, route: str) -> str:
+        return f"{self.base_url}/{route}"
+
+
+@pytest_asyncio.fixture
+async def api():
+    stub = StubAPI()
+    app = web.Application()
+    app.router.add_get("/{route}", stub.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = site._server.sockets[0].getsockname()[:2]
+    stub.base_url = f"http://{host}:{port}"
+    yield stub
+    await runner.cleanup()
+
+
+@pytest_asyncio.fixture
+async def session():
+    async with aiohttp.ClientSession() as client_session:
+        yield client_session
+
+
+def test_parse_link_header():
+    links = parse_link_header('<https://api.example/x?page=2>; rel="next", <https://api.example/x?page=9>; rel="last"')
+    assert links == {"next": "https://api.example/x?page=2", "last": "https://api.example/x?page=9"}
+    assert page_of(links["last"]) == 9
+    assert parse_link_header(None) == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("route", ["link-last", "link-next", "total-pages"])
+async def test_fetch_all_pages(api, session, tmp_path, route):
+    fetcher = ConditionalFetcher(str(tmp_path))
+
+    items = await fetcher.fetch_all_pages(session, api.url(route), {}, per_page=100)
+
+    assert items == EXPECTED
+    assert sorted(page for _, page, _ in api.requests) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_not_modified_reuses_cached_bodies(api, session, tmp_path):
+    fetcher = ConditionalFetcher(str(tmp_path))
+    await fetcher.fetch_all_pages(session, api.url("link-last"), {}, per_page=100)
+    api.requests.clear()
+
+    items = await fetcher.fetch_all_pages(session, api.url("link-last"), {}, per_page=100)
+
+    assert items == EXPECTED
+    assert sorted(api.requests) == [("link-last", page, f'"link-last-{page}"') for page in (1, 2, 3)]
+    assert fetcher.stats["not_modified"] == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [403, 429])
+async def test_refused_requests_fall_back_to_cache(api, session, tmp_path, status):
+    await ConditionalFetcher(str(tmp_path)).fetch_all_pages(session, api.url("total-pages"), {}, per_page=100)
+    fetcher = ConditionalFetcher(str(tmp_path))
+    api.refuse["total-pages"] = (status, False)
+    api.requests.clear()
+
+    items = await fetcher.fetch_all_pages(session, api.url("total-pages"), {}, per_page=100)
+
+    assert items == EXPECTED
+    assert len(api.requests) == 3
+    assert fetcher.stats["served_from_cache"] == 3
+    with pytest.raises(RemoteSourceError) as error:
+        await fetcher.get_json(session, f"{api.url('total-pages')}?per_page=7&page=1", {})
+    assert error.value.status == status
+
+
+@pytest.mark.asyncio
+async def test_exhausted_quota_is_honoured_locally(api, session, tmp_path):
+    await ConditionalFetcher(str(tmp_path)).fetch_all_pages(session, api.url("total-pages"), {}, per_page=100)
+    fetcher = ConditionalFetcher(str(tmp_path))
+    api.refuse["total-pages"] = (403, True)
+    api.requests.clear()
+
+    items = await fetcher.fetch_all_pages(session, api.url("total-pages"), {}, per_page=100)
+
+    assert items == EXPECTED
+    assert len(api.requests) == 1  # the rest are answered before reaching the server
+    assert fetcher.rate_limited_until(api.base_url.split("//", 1)[1])
+    with pytest.raises(RemoteSourceError) as error:
+        await fetcher.get_json(session, f"{api.url('total-pages')}?per_page=7&page=1", {})
+    assert error.value.status == 403
+    assert len(api.requests) == 1
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+from task_store import AgentTask, TaskStore
+
+
+def spilled_files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root) for d, _, files in os.walk(root) for f in files)
+
+
+def test_spilled_responses_are_removed_on_eviction_and_overwrite(tmp_path):
+    store = TaskStore(max_tasks=2, spill_threshold=10, spill_dir=str(tmp_path))
+    tasks = [AgentTask(id=f"t{i}", prompt="p", status="processing", created_at=i) for i in range(3)]
+    for task in tasks[:2]:
+        store.add(task)
+        store.set_response(task, "x" * 100)
+        store.set_status(task, "completed")
+    assert len(spilled_files(tmp_path)) == 2
+    assert tasks[0].response == "x" * 100
+
+    store.set_response(tasks[1], "short")
+    assert tasks[1].response == "short"
+    assert len(spilled_files(tmp_path)) == 1
+
+    store.add(tasks[2])  # evicts t0
+    assert "t0" not in store
+    assert spilled_files(tmp_path) == []
+
+
+def test_new_store_clears_files_left_by_exited_processes(tmp_path):
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    for owner in (exited.pid, os.getppid()):
+        (tmp_path / str(owner)).mkdir()
+        (tmp_path / str(owner) / "response.txt").write_text("old")
+    (tmp_path / "flat-layout.txt").write_text("old")
+
+    store = TaskStore(spill_dir=str(tmp_path))
+
+    assert spilled_files(tmp_path) == [os.path.join(str(os.getppid()), "response.txt")]
+    assert store.spill_dir == os.path.join(str(tmp_path), str(os.getpid()))
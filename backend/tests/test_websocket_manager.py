@@ -0,0 +1,168 @@
+import asyncio
+import json
+import sys
+import time
+
+import pytest
+import pytest_asyncio
+
+from websocket_manager import WebSocketManager
+
+
+class RecordingSocket:
+    """Stand-in WebSocket that keeps every frame it is sent"""
+
+    def __init__(self):
+        self.headers = {}
+        self.frames = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.frames.append(json.loads(text))
+
+    async def send_bytes(self, data: bytes):
+        raise AssertionError("binary frame sent to a JSON client")
+
+    async def close(self, code: int = 1000):
+        self.closed = code
+
+    def of(self, message_type: str, session_id: str = None):
+        return [f for f in self.frames
+                if f["type"] == message_type and (session_id is None or f.get("session_id") == session_id)]
+
+
+async def drained(manager: WebSocketManager, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while any(client.queue for client in manager.clients.values()):
+        assert time.monotonic() < deadline, "client queues did not drain"
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture
+async def manager():
+    manager = WebSocketManager(max_queue=10000)
+    yield manager
+    for websocket in list(manager.clients):
+        await manager.disconnect(websocket)
+    await manager.close()
+    await asyncio.sleep(0)  # let the cancelled writer tasks finish
+
+
+def print_lines(count: int) -> str:
+    return f"{sys.executable} -c \"for i in range({count}): print('output line', i)\""
+
+
+@pytest.mark.asyncio
+async def test_command_output_is_batched(manager):
+    viewer = RecordingSocket()
+    await manager.connect(viewer)
+
+    await manager.stream_command_execution(viewer, {"command": print_lines(5000), "session_id": "s1"})
+    await drained(manager)
+
+    chunks = viewer.of("command_output", "s1")
+    expected = "".join(f"output line {i}\n" for i in range(5000))
+    assert "".join(c["data"] for c in chunks) == expected
+    assert manager.command_sessions["s1"]["output"]["lines"] == 5000
+    # Line-by-line streaming would be 5000 frames; batches are bounded by time and size instead
+    assert len(chunks) <= 20
+    assert [c["seq"] for c in chunks] == list(range(1, len(chunks) + 1))
+    assert [c["offset"] for c in chunks] == [sum(len(c["data"]) for c in chunks[:i]) for i in range(len(chunks))]
+    complete = viewer.of("command_complete", "s1")
+    assert len(complete) == 1 and complete[0]["exit_code"] == 0 and complete[0]["seq"] == len(chunks)
+
+
+@pytest.mark.asyncio
+async def test_monitors_get_activity_not_output(manager):
+    viewer, monitor = RecordingSocket(), RecordingSocket()
+    await manager.connect(viewer)
+    await manager.connect(monitor, topics=["commands"])
+
+    await manager.stream_command_execution(viewer, {"command": print_lines(2000), "session_id": "s2"})
+    await drained(manager)
+
+    assert not monitor.of("command_output")
+    activity = monitor.of("command_activity", "s2")
+    assert activity and activity[-1]["lines"] == 2000
+    assert not viewer.of("command_activity")
+
+
+@pytest.mark.asyncio
+async def test_resume_replays_from_offset(manager):
+    viewer, late = RecordingSocket(), RecordingSocket()
+    await manager.connect(viewer)
+    await manager.stream_command_execution(viewer, {"command": print_lines(3000), "session_id": "s3"})
+    await drained(manager)
+    await manager.connect(late)
+    full = "".join(c["data"] for c in viewer.of("command_output", "s3"))
+    offset = len(full) // 2
+
+    await manager.handle_message(late, {"type": "resume_session", "session_id": "s3", "offset": offset})
+    await drained(manager)
+
+    resumed = late.of("session_resumed", "s3")[0]
+    assert resumed["status"] == "completed" and not resumed["truncated"]
+    replay = late.of("command_output", "s3")
+    assert all(c["replay"] for c in replay)
+    assert replay[0]["offset"] == offset
+    assert "".join(c["data"] for c in replay) == full[offset:]
+    assert late.of("command_complete", "s3")[0]["exit_code"] == 0
+
+
+class BlockedSocket(RecordingSocket):
+    """A client that stops reading: every send waits until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def send_text(self, text: str):
+        await self.release.wait()
+        await super().send_text(text)
+
+
+async def broadcast_mixed(manager: WebSocketManager, count: int):
+    for i in range(count):
+        if i % 2:
+            await manager.broadcast({"type": "metrics_update", "metrics": {"cpu": i}})
+        else:
+            await manager.broadcast({"type": "project_discovered", "project": {"id": f"p{i}"}})
+        await asyncio.sleep(0)  # producers yield between events, letting healthy writers keep up
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy", ["drop_oldest", "coalesce", "disconnect"])
+async def test_slow_consumer_does_not_hold_back_others(policy):
+    manager = WebSocketManager(max_queue=8, policy=policy)
+    fast, slow = RecordingSocket(), BlockedSocket()
+    await manager.connect(fast)
+    await manager.connect(slow)
+    client = manager.clients[slow]
+    try:
+        started = time.monotonic()
+        await broadcast_mixed(manager, 100)
+        assert time.monotonic() - started < 1.0  # broadcasting never waits on a socket
+        await asyncio.sleep(0.05)
+
+        assert len(fast.of("project_discovered")) == 50 and len(fast.of("metrics_update")) == 50
+        if policy == "drop_oldest":
+            assert len(client.queue) == 8
+            assert client.stats["dropped"] > 0
+        elif policy == "coalesce":
+            assert len(client.queue) <= 8
+            assert client.stats["coalesced"] > 0
+            assert sum(slot[0].data["type"] == "metrics_update" for slot in client.queue) <= 1
+        else:
+            assert slow not in manager.clients
+            assert slow.closed == 1013
+            assert manager.get_metrics()["slow_disconnects"] == 1
+    finally:
+        slow.release.set()
+        for websocket in list(manager.clients):
+            await manager.disconnect(websocket)
+        await manager.close()
+        await asyncio.sleep(0)
@@ -3,29 +3,581 @@ WebSocket Manager for Real-time Command Streaming
 Handles bidirectional communication for live updates
 """
 
+import os
+import time
+import signal
 import asyncio
 import json
+import zlib
+import codecs
+import fnmatch
 import logging
-from typing import Dict, Set, Any
+import shutil
+from collections import deque, OrderedDict
+from typing import Dict, List, Set, Any, Optional, Union
 from datetime import datetime
 import subprocess
 from fastapi import WebSocket
 
+from event_backplane import InProcessBackplane, create_backplane
+from live_state import StateStore
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
 logger = logging.getLogger(__name__)
 
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+# What to do when a client's queue is full: 'drop_oldest', 'coalesce' or 'disconnect'
+SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "coalesce")
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Server heartbeat: ping connections quiet for PING_INTERVAL and drop ones stuck mid-send for IDLE_TIMEOUT,
+# or silent that long once they have shown they answer heartbeats (sent a ping or pong). Purely passive
+# sockets are left to the ASGI server's protocol-level pings (uvicorn --ws-ping-interval/--ws-ping-timeout).
+# A running command nobody is watching is stopped after ORPHAN_GRACE (time enough to resume it).
+PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL", "20"))
+IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "60"))
+ORPHAN_GRACE = float(os.getenv("WS_ORPHAN_GRACE", "30"))
+# SIGTERM first; SIGKILL if the process group is still there after this long
+KILL_GRACE = 5.0
+
+# Terminal commands running at once; further ones wait in a queue of at most MAX_QUEUED_SESSIONS
+MAX_CONCURRENT_SESSIONS = int(os.getenv("WS_MAX_SESSIONS", "8"))
+MAX_QUEUED_SESSIONS = int(os.getenv("WS_MAX_QUEUED_SESSIONS", "32"))
+# Per-session ceilings (0 = unlimited); an execute message may lower but not raise them.
+# Memory is an address-space limit, which runtimes reserving large virtual ranges (node, JVM) trip
+# well below their real usage, so it is off unless configured.
+SESSION_LIMITS = {
+    "cpu_seconds": int(os.getenv("WS_SESSION_CPU_SECONDS", "600")),
+    "memory_mb": int(os.getenv("WS_SESSION_MEMORY_MB", "0")),
+    "output_bytes": int(os.getenv("WS_SESSION_OUTPUT_BYTES", str(64 * 1024 * 1024))),
+    "timeout": float(os.getenv("WS_SESSION_TIMEOUT", "0")),
+}
+# Applies the limits before exec, so they cover everything the command starts (util-linux)
+PRLIMIT = shutil.which("prlimit")
+# Signals a viewer may send to a running command
+CONTROL_SIGNALS = {
+    "SIGINT": signal.SIGINT,
+    "SIGTERM": signal.SIGTERM,
+    "SIGHUP": signal.SIGHUP,
+    "SIGQUIT": signal.SIGQUIT,
+}
+
+# Frame encodings a client can ask for in its hello; msgpack needs the optional msgpack package
+ENCODINGS = ("json", "msgpack")
+# (encoding, compact timestamps, app-level deflate)
+DEFAULT_FORMAT = ("json", False, False)
+
+# Messages carrying whole state (field holding it); clients in delta mode get state_patch diffs instead
+STATE_FIELDS = {"agent_status_update": "status", "metrics_update": "metrics"}
+
+# Message types where only the latest per key matters ('coalesce' replaces queued ones in place)
+COALESCE_FIELDS = {
+    "agent_status_update": "agent_id",
+    "task_progress": "task_id",
+    "workflow_update": "workflow_id",
+    "metrics_update": None,
+    "system_status": None,
+    "command_activity": "session_id",
+}
+
+# Message type -> (topic namespace, field naming the subject); unlisted types go to 'system'
+TOPIC_FIELDS = {
+    "agent_status_update": ("agent", "agent_id"),
+    "task_progress": ("task", "task_id"),
+    "workflow_update": ("workflow", "workflow_id"),
+    "command_queued": ("command", "session_id"),
+    "command_start": ("command", "session_id"),
+    "command_output": ("command", "session_id"),
+    "command_complete": ("command", "session_id"),
+    "command_error": ("command", "session_id"),
+    "command_activity": ("commands", None),
+    "metrics_update": ("metrics", None),
+    "projects_delta": ("projects", None),
+    "agent_deployment_progress": ("projects", None),
+}
+
+# What a new connection receives until it says otherwise: everything the dashboards used to get,
+# minus per-session command output (subscribe to command:{session_id} or 'commands' for that)
+DEFAULT_TOPICS = ("agent:*", "task:*", "workflow:*", "metrics", "projects", "system")
+MAX_SUBSCRIPTIONS = 256
+
+# Command output is sent as chunks: whatever accumulated within OUTPUT_FLUSH_MS, or OUTPUT_FLUSH_BYTES
+OUTPUT_FLUSH_MS = int(os.getenv("WS_OUTPUT_FLUSH_MS", "50"))
+OUTPUT_FLUSH_BYTES = int(os.getenv("WS_OUTPUT_FLUSH_BYTES", "16384"))
+OUTPUT_READ_SIZE = 65536
+# command_activity summaries are sent at most this often per session
+ACTIVITY_INTERVAL = float(os.getenv("WS_ACTIVITY_INTERVAL", "1.0"))
+
+# Output kept for replay: per session, and in total (completed sessions are evicted LRU beyond that)
+SESSION_BUFFER_BYTES = int(os.getenv("WS_SESSION_BUFFER_BYTES", str(1024 * 1024)))
+SESSION_RETENTION_BYTES = int(os.getenv("WS_SESSION_RETENTION_BYTES", str(32 * 1024 * 1024)))
+MAX_RETAINED_SESSIONS = 1000
+
+
+def topic_for(data: Dict[str, Any]) -> str:
+    """Topic a message is published on, e.g. agent:{agent_id} or metrics"""
+    namespace, field = TOPIC_FIELDS.get(data.get("type"), ("system", None))
+    if field and data.get(field) is not None:
+        return f"{namespace}:{data[field]}"
+    return namespace
+
+
+class SubscriptionIndex:
+    """Topic pattern -> subscribers; exact topics and trailing-* wildcards avoid per-pattern matching"""
+    
+    def __init__(self):
+        self.exact: Dict[str, Set[Any]] = {}
+        self.prefixes: Dict[str, Set[Any]] = {}  # 'agent:*' is stored as 'agent:', '*' as ''
+        self.globs: Dict[str, Set[Any]] = {}  # anything else, matched with fnmatch
+    
+    def _table(self, pattern: str):
+        if not any(c in pattern for c in "*?["):
+            return self.exact, pattern
+        if pattern.endswith("*") and not any(c in pattern[:-1] for c in "*?["):
+            return self.prefixes, pattern[:-1]
+        return self.globs, pattern
+    
+    def add(self, pattern: str, subscriber: Any):
+        table, key = self._table(pattern)
+        table.setdefault(key, set()).add(subscriber)
+    
+    def remove(self, pattern: str, subscriber: Any):
+        table, key = self._table(pattern)
+        subscribers = table.get(key)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del table[key]
+    
+    def match(self, topic: str) -> Set[Any]:
+        subscribers = set(self.exact.get(topic, ()))
+        for prefix, prefixed in self.prefixes.items():
+            if topic.startswith(prefix):
+                subscribers |= prefixed
+        for pattern, globbed in self.globs.items():
+            if fnmatch.fnmatchcase(topic, pattern):
+                subscribers |= globbed
+        return subscribers
+    
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self.match(topic))
+
+
+def epoch_millis(value: Any) -> Any:
+    """ISO 8601 timestamp -> integer epoch milliseconds; anything else unchanged"""
+    if isinstance(value, str):
+        try:
+            return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+        except ValueError:
+            pass
+    return value
+
+
+def compact_timestamps(value: Any) -> Any:
+    """Copy of a message with 'timestamp' and '*_at' fields as epoch milliseconds"""
+    if isinstance(value, dict):
+        return {
+            key: epoch_millis(item) if key == "timestamp" or key.endswith("_at") else compact_timestamps(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [compact_timestamps(item) for item in value]
+    return value
+
+
+def encode_frame(data: Dict[str, Any], frame_format: tuple) -> Union[str, bytes]:
+    """Serialise a message for one (encoding, compact, deflate) format; str frames go out as text"""
+    encoding, compact, deflate = frame_format
+    if compact:
+        data = compact_timestamps(data)
+    if encoding == "msgpack":
+        frame: Union[str, bytes] = msgpack.packb(data, default=str)
+    elif compact:
+        frame = json.dumps(data, default=str, separators=(",", ":"))
+    else:
+        frame = json.dumps(data, default=str)
+    if deflate:
+        # Raw deflate per message (DecompressionStream('deflate-raw') in browsers)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        raw = frame.encode() if isinstance(frame, str) else frame
+        frame = compressor.compress(raw) + compressor.flush()
+    return frame
+
+
+class OutboundMessage:
+    """A message serialised at most once per frame format, however many clients it goes to"""
+    
+    __slots__ = ("data", "coalesce_key", "_text", "_frames")
+    
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        msg_type = data.get("type")
+        if msg_type in COALESCE_FIELDS:
+            field = COALESCE_FIELDS[msg_type]
+            self.coalesce_key = (msg_type, data.get(field) if field else None)
+        else:
+            self.coalesce_key = None
+        self._text: Optional[str] = None
+        self._frames: Optional[Dict[tuple, Union[str, bytes]]] = None
+    
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.data, default=str)
+        return self._text
+    
+    def frame(self, frame_format: tuple) -> Union[str, bytes]:
+        if frame_format == DEFAULT_FORMAT:
+            return self.text
+        if self._frames is None:
+            self._frames = {}
+        frame = self._frames.get(frame_format)
+        if frame is None:
+            frame = self._frames[frame_format] = encode_frame(self.data, frame_format)
+        return frame
+
+
+class SessionBuffer:
+    """Ring buffer of a session's output chunks; offsets count characters since the command started"""
+    
+    def __init__(self, capacity: int = SESSION_BUFFER_BYTES):
+        self.capacity = capacity
+        self.chunks: deque = deque()  # (offset, seq, stream, data, size)
+        self.start_offset = 0  # oldest offset still held
+        self.end_offset = 0
+        self.size = 0  # UTF-8 bytes held
+    
+    def append(self, seq: int, stream: str, data: str) -> tuple[int, int]:
+        """Store a chunk; returns (its offset, bytes freed by trimming the oldest ones)"""
+        offset = self.end_offset
+        size = len(data.encode('utf-8'))
+        self.chunks.append((offset, seq, stream, data, size))
+        self.end_offset += len(data)
+        self.size += size
+        freed = 0
+        while self.size > self.capacity and len(self.chunks) > 1:
+            freed += self._drop_oldest()
+        return offset, size - freed
+    
+    def _drop_oldest(self) -> int:
+        _, _, _, data, size = self.chunks.popleft()
+        self.size -= size
+        self.start_offset = self.chunks[0][0] if self.chunks else self.end_offset
+        return size
+    
+    def read_from(self, offset: int) -> List[tuple]:
+        """Chunks covering offset onwards; the first is cut to start exactly at offset when possible"""
+        offset = max(offset, self.start_offset)
+        chunks = []
+        for chunk_offset, seq, stream, data, _ in self.chunks:
+            end = chunk_offset + len(data)
+            if end <= offset:
+                continue
+            if chunk_offset < offset:
+                data = data[offset - chunk_offset:]
+                chunk_offset = offset
+            chunks.append((chunk_offset, seq, stream, data))
+        return chunks
+
+
+class SessionStore:
+    """Replay buffers for command sessions under a global byte budget"""
+    
+    def __init__(self, retention_bytes: int = SESSION_RETENTION_BYTES,
+                 buffer_bytes: int = SESSION_BUFFER_BYTES, on_evict=None):
+        self.on_evict = on_evict
+        self.retention_bytes = retention_bytes
+        self.buffer_bytes = buffer_bytes
+        self.buffers: "OrderedDict[str, SessionBuffer]" = OrderedDict()  # least recently used first
+        self.completed: Set[str] = set()
+        self.total_bytes = 0
+        self.stats = {"evicted_sessions": 0}
+    
+    def create(self, session_id: str) -> SessionBuffer:
+        self.discard(session_id)  # a reused id starts over; its old bytes leave the budget
+        buffer = SessionBuffer(self.buffer_bytes)
+        self.buffers[session_id] = buffer
+        self.completed.discard(session_id)
+        return buffer
+    
+    def discard(self, session_id: str):
+        buffer = self.buffers.pop(session_id, None)
+        if buffer is not None:
+            self.total_bytes -= buffer.size
+        self.completed.discard(session_id)
+    
+    def get(self, session_id: str) -> Optional[SessionBuffer]:
+        buffer = self.buffers.get(session_id)
+        if buffer is not None:
+            self.buffers.move_to_end(session_id)
+        return buffer
+    
+    def append(self, session_id: str, seq: int, stream: str, data: str) -> int:
+        buffer = self.get(session_id) or self.create(session_id)
+        offset, added = buffer.append(seq, stream, data)
+        self.total_bytes += added
+        self.evict()
+        return offset
+    
+    def complete(self, session_id: str):
+        if session_id in self.buffers:
+            self.completed.add(session_id)
+    
+    def evict(self) -> List[str]:
+        """Drop least recently used completed sessions until within budget; returns their ids"""
+        evicted = []
+        
+        def within_budget():
+            return self.total_bytes <= self.retention_bytes and len(self.buffers) <= MAX_RETAINED_SESSIONS
+        
+        if within_budget():
+            return evicted
+        for session_id in list(self.buffers):
+            if within_budget():
+                break
+            if session_id in self.completed:
+                self.discard(session_id)
+                evicted.append(session_id)
+        self.stats["evicted_sessions"] += len(evicted)
+        if self.on_evict:
+            for session_id in evicted:
+                self.on_evict(session_id)
+        return evicted
+
+
+class OutputBatcher:
+    """Collects a command's output and publishes it as sequenced multi-line chunks"""
+    
+    def __init__(self, manager: "WebSocketManager", session_id: str, command: str,
+                 flush_interval: float = OUTPUT_FLUSH_MS / 1000, flush_bytes: int = OUTPUT_FLUSH_BYTES,
+                 activity_interval: float = ACTIVITY_INTERVAL):
+        self.manager = manager
+        self.session_id = session_id
+        self.command = command[:50] + "..." if len(command) > 50 else command
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.activity_interval = activity_interval
+        self.buffers: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+        self.buffered: Dict[str, int] = {"stdout": 0, "stderr": 0}
+        self.seq = 0
+        self.stats = {"chunks": 0, "lines": 0, "bytes": 0, "stdout_bytes": 0, "stderr_bytes": 0}
+        self._loop = asyncio.get_running_loop()
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._last_activity = 0.0
+        self._activity_seq = 0
+    
+    def add(self, stream: str, text: str):
+        if not text:
+            return
+        self.buffers[stream].append(text)
+        self.buffered[stream] += len(text)
+        self.stats["bytes"] += len(text)
+        self.stats[f"{stream}_bytes"] += len(text)
+        if self.buffered[stream] >= self.flush_bytes:
+            self._flush_stream(stream)
+        elif self._flush_timer is None:
+            self._flush_timer = self._loop.call_later(self.flush_interval, self.flush)
+    
+    def _flush_stream(self, stream: str):
+        if not self.buffers[stream]:
+            return
+        data = "".join(self.buffers[stream])
+        self.buffers[stream] = []
+        self.buffered[stream] = 0
+        self.seq += 1
+        lines = data.count("\n")
+        self.stats["chunks"] += 1
+        self.stats["lines"] += lines
+        offset = self.manager.sessions.append(self.session_id, self.seq, stream, data)
+        self.manager.publish({
+            "type": "command_output",
+            "session_id": self.session_id,
+            "seq": self.seq,
+            "offset": offset,
+            "stream": stream,
+            "data": data,
+            "lines": lines,
+            "timestamp": datetime.now().isoformat()
+        })
+        
+        now = time.monotonic()
+        if now - self._last_activity >= self.activity_interval:
+            self._publish_activity(now)
+    
+    def _publish_activity(self, now: float):
+        if self._activity_seq == self.seq:
+            return
+        self._last_activity = now
+        self._activity_seq = self.seq
+        self.manager.publish({
+            "type": "command_activity",
+            "session_id": self.session_id,
+            "command": self.command,
+            "seq": self.seq,
+            "lines": self.stats["lines"],
+            "bytes": self.stats["bytes"],
+            "stdout_bytes": self.stats["stdout_bytes"],
+            "stderr_bytes": self.stats["stderr_bytes"]
+        })
+    
+    def flush(self):
+        """Publish everything buffered (called by the timer, and once more when the command ends)"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        for stream in self.buffers:
+            self._flush_stream(stream)
+    
+    def close(self):
+        self.flush()
+        self._publish_activity(time.monotonic())
+
+
+class ClientConnection:
+    """One socket with a bounded outbound queue drained by its own writer task"""
+    
+    def __init__(self, websocket: WebSocket, manager: "WebSocketManager",
+                 max_queue: int = SEND_QUEUE_SIZE, policy: str = SLOW_CONSUMER_POLICY):
+        self.websocket = websocket
+        self.manager = manager
+        self.max_queue = max_queue
+        self.policy = policy if policy in SLOW_CONSUMER_POLICIES else "drop_oldest"
+        # Entries are [message, frame format] lists so a coalesced message can be swapped in place
+        self.queue: deque = deque()
+        self.pending_keys: Dict[tuple, list] = {}
+        self.topics: Set[str] = set()
+        self.format = DEFAULT_FORMAT
+        self.delta = False  # state_snapshot + state_patch instead of full status/metrics messages
+        self.closed = False
+        self.connected_at = time.time()
+        self.last_seen = time.monotonic()  # last inbound message
+        self.heartbeats = False  # has sent ping/pong, so silence means it is gone
+        self.sending_since: Optional[float] = None  # set while a send is in progress
+        self.stats = {"sent": 0, "dropped": 0, "coalesced": 0, "peak_depth": 0}
+        self._wakeup = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+    
+    def start(self):
+        self.writer = asyncio.create_task(self._write_loop())
+    
+    def enqueue(self, message: OutboundMessage) -> bool:
+        """Queue without blocking; applies the slow-consumer policy when full"""
+        if self.closed:
+            return False
+        
+        key = message.coalesce_key
+        if self.policy == "coalesce" and key is not None:
+            slot = self.pending_keys.get(key)
+            if slot is not None:
+                slot[0] = message
+                self.stats["coalesced"] += 1
+                return True
+        
+        if len(self.queue) >= self.max_queue:
+            if self.policy == "disconnect":
+                self.manager.drop_slow_client(self)
+                return False
+            dropped = self.queue.popleft()
+            self._forget(dropped)
+            self.stats["dropped"] += 1
+        
+        slot = [message, self.format]
+        self.queue.append(slot)
+        if self.policy == "coalesce" and key is not None:
+            self.pending_keys[key] = slot
+        self.stats["peak_depth"] = max(self.stats["peak_depth"], len(self.queue))
+        self._wakeup.set()
+        return True
+    
+    def _forget(self, slot: list):
+        key = slot[0].coalesce_key
+        if key is not None and self.pending_keys.get(key) is slot:
+            del self.pending_keys[key]
+    
+    async def _write_loop(self):
+        try:
+            while True:
+                while not self.queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                slot = self.queue.popleft()
+                self._forget(slot)
+                frame = slot[0].frame(slot[1])
+                self.sending_since = time.monotonic()
+                if isinstance(frame, str):
+                    await self.websocket.send_text(frame)
+                else:
+                    await self.websocket.send_bytes(frame)
+                self.sending_since = None
+                self.stats["sent"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"WebSocket send failed: {e}")
+            await self.manager.disconnect(self.websocket)
+    
+    def close(self):
+        self.closed = True
+        self.queue.clear()
+        self.pending_keys.clear()
+        if self.writer and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+
+
 class WebSocketManager:
     """Manages WebSocket connections and real-time streaming"""
     
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+    def __init__(self, max_queue: int = SEND_QUEUE_SIZE, policy: str = SLOW_CONSUMER_POLICY):
+        self.clients: Dict[WebSocket, ClientConnection] = {}
         self.command_sessions: Dict[str, Dict[str, Any]] = {}
         self.agent_status: Dict[str, Dict[str, Any]] = {}
+        self.subscriptions = SubscriptionIndex()
+        self.state = StateStore(self._deliver_patch)
+        # Carries broadcasts to the other workers when running more than one
+        self.backplane: InProcessBackplane = InProcessBackplane()
+        # Evicting a session's output also forgets its metadata
+        self.sessions = SessionStore(on_evict=lambda session_id: self.command_sessions.pop(session_id, None))
+        self.max_queue = max_queue
+        self.policy = policy
+        # Totals carried over from clients that have gone away
+        self.closed_stats = {"sent": 0, "dropped": 0, "coalesced": 0, "slow_disconnects": 0,
+                             "reaped": 0, "orphans_cancelled": 0}
+        self.ping_interval = PING_INTERVAL
+        self.idle_timeout = IDLE_TIMEOUT
+        self.orphan_grace = ORPHAN_GRACE
+        self.processes: Dict[str, asyncio.subprocess.Process] = {}
+        self.max_sessions = MAX_CONCURRENT_SESSIONS
+        self._running_slots = 0
+        # Queued session id -> future resolved with True (slot handed over) or False (cancelled)
+        self._waiting: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+        self._timeouts: Dict[str, asyncio.TimerHandle] = {}
+        self._orphaned_since: Dict[str, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+    
+    @property
+    def active_connections(self) -> Set[WebSocket]:
+        return set(self.clients)
         
-    async def connect(self, websocket: WebSocket):
-        """Accept new WebSocket connection"""
+    async def connect(self, websocket: WebSocket, topics: Optional[List[str]] = None):
+        """Accept new WebSocket connection, subscribed to topics (DEFAULT_TOPICS if not given)"""
         await websocket.accept()
-        self.active_connections.add(websocket)
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+        client = ClientConnection(websocket, self, self.max_queue, self.policy)
+        self.clients[websocket] = client
+        self.subscribe(websocket, DEFAULT_TOPICS if topics is None else topics)
+        client.start()
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        logger.info(f"WebSocket connected. Total connections: {len(self.clients)}")
         
         # Send initial connection message
         await self.send_to_client(websocket, {
@@ -36,97 +588,540 @@ class WebSocketManager:
         
     async def disconnect(self, websocket: WebSocket):
         """Remove WebSocket connection"""
-        self.active_connections.discard(websocket)
-        logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        for pattern in client.topics:
+            self.subscriptions.remove(pattern, client)
+        client.close()
+        for stat in ("sent", "dropped", "coalesced"):
+            self.closed_stats[stat] += client.stats[stat]
+        logger.info(f"WebSocket disconnected. Total connections: {len(self.clients)}")
+        self._check_orphans()
+    
+    def _close_client(self, client: ClientConnection, code: int):
+        client.closed = True
+        
+        async def close():
+            await self.disconnect(client.websocket)
+            try:
+                await client.websocket.close(code=code)
+            except Exception:
+                pass
+        self.run_in_background(close())
+    
+    def drop_slow_client(self, client: ClientConnection):
+        """'disconnect' policy: close a client whose queue is full"""
+        if client.closed:
+            return
+        self.closed_stats["slow_disconnects"] += 1
+        logger.warning(f"Disconnecting slow WebSocket client ({len(client.queue)} messages queued)")
+        self._close_client(client, 1013)  # Try Again Later
+    
+    def run_in_background(self, coro) -> asyncio.Task:
+        """Start a task the manager keeps a reference to (and cancels on close)"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+    
+    def touch(self, websocket: WebSocket, heartbeat: bool = False):
+        """Record inbound traffic from a connection (any message resets its idle timer)"""
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.last_seen = time.monotonic()
+            client.heartbeats = client.heartbeats or heartbeat
+    
+    async def _heartbeat_loop(self):
+        while self.clients or self.processes:
+            await asyncio.sleep(min(self.ping_interval, self.orphan_grace or self.ping_interval))
+            try:
+                self.check_connections()
+            except Exception as e:
+                logger.error(f"WebSocket heartbeat failed: {e}")
+    
+    def check_connections(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Ping quiet connections, reap dead ones and stop unwatched commands"""
+        now = time.monotonic() if now is None else now
+        pinged = reaped = 0
+        ping = None
+        for client in list(self.clients.values()):
+            idle = now - client.last_seen
+            stuck = client.sending_since is not None and now - client.sending_since > self.idle_timeout
+            if (client.heartbeats and idle > self.idle_timeout) or stuck:
+                logger.info(f"Reaping WebSocket client ({'send stalled' if stuck else f'silent {idle:.0f}s'})")
+                self.closed_stats["reaped"] += 1
+                self._close_client(client, 1001)  # Going Away
+                reaped += 1
+            elif idle >= self.ping_interval:
+                ping = ping or OutboundMessage({"type": "ping", "timestamp": datetime.now().isoformat()})
+                client.enqueue(ping)
+                pinged += 1
+        return {"pinged": pinged, "reaped": reaped, "cancelled": self._check_orphans(now)}
+    
+    def _check_orphans(self, now: Optional[float] = None) -> int:
+        """Stop running or queued commands that have had no viewer for orphan_grace seconds"""
+        now = time.monotonic() if now is None else now
+        cancelled = 0
+        for session_id in list(self.processes) + list(self._waiting):
+            if self.subscriptions.has_subscribers(f"command:{session_id}"):
+                self._orphaned_since.pop(session_id, None)
+                continue
+            since = self._orphaned_since.setdefault(session_id, now)
+            if now - since >= self.orphan_grace:
+                self._orphaned_since.pop(session_id, None)
+                if self.terminate_session(session_id, "no viewers"):
+                    self.closed_stats["orphans_cancelled"] += 1
+                    cancelled += 1
+        return cancelled
+    
+    def terminate_session(self, session_id: str, reason: str) -> bool:
+        """SIGTERM a command's process group, escalating to SIGKILL after KILL_GRACE; drops queued ones"""
+        session = self.command_sessions.get(session_id)
+        waiter = self._waiting.pop(session_id, None)
+        if waiter is not None and not waiter.done():
+            if session is not None:
+                session["cancel_reason"] = reason
+            waiter.set_result(False)
+            return True
+        process = self.processes.get(session_id)
+        if process is None or process.returncode is not None:
+            return False
+        if session is not None:
+            session["cancel_reason"] = reason
+        logger.info(f"Stopping command session {session_id}: {reason}")
+        self._signal_group(process, signal.SIGTERM)
+        asyncio.get_running_loop().call_later(KILL_GRACE, self._signal_group, process, signal.SIGKILL)
+        return True
+    
+    @staticmethod
+    def _signal_group(process: asyncio.subprocess.Process, sig: int):
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, sig)  # commands run in their own session, so pid == pgid
+        except ProcessLookupError:
+            pass
+    
+    async def close(self):
+        """Shutdown: stop commands, background tasks, the heartbeat and the backplane"""
+        for session_id in list(self._waiting) + list(self.processes):
+            self.terminate_session(session_id, "server shutting down")
+        for task in list(self._tasks) + ([self._heartbeat] if self._heartbeat else []):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._heartbeat = None
+        await self.stop_backplane()
         
     async def send_to_client(self, websocket: WebSocket, data: Dict[str, Any]):
         """Send data to specific client"""
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.enqueue(OutboundMessage(data))
+            return
         try:
             await websocket.send_json(data)
         except Exception as e:
             logger.error(f"Error sending to client: {e}")
-            await self.disconnect(websocket)
             
-    async def broadcast(self, data: Dict[str, Any]):
-        """Broadcast data to all connected clients"""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(data)
-            except Exception as e:
-                logger.error(f"Error broadcasting: {e}")
-                disconnected.append(connection)
+    async def negotiate(self, websocket: WebSocket, hello: Dict[str, Any]):
+        """
+        Handshake: {type: hello, encoding: json|msgpack, compact: bool, deflate: bool, delta: bool}.
+        The reply still uses the old format; every frame after it uses the agreed one. With delta,
+        agent status and metrics arrive as a state_snapshot per subscribed key, then state_patch
+        diffs; a client that sees a version gap asks for {type: get_state} again.
+        """
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        encoding = hello.get("encoding", "json")
+        notes = []
+        if encoding not in ENCODINGS:
+            notes.append(f"unknown encoding '{encoding}'")
+            encoding = "json"
+        elif encoding == "msgpack" and msgpack is None:
+            notes.append("msgpack is not installed on the server")
+            encoding = "json"
+        
+        # permessage-deflate is negotiated by the ASGI server during the upgrade; when the client
+        # offered it there is no point compressing again here
+        offered = websocket.headers.get("sec-websocket-extensions", "") if hasattr(websocket, "headers") else ""
+        transport_deflate = "permessage-deflate" in offered
+        deflate = bool(hello.get("deflate")) and not transport_deflate
+        if hello.get("deflate") and transport_deflate:
+            notes.append("permessage-deflate already compresses this connection")
         
-        # Clean up disconnected clients
-        for conn in disconnected:
-            await self.disconnect(conn)
+        frame_format = (encoding, bool(hello.get("compact")), deflate)
+        await self.send_to_client(websocket, {
+            "type": "hello_ack",
+            "encoding": encoding,
+            "compact": frame_format[1],
+            "deflate": deflate,
+            "transport_compression": "permessage-deflate" if transport_deflate else None,
+            "binary": encoding != "json" or deflate,
+            "delta": bool(hello.get("delta")),
+            "notes": notes,
+            "timestamp": datetime.now().isoformat()
+        })
+        # Queued entries keep the format they were queued under, so the ack goes out in the old one
+        client.format = frame_format
+        client.delta = bool(hello.get("delta"))
+        if client.delta:
+            self._send_snapshots(client, client.topics)
+    
+    def subscribe(self, websocket: WebSocket, patterns: List[str]) -> List[str]:
+        """Add topic patterns for a connection; returns the ones accepted"""
+        client = self.clients.get(websocket)
+        if client is None:
+            return []
+        accepted = []
+        for pattern in patterns:
+            if not isinstance(pattern, str) or not pattern or len(pattern) > 200:
+                continue
+            if pattern not in client.topics and len(client.topics) >= MAX_SUBSCRIPTIONS:
+                break
+            client.topics.add(pattern)
+            self.subscriptions.add(pattern, client)
+            accepted.append(pattern)
+        if client.delta and accepted:
+            self._send_snapshots(client, accepted)
+        return accepted
+    
+    def unsubscribe(self, websocket: WebSocket, patterns: List[str]) -> List[str]:
+        client = self.clients.get(websocket)
+        if client is None:
+            return []
+        removed = [p for p in patterns if p in client.topics]
+        for pattern in removed:
+            client.topics.discard(pattern)
+            self.subscriptions.remove(pattern, client)
+        return removed
+    
+    async def start_backplane(self, backplane: Optional[InProcessBackplane] = None):
+        """Join the cross-worker event backplane (EVENT_BACKPLANE / REDIS_URL / EVENT_BROKER_SOCKET)"""
+        backplane = backplane or create_backplane()
+        try:
+            await backplane.start(self._deliver_remote)
+        except Exception as e:
+            logger.error(f"Event backplane '{backplane.name}' unavailable, staying in-process: {e}")
+            backplane = InProcessBackplane()
+            await backplane.start(self._deliver_remote)
+        self.backplane = backplane
+        logger.info(f"WebSocket events use the '{backplane.name}' backplane")
+    
+    async def stop_backplane(self):
+        await self.backplane.stop()
+        self.backplane = InProcessBackplane()
+    
+    def _deliver_remote(self, topic: Optional[str], data: Dict[str, Any]):
+        self.deliver(OutboundMessage(data), topic or topic_for(data))
+    
+    def deliver(self, message: OutboundMessage, topic: str, exclude: Optional[WebSocket] = None) -> int:
+        """Queue a message for this worker's connections subscribed to topic; returns how many"""
+        subscribers = self.subscriptions.match(topic)
+        field = STATE_FIELDS.get(message.data.get("type"))
+        is_state = field is not None and isinstance(message.data.get(field), dict)
+        if is_state:
+            # Each worker keeps its own store, so remote updates feed it too
+            self.state.update(topic, message.data[field])
+        delivered = 0
+        for client in subscribers:
+            if client.websocket is not exclude and not (is_state and client.delta):
+                client.enqueue(message)
+                delivered += 1
+        return delivered
+    
+    def _deliver_patch(self, key: str, patch: Dict[str, Any]):
+        message = OutboundMessage(patch)
+        for client in self.subscriptions.match(key):
+            if client.delta:
+                client.enqueue(message)
+    
+    def _send_snapshots(self, client: ClientConnection, patterns):
+        for key in self.state.keys_matching(patterns):
+            client.enqueue(OutboundMessage(self.state.snapshot(key)))
+    
+    def publish(self, data: Dict[str, Any], topic: Optional[str] = None,
+                exclude: Optional[WebSocket] = None) -> int:
+        """
+        Deliver to local subscribers (except exclude) and hand the event to the backplane for the
+        other workers. Never waits on a socket, so request handlers can call it inline.
+        """
+        topic = topic or topic_for(data)
+        message = OutboundMessage(data)
+        delivered = self.deliver(message, topic, exclude)
+        if self.backplane.name != "memory":
+            self.backplane.forward(topic, message.text)
+        return delivered
+    
+    async def broadcast(self, data: Dict[str, Any], topic: Optional[str] = None):
+        """Deliver to connections subscribed to the message's topic (queued per client; serialised once)"""
+        self.publish(data, topic)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth and delivery counters across connections"""
+        depths = [len(c.queue) for c in self.clients.values()]
+        totals = dict(self.closed_stats)
+        for client in self.clients.values():
+            for stat in ("sent", "dropped", "coalesced"):
+                totals[stat] += client.stats[stat]
+        return {
+            "connections": len(self.clients),
+            "policy": self.policy,
+            "max_queue": self.max_queue,
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "peak_queue_depth": max((c.stats["peak_depth"] for c in self.clients.values()), default=0),
+            "subscriptions": sum(len(c.topics) for c in self.clients.values()),
+            "running_commands": len(self.processes),
+            "queued_commands": len(self._waiting),
+            "max_concurrent_commands": self.max_sessions,
+            "session_buffers": len(self.sessions.buffers),
+            "session_buffer_bytes": self.sessions.total_bytes,
+            "evicted_sessions": self.sessions.stats["evicted_sessions"],
+            "backplane": self.backplane.get_stats(),
+            "state": {**self.state.stats, "keys": len(self.state.published)},
+            **totals
+        }
             
     async def handle_message(self, websocket: WebSocket, message: Dict[str, Any]):
         """Handle incoming WebSocket message"""
         msg_type = message.get("type", "")
+        self.touch(websocket, heartbeat=msg_type in ("ping", "pong"))
         
         if msg_type == "ping":
             await self.send_to_client(websocket, {"type": "pong"})
             
+        elif msg_type == "pong":
+            pass  # reply to a server ping; touch() above is all it needs
+            
+        elif msg_type == "hello":
+            await self.negotiate(websocket, message)
+            
+        elif msg_type == "get_state":
+            client = self.clients.get(websocket)
+            if client is not None:
+                self._send_snapshots(client, message.get("keys") or client.topics)
+            
         elif msg_type == "execute_command":
-            await self.stream_command_execution(websocket, message)
+            # In the background, so this connection keeps reading (heartbeats, other messages)
+            self.run_in_background(self.stream_command_execution(websocket, message))
             
         elif msg_type == "subscribe_agent":
             agent_id = message.get("agent_id")
             await self.subscribe_to_agent(websocket, agent_id)
             
+        elif msg_type in ("subscribe", "unsubscribe"):
+            topics = message.get("topics") or ([message["topic"]] if message.get("topic") else [])
+            if not isinstance(topics, list):
+                topics = [topics]
+            if msg_type == "subscribe":
+                changed = self.subscribe(websocket, topics)
+            else:
+                changed = self.unsubscribe(websocket, topics)
+            client = self.clients.get(websocket)
+            await self.send_to_client(websocket, {
+                "type": f"{msg_type}d",
+                "topics": changed,
+                "subscriptions": sorted(client.topics) if client else [],
+                "timestamp": datetime.now().isoformat()
+            })
+            
+        elif msg_type == "command_control":
+            await self.control_session(websocket, message)
+            
+        elif msg_type == "resume_session":
+            try:
+                offset = max(0, int(message.get("offset") or 0))
+            except (TypeError, ValueError):
+                await self.send_to_client(websocket, {
+                    "type": "resume_failed",
+                    "session_id": message.get("session_id"),
+                    "error": "offset must be a non-negative integer",
+                    "timestamp": datetime.now().isoformat()
+                })
+            else:
+                self.resume_session(websocket, message.get("session_id"), offset)
+            
         elif msg_type == "get_status":
             await self.send_status(websocket)
             
+    def _session_limits(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Server limits, lowered (never raised) by the limits/timeout a client asks for"""
+        limits = dict(SESSION_LIMITS)
+        requested = dict(message.get("limits") or {})
+        if message.get("timeout") is not None:
+            requested["timeout"] = message["timeout"]
+        for name, value in requested.items():
+            if name not in limits:
+                continue
+            try:
+                value = type(limits[name])(float(value))
+            except (TypeError, ValueError):
+                continue
+            if value > 0:
+                limits[name] = min(limits[name], value) if limits[name] else value
+        return limits
+    
+    @staticmethod
+    def _rlimits(limits: Dict[str, Any]) -> Dict[str, tuple]:
+        """prlimit resource name -> (soft, hard) for a session's CPU-time and address-space limits"""
+        rlimits = {}
+        if limits["cpu_seconds"]:
+            cpu = int(limits["cpu_seconds"])
+            rlimits["cpu"] = (cpu, cpu + 5)  # SIGXCPU at the soft limit, SIGKILL at the hard one
+        if limits["memory_mb"]:
+            memory = int(limits["memory_mb"] * 1024 * 1024)
+            rlimits["as"] = (memory, memory)
+        return rlimits
+    
+    @staticmethod
+    def _apply_rlimits(pid: int, rlimits: Dict[str, tuple]):
+        """Fallback without prlimit(1): set the limits on the gated shell before it runs the command"""
+        if not hasattr(resource, "prlimit"):
+            logger.warning("Neither prlimit(1) nor resource.prlimit is available; command runs without CPU/memory limits")
+            return
+        names = {"cpu": resource.RLIMIT_CPU, "as": resource.RLIMIT_AS}
+        for name, value in rlimits.items():
+            try:
+                resource.prlimit(pid, names[name], value)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not apply {name} limit to {pid}: {e}")
+    
+    async def _acquire_slot(self, session_id: str) -> bool:
+        """Wait for one of MAX_CONCURRENT_SESSIONS; False if the session was cancelled while queued"""
+        if self._running_slots < self.max_sessions and not self._waiting:
+            self._running_slots += 1
+            return True
+        if len(self._waiting) >= MAX_QUEUED_SESSIONS:
+            raise RuntimeError(f"Too many queued commands ({MAX_QUEUED_SESSIONS}); try again later")
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting[session_id] = waiter
+        self.command_sessions[session_id]["status"] = "queued"
+        await self.broadcast({
+            "type": "command_queued",
+            "session_id": session_id,
+            "position": len(self._waiting),
+            "running": self._running_slots,
+            "max_concurrent": self.max_sessions,
+            "timestamp": datetime.now().isoformat()
+        })
+        try:
+            return await waiter  # the slot is handed over by _release_slot
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self._release_slot()
+            raise
+        finally:
+            self._waiting.pop(session_id, None)
+    
+    def _release_slot(self):
+        while self._waiting:
+            session_id, waiter = next(iter(self._waiting.items()))
+            del self._waiting[session_id]
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._running_slots -= 1
+    
     async def stream_command_execution(self, websocket: WebSocket, message: Dict[str, Any]):
         """Stream command execution output in real-time"""
         command = message.get("command", "")
         session_id = message.get("session_id", f"session-{datetime.now().timestamp()}")
+        limits = self._session_limits(message)
+        
+        topic = f"command:{session_id}"
+        
+        previous = self.command_sessions.get(session_id)
+        if previous is not None and previous["status"] in ("queued", "running"):
+            # Only to the requester: the session's viewers are watching the command that owns the id
+            await self.send_to_client(websocket, {
+                "type": "command_error",
+                "session_id": session_id,
+                "error": "A command with this session_id is still active",
+                "timestamp": datetime.now().isoformat()
+            })
+            return
         
         # Store session
+        # Viewers are the session topic's subscribers; no socket reference is kept here
         self.command_sessions[session_id] = {
             "command": command,
             "started_at": datetime.now().isoformat(),
-            "websocket": websocket,
-            "status": "running"
+            "status": "running",
+            "limits": limits
         }
         
-        # Send start message
-        await self.send_to_client(websocket, {
-            "type": "command_start",
-            "session_id": session_id,
-            "command": command,
-            "timestamp": datetime.now().isoformat()
-        })
+        # Output is published on the session topic; the requesting client watches it, others may join
+        self.subscribe(websocket, [topic])
+        self.sessions.create(session_id)
         
+        batcher = OutputBatcher(self, session_id, command)
+        has_slot = False
         try:
+            has_slot = await self._acquire_slot(session_id)
+            session = self.command_sessions[session_id]
+            if not has_slot:
+                session["status"] = "cancelled"
+                await self.broadcast({
+                    "type": "command_complete",
+                    "session_id": session_id,
+                    "exit_code": None,
+                    "cancel_reason": session.get("cancel_reason"),
+                    "seq": 0,
+                    "timestamp": datetime.now().isoformat()
+                })
+                return
+            session["status"] = "running"
+            
+            # Send start message
+            await self.broadcast({
+                "type": "command_start",
+                "session_id": session_id,
+                "command": command,
+                "limits": limits,
+                "timestamp": datetime.now().isoformat()
+            })
+            
             # Execute command with streaming output
-            process = await asyncio.create_subprocess_shell(
-                command,
+            # Limits are set by prlimit(1) rather than a preexec_fn, which can deadlock the child
+            # when other threads (asyncio.to_thread workers) hold locks at fork time
+            rlimits = self._rlimits(limits)
+            argv = ["/bin/sh", "-c", command]
+            if rlimits and PRLIMIT:
+                argv = [PRLIMIT, *(f"--{name}={soft}:{hard}" for name, (soft, hard) in rlimits.items()), "--", *argv]
+            elif rlimits:
+                # Without prlimit(1) the shell waits for one line on stdin, released once the limits are set
+                argv = ["/bin/sh", "-c", 'read -r _ && exec /bin/sh -c "$0"', command]
+            process = await asyncio.create_subprocess_exec(
+                *argv,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                stdin=asyncio.subprocess.PIPE
+                stdin=asyncio.subprocess.PIPE,
+                start_new_session=True  # own process group, so signals reach the whole pipeline
             )
+            if rlimits and not PRLIMIT:
+                self._apply_rlimits(process.pid, rlimits)
+                process.stdin.write(b"\n")
+            self.processes[session_id] = process
+            self.set_session_timeout(session_id, limits["timeout"])
             
-            # Stream output line by line
+            # Read in large chunks; the batcher turns them into time/size-bounded messages
             async def stream_output(stream, stream_type):
-                async for line in stream:
-                    output = line.decode('utf-8', errors='replace')
-                    await self.send_to_client(websocket, {
-                        "type": "command_output",
-                        "session_id": session_id,
-                        "stream": stream_type,
-                        "data": output,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                    # Also broadcast to other clients for monitoring
-                    await self.broadcast({
-                        "type": "command_activity",
-                        "session_id": session_id,
-                        "command": command[:50] + "..." if len(command) > 50 else command,
-                        "stream": stream_type
-                    })
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                while True:
+                    chunk = await stream.read(OUTPUT_READ_SIZE)
+                    if not chunk:
+                        break
+                    if limits["output_bytes"] and batcher.stats["bytes"] >= limits["output_bytes"]:
+                        # Keep draining so the process is not blocked on a full pipe while it stops
+                        if not session.get("output_truncated"):
+                            session["output_truncated"] = True
+                            self.terminate_session(session_id, "output limit exceeded")
+                        continue
+                    batcher.add(stream_type, decoder.decode(chunk))
+                batcher.add(stream_type, decoder.decode(b"", final=True))
             
             # Create tasks for stdout and stderr
             stdout_task = asyncio.create_task(stream_output(process.stdout, "stdout"))
@@ -135,23 +1130,32 @@ class WebSocketManager:
             # Wait for process to complete
             await asyncio.gather(stdout_task, stderr_task)
             await process.wait()
+            batcher.close()
+            # RLIMIT_CPU raises SIGXCPU; sh reports it as 128 + signal when it did not exec the command
+            if process.returncode in (-signal.SIGXCPU, 128 + signal.SIGXCPU) and not session.get("cancel_reason"):
+                session["cancel_reason"] = "CPU time limit exceeded"
             
             # Send completion message
-            await self.send_to_client(websocket, {
+            await self.broadcast({
                 "type": "command_complete",
                 "session_id": session_id,
                 "exit_code": process.returncode,
+                "cancel_reason": session.get("cancel_reason"),
+                "seq": batcher.seq,
                 "timestamp": datetime.now().isoformat()
             })
             
             # Update session status
-            self.command_sessions[session_id]["status"] = "completed"
-            self.command_sessions[session_id]["exit_code"] = process.returncode
-            self.command_sessions[session_id]["completed_at"] = datetime.now().isoformat()
+            session["status"] = "cancelled" if session.get("cancel_reason") else "completed"
+            session["exit_code"] = process.returncode
+            session["completed_at"] = datetime.now().isoformat()
+            session["output"] = dict(batcher.stats)
             
         except Exception as e:
+            batcher.close()
+            self.command_sessions[session_id]["output"] = dict(batcher.stats)
             logger.error(f"Command execution error: {e}")
-            await self.send_to_client(websocket, {
+            await self.broadcast({
                 "type": "command_error",
                 "session_id": session_id,
                 "error": str(e),
@@ -161,6 +1165,143 @@ class WebSocketManager:
             self.command_sessions[session_id]["status"] = "error"
             self.command_sessions[session_id]["error"] = str(e)
             
+        finally:
+            if has_slot:
+                self._release_slot()
+            timer = self._timeouts.pop(session_id, None)
+            if timer is not None:
+                timer.cancel()
+            self.processes.pop(session_id, None)
+            self._orphaned_since.pop(session_id, None)
+            self.sessions.complete(session_id)
+            self.sessions.evict()
+    
+    def set_session_timeout(self, session_id: str, seconds: float):
+        """(Re)arm a session's wall-clock limit, counted from now; 0 clears it"""
+        timer = self._timeouts.pop(session_id, None)
+        if timer is not None:
+            timer.cancel()
+        if seconds and seconds > 0:
+            self._timeouts[session_id] = asyncio.get_running_loop().call_later(
+                seconds, self.terminate_session, session_id, f"timed out after {seconds:g}s")
+    
+    async def control_session(self, websocket: WebSocket, message: Dict[str, Any]):
+        """
+        {type: command_control, session_id, action} where action is one of
+        stdin (data, eof), signal (signal: SIGINT|SIGTERM|SIGHUP|SIGQUIT), kill, set_timeout (seconds).
+        Only viewers of the session (subscribed to command:{session_id}) may control it.
+        """
+        session_id = message.get("session_id")
+        action = message.get("action")
+        client = self.clients.get(websocket)
+        process = self.processes.get(session_id)
+        error = None
+        
+        if client is None:
+            return
+        if f"command:{session_id}" not in client.topics:
+            error = "Not a viewer of this session"
+        elif action == "kill" and session_id in self._waiting:
+            self.terminate_session(session_id, "killed while queued")
+        elif process is None or process.returncode is not None:
+            error = "Session is not running"
+        elif action == "stdin":
+            try:
+                if message.get("data"):
+                    process.stdin.write(str(message["data"]).encode())
+                    await asyncio.wait_for(process.stdin.drain(), timeout=5)
+                if message.get("eof"):
+                    process.stdin.close()
+            except (ConnectionError, asyncio.TimeoutError, RuntimeError) as e:
+                error = f"stdin unavailable: {e or type(e).__name__}"
+        elif action == "signal":
+            name = message.get("signal", "SIGINT")
+            if name not in CONTROL_SIGNALS:
+                error = f"Unsupported signal {name}; use one of {', '.join(CONTROL_SIGNALS)}"
+            else:
+                if name in ("SIGTERM", "SIGQUIT"):
+                    self.command_sessions[session_id]["cancel_reason"] = f"{name} from client"
+                self._signal_group(process, CONTROL_SIGNALS[name])
+        elif action == "kill":
+            self.command_sessions[session_id]["cancel_reason"] = "killed by client"
+            self._signal_group(process, signal.SIGKILL)
+        elif action == "set_timeout":
+            try:
+                seconds = max(0.0, float(message.get("seconds") or 0))
+            except (TypeError, ValueError):
+                seconds = -1
+            if seconds < 0:
+                error = "seconds must be a number"
+            else:
+                self.set_session_timeout(session_id, seconds)
+                self.command_sessions[session_id]["limits"]["timeout"] = seconds
+        elif action == "resize":
+            error = "Commands run on pipes, not a PTY; resize is not supported"
+        else:
+            error = f"Unknown action {action}"
+        
+        await self.send_to_client(websocket, {
+            "type": "command_control_ack",
+            "session_id": session_id,
+            "action": action,
+            "ok": error is None,
+            "error": error,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    def resume_session(self, websocket: WebSocket, session_id: str, offset: int = 0):
+        """Replay a session's buffered output from offset, then follow it live"""
+        client = self.clients.get(websocket)
+        session = self.command_sessions.get(session_id)
+        buffer = self.sessions.get(session_id)
+        if client is None:
+            return
+        if session is None or buffer is None:
+            client.enqueue(OutboundMessage({
+                "type": "resume_failed",
+                "session_id": session_id,
+                "error": "Unknown or expired session",
+                "timestamp": datetime.now().isoformat()
+            }))
+            return
+        
+        # Replay and subscribe without yielding, so no live chunk can slip in between or be doubled
+        client.enqueue(OutboundMessage({
+            "type": "session_resumed",
+            "session_id": session_id,
+            "command": session["command"],
+            "status": session["status"],
+            "requested_offset": offset,
+            "start_offset": buffer.start_offset,
+            "end_offset": buffer.end_offset,
+            "truncated": offset < buffer.start_offset,
+            "timestamp": datetime.now().isoformat()
+        }))
+        for chunk_offset, seq, stream, data in buffer.read_from(offset):
+            client.enqueue(OutboundMessage({
+                "type": "command_output",
+                "session_id": session_id,
+                "seq": seq,
+                "offset": chunk_offset,
+                "stream": stream,
+                "data": data,
+                "lines": data.count("\n"),
+                "replay": True
+            }))
+        
+        if session["status"] in ("queued", "running"):
+            self.subscribe(websocket, [f"command:{session_id}"])
+        else:
+            client.enqueue(OutboundMessage({
+                "type": "command_error" if session["status"] == "error" else "command_complete",
+                "session_id": session_id,
+                "exit_code": session.get("exit_code"),
+                "error": session.get("error"),
+                "seq": session.get("output", {}).get("chunks", 0),
+                "end_offset": buffer.end_offset,
+                "replay": True
+            }))
+            
     async def subscribe_to_agent(self, websocket: WebSocket, agent_id: str):
         """Subscribe to real-time agent status updates"""
         # Send current agent status
@@ -172,7 +1313,7 @@ class WebSocketManager:
                 "timestamp": datetime.now().isoformat()
             })
         
-        # Mark subscription (would need proper subscription management in production)
+        self.subscribe(websocket, [f"agent:{agent_id}"])
         await self.send_to_client(websocket, {
             "type": "subscription_confirmed",
             "agent_id": agent_id,
@@ -186,7 +1327,7 @@ class WebSocketManager:
             "updated_at": datetime.now().isoformat()
         }
         
-        # Broadcast status update to all connections
+        # Delivered to agent:{agent_id} / agent:* subscribers
         await self.broadcast({
             "type": "agent_status_update",
             "agent_id": agent_id,
@@ -235,4 +1376,4 @@ class WebSocketManager:
         })
         
 # Global WebSocket manager instance
-ws_manager = WebSocketManager()
\ No newline at end of file
+ws_manager = WebSocketManager()